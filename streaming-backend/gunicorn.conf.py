@@ -0,0 +1,20 @@
+import os
+
+# Read by `gunicorn src.main:app` from the working directory. gevent workers
+# serve each request on a greenlet, so an open notification stream (SSE) costs
+# a parked greenlet rather than one of a fixed number of threads. Set
+# GUNICORN_WORKER_CLASS=gthread for threaded workers; the app then caps streams
+# below GUNICORN_THREADS.
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '5001')}"
+workers = int(os.environ.get('GUNICORN_WORKERS', 2))
+worker_class = os.environ.get('GUNICORN_WORKER_CLASS', 'gevent')
+worker_connections = int(os.environ.get('GUNICORN_WORKER_CONNECTIONS', 1000))
+threads = int(os.environ.get('GUNICORN_THREADS', 64))
+
+
+def post_fork(server, worker):
+    if worker_class == 'gevent':
+        # Let psycopg2 yield to other greenlets while it waits on Postgres
+        from psycogreen.gevent import patch_psycopg
+        patch_psycopg()
@@ -7,6 +7,8 @@ from src.main import app
 from src.models.user import User, db
 from src.models.content import Content, Episode, Genre
 from src.models.interactions import Rating, Comment, WatchHistory, Favorite
+from src.services.search import create_search_index
+from src.services.aggregates import reconcile_aggregates
 from datetime import datetime, date
 
 def seed_database():
@@ -19,6 +21,7 @@ def seed_database():
         # Clear existing data
         db.drop_all()
         db.create_all()
+        create_search_index()
         
         print("Seeding database with sample data...")
         
@@ -320,9 +323,8 @@ def seed_database():
         
         db.session.commit()
         
-        # Update content ratings
-        for content in all_content:
-            content.calculate_average_rating()
+        # Update content ratings and engagement counts
+        reconcile_aggregates()
         
         # Add some view counts
         for content in all_content:
@@ -0,0 +1,158 @@
+import os
+import time
+import threading
+import click
+from flask.cli import with_appcontext
+
+# Maintenance commands, run with `flask --app src.main <command>`
+
+
+@click.command('reconcile-aggregates')
+@with_appcontext
+def reconcile_aggregates_command():
+    """Recompute content engagement aggregates and unread notification counts."""
+    from src.services.aggregates import reconcile_aggregates
+    from src.services.notifications import reconcile_unread_counts
+    updated = reconcile_aggregates()
+    click.echo(f'Reconciled aggregates for {updated} titles')
+    users = reconcile_unread_counts()
+    click.echo(f'Reconciled unread notification counts for {users} users')
+
+
+@click.command('rollup-views')
+@click.option('--retention-days', default=None, type=int, help='Prune rolled-up events older than this (0 keeps all).')
+@with_appcontext
+def rollup_views_command(retention_days):
+    """Fold new view events into the daily per-title rollups."""
+    from flask import current_app
+    from src.services.view_rollup import rollup_views
+    if retention_days is None:
+        retention_days = current_app.config.get('VIEW_EVENT_RETENTION_DAYS', 30)
+    rolled = rollup_views(retention_days)
+    click.echo(f'Rolled up {rolled} view events')
+
+
+@click.command('import-catalog')
+@click.argument('source', type=click.File('rb'))
+@click.option('--batch-size', default=None, type=int, help='Lines written per transaction.')
+@with_appcontext
+def import_catalog_command(source, batch_size):
+    """Import genres, content and episodes from an NDJSON file ('-' for stdin)."""
+    from flask import current_app
+    from src.services.catalog_import import CatalogImporter, DEFAULT_BATCH_SIZE
+    importer = CatalogImporter(batch_size or current_app.config.get('IMPORT_BATCH_SIZE', DEFAULT_BATCH_SIZE))
+    started = time.perf_counter()
+    report = importer.run(source)
+    created = report['created']
+    click.echo(
+        f"{report['lines']} lines in {time.perf_counter() - started:.1f}s: {created['genres']} genres, "
+        f"{created['content']} titles, {created['episodes']} episodes, {report['error_count']} errors"
+    )
+    for error in report['errors']:
+        click.echo(f"  line {error['line']}: {error['error']}", err=True)
+
+
+@click.command('fanout-notifications')
+@with_appcontext
+def fanout_notifications_command():
+    """Run pending new-episode notification fan-out jobs."""
+    from flask import current_app
+    from src.services.fanout import run_pending, DEFAULT_CHUNK_SIZE
+    written = run_pending(current_app.config.get('NOTIFICATION_FANOUT_CHUNK_SIZE', DEFAULT_CHUNK_SIZE))
+    click.echo(f'Wrote {written} notifications')
+
+
+@click.command('build-recommendations')
+@click.option('--neighbors', default=20, help='Neighbours kept per title.')
+@with_appcontext
+def build_recommendations_command(neighbors):
+    """Rebuild the item-to-item similarity table (needs numpy and scipy)."""
+    from src.services.collaborative import build_item_neighbors
+    report = build_item_neighbors(neighbors)
+    click.echo(
+        f"{report['users']} users x {report['titles']} titles, {report['interactions']} interactions: "
+        f"{report['pairs']} neighbour pairs in {report['seconds']}s"
+    )
+
+
+@click.command('train-recommender')
+@click.option('--incremental', is_flag=True, help='Only fold in users with new interactions.')
+@click.option('--factors', default=32, help='Latent factors.')
+@click.option('--iterations', default=10, help='ALS iterations (full runs).')
+@click.option('--regularization', default=0.1)
+@click.option('--alpha', default=40.0, help='Confidence scaling for implicit feedback.')
+@click.option('--top-n', default=50, help='Recommendations stored per user.')
+@click.option('--workers', default=0, help='Training processes (default: all cores).')
+@with_appcontext
+def train_recommender_command(incremental, factors, iterations, regularization, alpha, top_n, workers):
+    """Train the ALS recommender and rebuild per-user top-N (needs numpy and scipy)."""
+    from flask import current_app
+    from src.services import factorization
+
+    model_path = factorization.default_model_path(current_app)
+    if incremental:
+        report = factorization.train_incremental(model_path, top_n=top_n, workers=workers or None)
+    else:
+        report = factorization.train(
+            model_path, factors=factors, iterations=iterations, regularization=regularization,
+            alpha=alpha, top_n=top_n, workers=workers or None
+        )
+    for key, value in report.items():
+        click.echo(f'{key}: {value}')
+
+
+@click.command('bench-login')
+@click.option('--seconds', default=5.0, help='How long to run.')
+@click.option('--threads', default=8, help='Concurrent simulated logins.')
+@with_appcontext
+def bench_login_command(seconds, threads):
+    """Measure password verification throughput (logins/sec per core)."""
+    from src.services.passwords import password_hasher, HashingBusy
+
+    password = 'Benchmark123'
+    password_hash = password_hasher.hash(password)
+    latencies = []
+    busy = [0]
+    lock = threading.Lock()
+    deadline = time.perf_counter() + seconds
+
+    def login_loop():
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            try:
+                password_hasher.verify(password_hash, password)
+            except HashingBusy:
+                with lock:
+                    busy[0] += 1
+                continue
+            with lock:
+                latencies.append(time.perf_counter() - started)
+
+    workers = [threading.Thread(target=login_loop) for _ in range(threads)]
+    started = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    elapsed = time.perf_counter() - started
+
+    cores = min(password_hasher.workers, os.cpu_count() or 1) if password_hasher.workers > 0 else 1
+    latencies.sort()
+    rate = len(latencies) / elapsed
+    click.echo(f'method={password_hasher.method} pool_workers={password_hasher.workers} threads={threads}')
+    click.echo(f'logins={len(latencies)} busy_rejections={busy[0]} elapsed={elapsed:.2f}s')
+    click.echo(f'logins/sec={rate:.1f} logins/sec/core={rate / cores:.1f}')
+    if latencies:
+        p50 = latencies[len(latencies) // 2]
+        p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+        click.echo(f'latency p50={p50 * 1000:.0f}ms p95={p95 * 1000:.0f}ms')
+
+
+def register_commands(app):
+    app.cli.add_command(reconcile_aggregates_command)
+    app.cli.add_command(rollup_views_command)
+    app.cli.add_command(import_catalog_command)
+    app.cli.add_command(fanout_notifications_command)
+    app.cli.add_command(build_recommendations_command)
+    app.cli.add_command(train_recommender_command)
+    app.cli.add_command(bench_login_command)
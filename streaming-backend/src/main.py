@@ -7,7 +7,10 @@ from flask import Flask, send_from_directory
 from flask_cors import CORS
 from src.models.user import db
 from src.models.content import Content, Episode, Genre
-from src.models.interactions import Rating, Comment, WatchHistory, Favorite, Notification
+from src.models.interactions import Rating, Comment, WatchHistory, Favorite, Notification, NotificationFanout
+from src.models.recommendation import ContentSimilarity, UserRecommendation
+from src.models.analytics import ViewEvent, DailyContentViews, RollupCheckpoint
+from src.models.schema import upgrade_schema
 
 # Import all blueprints
 from src.routes.user import user_bp
@@ -15,6 +18,18 @@ from src.routes.auth import auth_bp
 from src.routes.content import content_bp
 from src.routes.interactions import interactions_bp
 from src.routes.admin import admin_bp
+from src.commands import register_commands
+from src.services import search
+from src.services.cache import response_cache
+from src.services.view_counter import view_counter
+from src.services.view_rollup import view_rollup
+from src.services.watch_progress import watch_progress
+from src.services.principals import principal_cache
+from src.services.passwords import password_hasher
+from src.services.dashboard import dashboard_stats
+from src.services.fanout import notification_fanout
+from src.services.notification_stream import notification_stream
+from src.services.home import home_assembler
 
 app = Flask(__name__, static_folder=os.path.join(os.path.dirname(__file__), 'static'))
 app.config['SECRET_KEY'] = 'streaming-platform-secret-key-2024'
@@ -34,9 +49,84 @@ app.config["SQLALCHEMY_DATABASE_URI"] = os.environ.get("DATABASE_URL", "sqlite:/
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 db.init_app(app)
 
+# Response cache for anonymous catalog reads
+app.config['RESPONSE_CACHE_TTL'] = int(os.environ.get('RESPONSE_CACHE_TTL', 60))
+app.config['RESPONSE_CACHE_MAX_ENTRIES'] = int(os.environ.get('RESPONSE_CACHE_MAX_ENTRIES', 1024))
+response_cache.init_app(app)
+
+# Write-behind view counters (interval 0 writes through on every view)
+app.config['VIEW_COUNTER_FLUSH_INTERVAL'] = float(os.environ.get('VIEW_COUNTER_FLUSH_INTERVAL', 10))
+app.config['VIEW_COUNTER_MAX_PENDING'] = int(os.environ.get('VIEW_COUNTER_MAX_PENDING', 1000))
+view_counter.init_app(app)
+
+# Daily view rollups behind windowed analytics (interval 0 leaves them to `flask rollup-views`)
+app.config['VIEW_ROLLUP_INTERVAL'] = float(os.environ.get('VIEW_ROLLUP_INTERVAL', 300))
+app.config['VIEW_EVENT_RETENTION_DAYS'] = int(os.environ.get('VIEW_EVENT_RETENTION_DAYS', 30))
+view_rollup.init_app(app)
+
+# Coalesced player heartbeats (POST /api/watch-history/batch)
+app.config['WATCH_PROGRESS_FLUSH_INTERVAL'] = float(os.environ.get('WATCH_PROGRESS_FLUSH_INTERVAL', 5))
+app.config['WATCH_PROGRESS_MAX_PENDING'] = int(os.environ.get('WATCH_PROGRESS_MAX_PENDING', 5000))
+watch_progress.init_app(app)
+
+# Authenticated principals resolved by token_required
+app.config['PRINCIPAL_CACHE_TTL'] = int(os.environ.get('PRINCIPAL_CACHE_TTL', 30))
+app.config['PRINCIPAL_CACHE_MAX_ENTRIES'] = int(os.environ.get('PRINCIPAL_CACHE_MAX_ENTRIES', 10000))
+principal_cache.init_app(app)
+
+# Password hashing runs in a bounded process pool (0 workers hashes inline)
+app.config['PASSWORD_HASH_METHOD'] = os.environ.get('PASSWORD_HASH_METHOD', 'scrypt')
+app.config['PASSWORD_HASH_WORKERS'] = int(os.environ.get('PASSWORD_HASH_WORKERS', min(2, os.cpu_count() or 1)))
+app.config['PASSWORD_HASH_MAX_PENDING'] = int(os.environ.get('PASSWORD_HASH_MAX_PENDING', 16))
+app.config['PASSWORD_HASH_WAIT'] = float(os.environ.get('PASSWORD_HASH_WAIT', 2.0))
+password_hasher.init_app(app)
+
+# Admin dashboard snapshot; 0 recomputes on every stale read instead of in the background
+app.config['DASHBOARD_STATS_REFRESH_INTERVAL'] = int(os.environ.get('DASHBOARD_STATS_REFRESH_INTERVAL', 60))
+dashboard_stats.init_app(app)
+
+# New-episode notification fan-out (interval 0 fans out inline)
+app.config['NOTIFICATION_FANOUT_INTERVAL'] = float(os.environ.get('NOTIFICATION_FANOUT_INTERVAL', 30))
+app.config['NOTIFICATION_FANOUT_CHUNK_SIZE'] = int(os.environ.get('NOTIFICATION_FANOUT_CHUNK_SIZE', 1000))
+notification_fanout.init_app(app)
+
+# Server-Sent Events for notifications ('local' backend for single-process deployments)
+app.config['NOTIFICATION_STREAM_BACKEND'] = os.environ.get('NOTIFICATION_STREAM_BACKEND', 'database')
+app.config['NOTIFICATION_STREAM_POLL_INTERVAL'] = float(os.environ.get('NOTIFICATION_STREAM_POLL_INTERVAL', 2))
+app.config['NOTIFICATION_STREAM_HEARTBEAT'] = float(os.environ.get('NOTIFICATION_STREAM_HEARTBEAT', 15))
+app.config['NOTIFICATION_STREAM_MAX_DURATION'] = float(os.environ.get('NOTIFICATION_STREAM_MAX_DURATION', 300))
+# Must match gunicorn.conf.py. Under gevent a stream parks a greenlet, so streams
+# get half of GUNICORN_WORKER_CONNECTIONS by default; under gthread each one
+# holds a thread, so they get half of GUNICORN_THREADS
+app.config['GUNICORN_WORKER_CLASS'] = os.environ.get('GUNICORN_WORKER_CLASS', 'gevent')
+app.config['GUNICORN_THREADS'] = int(os.environ.get('GUNICORN_THREADS', 64))
+app.config['GUNICORN_WORKER_CONNECTIONS'] = int(os.environ.get('GUNICORN_WORKER_CONNECTIONS', 1000))
+stream_slots = app.config['GUNICORN_THREADS'] if app.config['GUNICORN_WORKER_CLASS'] == 'gthread' \
+    else app.config['GUNICORN_WORKER_CONNECTIONS']
+app.config['NOTIFICATION_STREAM_MAX_CONNECTIONS'] = int(os.environ.get(
+    'NOTIFICATION_STREAM_MAX_CONNECTIONS', max(1, stream_slots // 2)
+))
+notification_stream.init_app(app)
+
+# GET /api/home row assembly: threads per request (0 builds the rows inline)
+app.config['HOME_ROW_WORKERS'] = int(os.environ.get('HOME_ROW_WORKERS', 6))
+app.config['HOME_ROW_TIMEOUT'] = float(os.environ.get('HOME_ROW_TIMEOUT', 2.0))
+app.config['HOME_ROW_LIMIT'] = int(os.environ.get('HOME_ROW_LIMIT', 20))
+home_assembler.init_app(app)
+
+# Bulk catalog import (POST /api/admin/import, flask import-catalog)
+app.config['IMPORT_BATCH_SIZE'] = int(os.environ.get('IMPORT_BATCH_SIZE', 500))
+
+# Offline recommender artifacts (defaults to <instance>/recommender.npz)
+app.config['RECOMMENDER_MODEL_PATH'] = os.environ.get('RECOMMENDER_MODEL_PATH')
+
 # Create all tables
 with app.app_context():
     db.create_all()
+    upgrade_schema()
+
+search.init_app(app)
+register_commands(app)
 
 @app.route('/', defaults={'path': ''})
 @app.route('/<path:path>')
@@ -0,0 +1,43 @@
+from src.models.user import db
+from datetime import datetime
+
+class ViewEvent(db.Model):
+    # Append-only log of detail views and playback starts, written in batches by
+    # the view counter and folded into DailyContentViews by `flask rollup-views`
+    __tablename__ = 'view_event'
+
+    id = db.Column(db.Integer, primary_key=True)
+    content_id = db.Column(db.Integer, nullable=False)
+    episode_id = db.Column(db.Integer)
+    user_id = db.Column(db.Integer)
+    source = db.Column(db.String(20), nullable=False)  # detail, playback
+    occurred_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, index=True)
+    rolled_up = db.Column(db.Boolean, nullable=False, default=False, server_default=db.false())
+
+    __table_args__ = (db.Index('ix_view_event_rolled_up_id', 'rolled_up', 'id'),)
+
+    def __repr__(self):
+        return f'<ViewEvent {self.source} Content {self.content_id}>'
+
+class DailyContentViews(db.Model):
+    __tablename__ = 'daily_content_views'
+
+    day = db.Column(db.Date, primary_key=True)
+    content_id = db.Column(db.Integer, db.ForeignKey('content.id'), primary_key=True)
+    views = db.Column(db.Integer, nullable=False, default=0)
+    playbacks = db.Column(db.Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f'<DailyContentViews {self.day} Content {self.content_id}: {self.views}>'
+
+class RollupCheckpoint(db.Model):
+    # Highest event id folded into a rollup table before events carried their own
+    # rolled_up flag; only read once to mark those events
+    __tablename__ = 'rollup_checkpoint'
+
+    name = db.Column(db.String(50), primary_key=True)
+    last_event_id = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<RollupCheckpoint {self.name} @ {self.last_event_id}>'
@@ -43,12 +43,21 @@ class Content(db.Model):
     view_count = db.Column(db.Integer, default=0)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    # Engagement aggregates, maintained by delta updates (see src/services/aggregates.py)
+    rating_sum = db.Column(db.Float, nullable=False, default=0.0, server_default=db.text('0'))
+    rating_count = db.Column(db.Integer, nullable=False, default=0, server_default=db.text('0'))
+    comment_count = db.Column(db.Integer, nullable=False, default=0, server_default=db.text('0'))
+    favorite_count = db.Column(db.Integer, nullable=False, default=0, server_default=db.text('0'))
     
     # For movies only
     video_url = db.Column(db.String(500))  # Direct video URL for movies
+
+    # Keyset pagination key for catalog listings
+    __table_args__ = (db.Index('ix_content_created_id', 'created_at', 'id'),)
     
     # Relationships
-    genres = db.relationship('Genre', secondary=content_genres, lazy='subquery',
+    genres = db.relationship('Genre', secondary=content_genres, lazy='selectin',
                            backref=db.backref('content', lazy=True))
     episodes = db.relationship('Episode', backref='series', lazy=True, cascade='all, delete-orphan')
     ratings = db.relationship('Rating', backref='content', lazy=True, cascade='all, delete-orphan')
@@ -59,14 +68,6 @@ class Content(db.Model):
     def __repr__(self):
         return f'<Content {self.title} ({self.content_type})>'
 
-    def calculate_average_rating(self):
-        if self.ratings:
-            total = sum(rating.score for rating in self.ratings)
-            self.rating = total / len(self.ratings)
-        else:
-            self.rating = 0.0
-        db.session.commit()
-
     def to_dict(self, include_episodes=False):
         data = {
             'id': self.id,
@@ -78,6 +79,9 @@ class Content(db.Model):
             'release_year': self.release_year,
             'duration': self.duration,
             'rating': self.rating,
+            'rating_count': self.rating_count,
+            'comment_count': self.comment_count,
+            'favorite_count': self.favorite_count,
             'imdb_rating': self.imdb_rating,
             'language': self.language,
             'country': self.country,
@@ -112,6 +116,9 @@ class Episode(db.Model):
     view_count = db.Column(db.Integer, default=0)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
+    # Season index and per-season episode pages
+    __table_args__ = (db.Index('ix_episode_series_season_number', 'series_id', 'season_number', 'episode_number'),)
+
     def __repr__(self):
         return f'<Episode S{self.season_number}E{self.episode_number}: {self.title}>'
 
@@ -10,7 +10,10 @@ class Rating(db.Model):
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     # Unique constraint to prevent duplicate ratings
-    __table_args__ = (db.UniqueConstraint('user_id', 'content_id', name='unique_user_content_rating'),)
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'content_id', name='unique_user_content_rating'),
+        db.Index('ix_rating_content_created', 'content_id', 'created_at', 'id'),
+    )
 
     def __repr__(self):
         return f'<Rating {self.score} by User {self.user_id} for Content {self.content_id}>'
@@ -36,6 +39,8 @@ class Comment(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
+    __table_args__ = (db.Index('ix_comment_content_created', 'content_id', 'created_at', 'id'),)
+
     # Self-referential relationship for replies
     replies = db.relationship('Comment', backref=db.backref('parent', remote_side=[id]), lazy=True)
 
@@ -72,7 +77,13 @@ class WatchHistory(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
     # Unique constraint for user-content-episode combination
-    __table_args__ = (db.UniqueConstraint('user_id', 'content_id', 'episode_id', name='unique_watch_history'),)
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'content_id', 'episode_id', name='unique_watch_history'),
+        # Followers of a title, for notification fan-out
+        db.Index('ix_watch_history_content_user', 'content_id', 'user_id'),
+        # A user's most recent history (continue watching)
+        db.Index('ix_watch_history_user_last_watched', 'user_id', 'last_watched'),
+    )
 
     def __repr__(self):
         return f'<WatchHistory User {self.user_id} Content {self.content_id}>'
@@ -105,7 +116,11 @@ class Favorite(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
     # Unique constraint to prevent duplicate favorites
-    __table_args__ = (db.UniqueConstraint('user_id', 'content_id', name='unique_user_content_favorite'),)
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'content_id', name='unique_user_content_favorite'),
+        db.Index('ix_favorite_user_created', 'user_id', 'created_at', 'id'),
+        db.Index('ix_favorite_content_user', 'content_id', 'user_id'),
+    )
 
     def __repr__(self):
         return f'<Favorite User {self.user_id} Content {self.content_id}>'
@@ -126,9 +141,16 @@ class Notification(db.Model):
     message = db.Column(db.Text, nullable=False)
     notification_type = db.Column(db.String(50))  # 'new_episode', 'new_season', 'recommendation'
     content_id = db.Column(db.Integer, db.ForeignKey('content.id'))
+    episode_id = db.Column(db.Integer, db.ForeignKey('episode.id'))  # For new_episode
     is_read = db.Column(db.Boolean, default=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
+    __table_args__ = (
+        db.Index('ix_notification_user_created', 'user_id', 'created_at', 'id'),
+        # At most one new_episode notification per user and episode
+        db.Index('ix_notification_user_episode', 'user_id', 'episode_id', unique=True),
+    )
+
     # Relationship
     user = db.relationship('User', backref='notifications')
     content = db.relationship('Content', backref='notifications')
@@ -144,8 +166,34 @@ class Notification(db.Model):
             'message': self.message,
             'notification_type': self.notification_type,
             'content_id': self.content_id,
+            'episode_id': self.episode_id,
             'is_read': self.is_read,
             'created_at': self.created_at.isoformat() if self.created_at else None,
             'content': self.content.to_dict() if self.content else None
         }
 
+class NotificationFanout(db.Model):
+    # One row per published episode; the fan-out worker walks the series'
+    # followers in user_id order, checkpointing after each chunk
+    __tablename__ = 'notification_fanout'
+
+    episode_id = db.Column(db.Integer, db.ForeignKey('episode.id'), primary_key=True)
+    series_id = db.Column(db.Integer, db.ForeignKey('content.id'), nullable=False)
+    status = db.Column(db.String(20), nullable=False, default='pending')  # 'pending', 'done'
+    last_user_id = db.Column(db.Integer, nullable=False, default=0)
+    sent_count = db.Column(db.Integer, nullable=False, default=0)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    completed_at = db.Column(db.DateTime)
+
+    def __repr__(self):
+        return f'<NotificationFanout Episode {self.episode_id} ({self.status})>'
+
+    def to_dict(self):
+        return {
+            'episode_id': self.episode_id,
+            'series_id': self.series_id,
+            'status': self.status,
+            'sent_count': self.sent_count,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'completed_at': self.completed_at.isoformat() if self.completed_at else None
+        }
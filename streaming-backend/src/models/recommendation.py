@@ -0,0 +1,30 @@
+from src.models.user import db
+from datetime import datetime
+
+class ContentSimilarity(db.Model):
+    # Top-N item-to-item neighbours, rebuilt offline by `flask build-recommendations`
+    __tablename__ = 'content_similarity'
+
+    content_id = db.Column(db.Integer, db.ForeignKey('content.id'), primary_key=True)
+    neighbor_id = db.Column(db.Integer, db.ForeignKey('content.id'), primary_key=True)
+    score = db.Column(db.Float, nullable=False)
+    rank = db.Column(db.Integer, nullable=False)
+    computed_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<ContentSimilarity {self.content_id} -> {self.neighbor_id} ({self.score:.3f})>'
+
+class UserRecommendation(db.Model):
+    # Per-user top-N from the matrix-factorization model (`flask train-recommender`)
+    __tablename__ = 'user_recommendation'
+
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id', ondelete='CASCADE'), primary_key=True)
+    content_id = db.Column(db.Integer, db.ForeignKey('content.id'), primary_key=True)
+    score = db.Column(db.Float, nullable=False)
+    rank = db.Column(db.Integer, nullable=False)
+    computed_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    __table_args__ = (db.Index('ix_user_recommendation_rank', 'user_id', 'rank'),)
+
+    def __repr__(self):
+        return f'<UserRecommendation User {self.user_id} Content {self.content_id} #{self.rank}>'
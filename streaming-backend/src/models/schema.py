@@ -0,0 +1,35 @@
+from sqlalchemy import inspect, text
+from src.models.user import db
+
+# db.create_all() only creates missing tables. Columns added to existing models
+# are appended here with ALTER TABLE so older databases keep working; their
+# server defaults backfill existing rows.
+
+
+def upgrade_schema():
+    inspector = inspect(db.engine)
+    existing_tables = set(inspector.get_table_names())
+    preparer = db.engine.dialect.identifier_preparer
+
+    with db.engine.begin() as conn:
+        for table in db.metadata.sorted_tables:
+            if table.name not in existing_tables:
+                continue
+            existing = {column['name'] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing:
+                    continue
+                ddl = (
+                    f'ALTER TABLE {preparer.format_table(table)} ADD COLUMN '
+                    f'{preparer.format_column(column)} {column.type.compile(dialect=db.engine.dialect)}'
+                )
+                if column.server_default is not None:
+                    default = column.server_default.arg
+                    ddl += f' DEFAULT {getattr(default, "text", default)}'
+                conn.execute(text(ddl))
+
+        # Indexes declared after a table was first created
+        for table in db.metadata.sorted_tables:
+            if table.name in existing_tables:
+                for index in table.indexes:
+                    index.create(conn, checkfirst=True)
@@ -1,8 +1,8 @@
 from flask_sqlalchemy import SQLAlchemy
-from werkzeug.security import generate_password_hash, check_password_hash
 from datetime import datetime
 import jwt
 from flask import current_app
+from src.services.passwords import password_hasher
 
 db = SQLAlchemy()
 
@@ -17,6 +17,11 @@ class User(db.Model):
     last_login = db.Column(db.DateTime)
     subscription_type = db.Column(db.String(20), default='free')  # free, premium
     subscription_expires = db.Column(db.DateTime)
+
+    # Maintained by src/services/notifications.py
+    unread_notifications = db.Column(db.Integer, nullable=False, default=0, server_default=db.text('0'))
+
+    __table_args__ = (db.Index('ix_user_created_id', 'created_at', 'id'),)
     
     # Relationships
     ratings = db.relationship('Rating', backref='user', lazy=True, cascade='all, delete-orphan')
@@ -28,10 +33,13 @@ class User(db.Model):
         return f'<User {self.username}>'
 
     def set_password(self, password):
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = password_hasher.hash(password)
 
     def check_password(self, password):
-        return check_password_hash(self.password_hash, password)
+        return password_hasher.verify(self.password_hash, password)
+
+    def password_needs_rehash(self):
+        return password_hasher.needs_rehash(self.password_hash)
 
     def generate_token(self):
         payload = {
@@ -1,61 +1,108 @@
-from flask import Blueprint, jsonify, request
+from flask import Blueprint, current_app, jsonify, request
 from src.models.user import User, db
-from src.models.content import Content, Episode, Genre
+from src.models.content import Content
 from src.models.interactions import Rating, Comment, WatchHistory, Favorite, Notification
 from src.routes.auth import token_required, admin_required
-from sqlalchemy import func, desc
-from datetime import datetime, timedelta
+from src.services import loading
+from src.services.aggregates import adjust_counts, adjust_comment_counts
+from src.services.bulk import bulk_set, parse_ids, InvalidBulkRequest
+from src.services.cache import response_cache
+from src.services.catalog_import import CatalogImporter, DEFAULT_BATCH_SIZE
+from src.services.dashboard import dashboard_stats
+from src.services.export import export_response, InvalidExportFormat
+from src.services.principals import principal_cache
+from src.services.pagination import cursor_requested, keyset_paginate, InvalidCursor
+from src.services.suggest import suggest_index
+from src.services.view_rollup import window_counts
+from collections import Counter
+from datetime import date, datetime, timedelta
 
 admin_bp = Blueprint('admin', __name__)
 
+USER_EXPORT_FIELDS = (
+    'id', 'username', 'email', 'is_admin', 'is_active', 'created_at', 'last_login',
+    'subscription_type', 'subscription_expires'
+)
+CONTENT_EXPORT_FIELDS = (
+    'id', 'title', 'content_type', 'release_year', 'duration', 'language', 'country', 'director',
+    'rating', 'rating_count', 'imdb_rating', 'comment_count', 'favorite_count', 'view_count',
+    'is_active', 'is_featured', 'genres', 'created_at', 'updated_at'
+)
+COMMENT_EXPORT_FIELDS = (
+    'id', 'user_id', 'username', 'content_id', 'parent_id', 'text', 'is_active', 'created_at', 'updated_at'
+)
+CONTENT_BULK_ACTIONS = {
+    'activate': ('is_active', True),
+    'deactivate': ('is_active', False),
+    'feature': ('is_featured', True),
+    'unfeature': ('is_featured', False)
+}
+TOP_CONTENT_CANDIDATES = 50  # ranked titles looked up to find the top 10 active ones
+
+# List filters, shared by the paged listings and their exports
+def filtered_users():
+    search = request.args.get('search')
+    status = request.args.get('status')  # 'active', 'inactive'
+    
+    query = User.query
+    
+    if search:
+        search_term = f"%{search}%"
+        query = query.filter(
+            (User.username.ilike(search_term)) | 
+            (User.email.ilike(search_term))
+        )
+    
+    if status == 'active':
+        query = query.filter_by(is_active=True)
+    elif status == 'inactive':
+        query = query.filter_by(is_active=False)
+    
+    return query
+
+def filtered_content():
+    content_type = request.args.get('type')
+    status = request.args.get('status')  # 'active', 'inactive'
+    search = request.args.get('search')
+    
+    query = Content.query
+    
+    if content_type:
+        query = query.filter_by(content_type=content_type)
+    
+    if status == 'active':
+        query = query.filter_by(is_active=True)
+    elif status == 'inactive':
+        query = query.filter_by(is_active=False)
+    
+    if search:
+        search_term = f"%{search}%"
+        query = query.filter(Content.title.ilike(search_term))
+    
+    return query
+
+def filtered_comments():
+    status = request.args.get('status')  # 'active', 'inactive'
+    
+    query = Comment.query.options(*loading.comment_items())
+    
+    if status == 'active':
+        query = query.filter_by(is_active=True)
+    elif status == 'inactive':
+        query = query.filter_by(is_active=False)
+    
+    return query
+
+
 # Dashboard statistics
 @admin_bp.route('/dashboard/stats', methods=['GET'])
 @token_required
 @admin_required
 def get_dashboard_stats(current_user):
     try:
-        # Basic counts
-        total_users = User.query.count()
-        total_content = Content.query.filter_by(is_active=True).count()
-        total_movies = Content.query.filter_by(content_type='movie', is_active=True).count()
-        total_series = Content.query.filter_by(content_type='series', is_active=True).count()
-        total_episodes = Episode.query.filter_by(is_active=True).count()
-        
-        # Active users (logged in within last 30 days)
-        thirty_days_ago = datetime.utcnow() - timedelta(days=30)
-        active_users = User.query.filter(User.last_login >= thirty_days_ago).count()
-        
-        # Content views
-        total_views = db.session.query(func.sum(Content.view_count)).scalar() or 0
-        
-        # Recent registrations (last 7 days)
-        seven_days_ago = datetime.utcnow() - timedelta(days=7)
-        new_users = User.query.filter(User.created_at >= seven_days_ago).count()
-        
-        # Top content by views
-        top_content = Content.query.filter_by(is_active=True).order_by(
-            desc(Content.view_count)
-        ).limit(5).all()
-        
-        # Recent comments
-        recent_comments = Comment.query.filter_by(is_active=True).order_by(
-            desc(Comment.created_at)
-        ).limit(5).all()
-        
-        return jsonify({
-            'stats': {
-                'total_users': total_users,
-                'active_users': active_users,
-                'new_users_week': new_users,
-                'total_content': total_content,
-                'total_movies': total_movies,
-                'total_series': total_series,
-                'total_episodes': total_episodes,
-                'total_views': total_views
-            },
-            'top_content': [content.to_dict() for content in top_content],
-            'recent_comments': [comment.to_dict() for comment in recent_comments]
-        }), 200
+        # Served from the materialized snapshot; ?refresh=true recomputes it now
+        force = request.args.get('refresh', 'false').lower() == 'true'
+        return jsonify(dashboard_stats.snapshot(force=force)), 200
         
     except Exception as e:
         return jsonify({'message': 'Failed to get dashboard stats', 'error': str(e)}), 500
@@ -68,22 +115,14 @@ def get_all_users(current_user):
     try:
         page = request.args.get('page', 1, type=int)
         per_page = min(request.args.get('per_page', 20, type=int), 100)
-        search = request.args.get('search')
-        status = request.args.get('status')  # 'active', 'inactive'
-        
-        query = User.query
-        
-        if search:
-            search_term = f"%{search}%"
-            query = query.filter(
-                (User.username.ilike(search_term)) | 
-                (User.email.ilike(search_term))
-            )
+        query = filtered_users()
         
-        if status == 'active':
-            query = query.filter_by(is_active=True)
-        elif status == 'inactive':
-            query = query.filter_by(is_active=False)
+        if cursor_requested():
+            users, pagination = keyset_paginate(query, [User.created_at, User.id], per_page)
+            return jsonify({
+                'users': [user.to_dict() for user in users],
+                'pagination': pagination
+            }), 200
         
         pagination = query.order_by(User.created_at.desc()).paginate(
             page=page, per_page=per_page, error_out=False
@@ -101,6 +140,8 @@ def get_all_users(current_user):
             }
         }), 200
         
+    except InvalidCursor as e:
+        return jsonify({'message': str(e)}), 400
     except Exception as e:
         return jsonify({'message': 'Failed to get users', 'error': str(e)}), 500
 
@@ -143,6 +184,7 @@ def toggle_user_status(current_user, user_id):
         
         user.is_active = not user.is_active
         db.session.commit()
+        principal_cache.invalidate(user.id)
         
         status = 'activated' if user.is_active else 'deactivated'
         return jsonify({
@@ -163,6 +205,7 @@ def make_user_admin(current_user, user_id):
         
         user.is_admin = True
         db.session.commit()
+        principal_cache.invalidate(user.id)
         
         return jsonify({
             'message': 'User promoted to admin successfully',
@@ -181,23 +224,14 @@ def get_all_content(current_user):
     try:
         page = request.args.get('page', 1, type=int)
         per_page = min(request.args.get('per_page', 20, type=int), 100)
-        content_type = request.args.get('type')
-        status = request.args.get('status')  # 'active', 'inactive'
-        search = request.args.get('search')
-        
-        query = Content.query
-        
-        if content_type:
-            query = query.filter_by(content_type=content_type)
+        query = filtered_content()
         
-        if status == 'active':
-            query = query.filter_by(is_active=True)
-        elif status == 'inactive':
-            query = query.filter_by(is_active=False)
-        
-        if search:
-            search_term = f"%{search}%"
-            query = query.filter(Content.title.ilike(search_term))
+        if cursor_requested():
+            content_list, pagination = keyset_paginate(query, [Content.created_at, Content.id], per_page)
+            return jsonify({
+                'content': [item.to_dict() for item in content_list],
+                'pagination': pagination
+            }), 200
         
         pagination = query.order_by(Content.created_at.desc()).paginate(
             page=page, per_page=per_page, error_out=False
@@ -215,6 +249,8 @@ def get_all_content(current_user):
             }
         }), 200
         
+    except InvalidCursor as e:
+        return jsonify({'message': str(e)}), 400
     except Exception as e:
         return jsonify({'message': 'Failed to get content', 'error': str(e)}), 500
 
@@ -228,6 +264,8 @@ def toggle_content_status(current_user, content_id):
         content.is_active = not content.is_active
         content.updated_at = datetime.utcnow()
         db.session.commit()
+        suggest_index.refresh([content.id])
+        response_cache.invalidate('content', f'episodes:{content.id}')
         
         status = 'activated' if content.is_active else 'deactivated'
         return jsonify({
@@ -249,6 +287,7 @@ def toggle_content_featured(current_user, content_id):
         content.is_featured = not content.is_featured
         content.updated_at = datetime.utcnow()
         db.session.commit()
+        response_cache.invalidate('content')
         
         status = 'featured' if content.is_featured else 'unfeatured'
         return jsonify({
@@ -268,14 +307,14 @@ def get_all_comments(current_user):
     try:
         page = request.args.get('page', 1, type=int)
         per_page = min(request.args.get('per_page', 20, type=int), 100)
-        status = request.args.get('status')  # 'active', 'inactive'
-        
-        query = Comment.query
+        query = filtered_comments()
         
-        if status == 'active':
-            query = query.filter_by(is_active=True)
-        elif status == 'inactive':
-            query = query.filter_by(is_active=False)
+        if cursor_requested():
+            comments, pagination = keyset_paginate(query, [Comment.created_at, Comment.id], per_page)
+            return jsonify({
+                'comments': [comment.to_dict() for comment in comments],
+                'pagination': pagination
+            }), 200
         
         pagination = query.order_by(Comment.created_at.desc()).paginate(
             page=page, per_page=per_page, error_out=False
@@ -293,6 +332,8 @@ def get_all_comments(current_user):
             }
         }), 200
         
+    except InvalidCursor as e:
+        return jsonify({'message': str(e)}), 400
     except Exception as e:
         return jsonify({'message': 'Failed to get comments', 'error': str(e)}), 500
 
@@ -305,6 +346,7 @@ def toggle_comment_status(current_user, comment_id):
         
         comment.is_active = not comment.is_active
         comment.updated_at = datetime.utcnow()
+        adjust_counts(comment.content_id, comments=1 if comment.is_active else -1)
         db.session.commit()
         
         status = 'activated' if comment.is_active else 'deactivated'
@@ -323,44 +365,119 @@ def toggle_comment_status(current_user, comment_id):
 @admin_required
 def get_content_analytics(current_user):
     try:
+        # Window: `days` ending today, or explicit `start`/`end` dates (YYYY-MM-DD)
         days = request.args.get('days', 30, type=int)
+        try:
+            end = request.args.get('end')
+            end_day = date.fromisoformat(end) if end else datetime.utcnow().date()
+            start = request.args.get('start')
+            start_day = date.fromisoformat(start) if start else end_day - timedelta(days=max(days, 1) - 1)
+        except ValueError:
+            return jsonify({'message': 'start and end must be dates (YYYY-MM-DD)'}), 400
+        if start_day > end_day:
+            return jsonify({'message': 'start must not be after end'}), 400
+        
+        # Views in the window, from the daily rollups
+        per_content, per_day = window_counts(start_day, end_day)
+        ranked = sorted(
+            per_content.items(),
+            key=lambda item: (item[1]['views'], item[1]['playbacks']),
+            reverse=True
+        )[:TOP_CONTENT_CANDIDATES]
+        titles = {
+            content.id: content for content in Content.query.filter(
+                Content.id.in_([content_id for content_id, _ in ranked]),
+                Content.is_active == True
+            )
+        }
+        top_content = [(titles[content_id], counts) for content_id, counts in ranked if content_id in titles][:10]
         
-        # Top content by views
-        top_content = Content.query.filter_by(is_active=True).order_by(
-            desc(Content.view_count)
-        ).limit(10).all()
-        
-        # Content by type
-        content_by_type = db.session.query(
-            Content.content_type,
-            func.count(Content.id).label('count')
-        ).filter_by(is_active=True).group_by(Content.content_type).all()
-        
-        # Content by genre
-        content_by_genre = db.session.query(
-            Genre.name,
-            func.count(Content.id).label('count')
-        ).join(Content.genres).filter(Content.is_active == True).group_by(Genre.name).all()
+        # Breakdowns come from the dashboard snapshot
+        snapshot = dashboard_stats.snapshot()
         
         return jsonify({
+            'start': start_day.isoformat(),
+            'end': end_day.isoformat(),
             'top_content': [
                 {
+                    'id': content.id,
                     'title': content.title,
-                    'view_count': content.view_count,
-                    'content_type': content.content_type
-                } for content in top_content
+                    'content_type': content.content_type,
+                    'views': counts['views'],
+                    'playbacks': counts['playbacks'],
+                    'view_count': content.view_count
+                } for content, counts in top_content
             ],
-            'content_by_type': [
-                {'type': item[0], 'count': item[1]} for item in content_by_type
+            'views_by_day': [
+                {'date': day.isoformat(), 'views': counts['views'], 'playbacks': counts['playbacks']}
+                for day, counts in sorted(per_day.items())
             ],
-            'content_by_genre': [
-                {'genre': item[0], 'count': item[1]} for item in content_by_genre
-            ]
+            'content_by_type': snapshot['content_by_type'],
+            'content_by_genre': snapshot['content_by_genre'],
+            'as_of': snapshot['as_of']
         }), 200
         
     except Exception as e:
         return jsonify({'message': 'Failed to get analytics', 'error': str(e)}), 500
 
+# Catalog import
+@admin_bp.route('/import', methods=['POST'])
+@token_required
+@admin_required
+def import_catalog(current_user):
+    try:
+        # NDJSON body, read line by line; see src/services/catalog_import.py for the format
+        importer = CatalogImporter(current_app.config.get('IMPORT_BATCH_SIZE', DEFAULT_BATCH_SIZE))
+        return jsonify(importer.run(request.stream)), 200
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'message': 'Failed to import catalog', 'error': str(e)}), 500
+
+# Exports
+@admin_bp.route('/users/export', methods=['GET'])
+@token_required
+@admin_required
+def export_users(current_user):
+    try:
+        return export_response(filtered_users().order_by(User.id), 'users', USER_EXPORT_FIELDS)
+    except InvalidExportFormat as e:
+        return jsonify({'message': str(e)}), 400
+    except Exception as e:
+        return jsonify({'message': 'Failed to export users', 'error': str(e)}), 500
+
+@admin_bp.route('/content/export', methods=['GET'])
+@token_required
+@admin_required
+def export_content(current_user):
+    try:
+        return export_response(filtered_content().order_by(Content.id), 'content', CONTENT_EXPORT_FIELDS)
+    except InvalidExportFormat as e:
+        return jsonify({'message': str(e)}), 400
+    except Exception as e:
+        return jsonify({'message': 'Failed to export content', 'error': str(e)}), 500
+
+@admin_bp.route('/comments/export', methods=['GET'])
+@token_required
+@admin_required
+def export_comments(current_user):
+    try:
+        return export_response(filtered_comments().order_by(Comment.id), 'comments', COMMENT_EXPORT_FIELDS)
+    except InvalidExportFormat as e:
+        return jsonify({'message': str(e)}), 400
+    except Exception as e:
+        return jsonify({'message': 'Failed to export comments', 'error': str(e)}), 500
+
+# Caches
+@admin_bp.route('/cache/stats', methods=['GET'])
+@token_required
+@admin_required
+def get_cache_stats(current_user):
+    return jsonify({
+        'responses': response_cache.stats(),
+        'principals': principal_cache.stats()
+    }), 200
+
 # Bulk operations
 @admin_bp.route('/content/bulk-update', methods=['POST'])
 @token_required
@@ -372,33 +489,104 @@ def bulk_update_content(current_user):
         if not data or 'content_ids' not in data or 'action' not in data:
             return jsonify({'message': 'content_ids and action are required'}), 400
         
-        content_ids = data['content_ids']
         action = data['action']
+        if action not in CONTENT_BULK_ACTIONS:
+            return jsonify({'message': 'Invalid action'}), 400
+        
+        content_ids = parse_ids(data['content_ids'])
+        column, value = CONTENT_BULK_ACTIONS[action]
+        changed = [row.id for row in bulk_set(Content, content_ids, column, value)]
+        db.session.commit()
+        
+        if changed:
+            if column == 'is_active':
+                suggest_index.refresh(changed)
+            response_cache.invalidate('content', *[f'episodes:{content_id}' for content_id in changed])
         
-        if action not in ['activate', 'deactivate', 'feature', 'unfeature']:
+        return jsonify({
+            'message': f'Bulk {action} completed successfully',
+            'requested_count': len(content_ids),
+            'updated_count': len(changed)
+        }), 200
+        
+    except InvalidBulkRequest as e:
+        return jsonify({'message': str(e)}), 400
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'message': 'Bulk update failed', 'error': str(e)}), 500
+
+@admin_bp.route('/comments/bulk-update', methods=['POST'])
+@token_required
+@admin_required
+def bulk_update_comments(current_user):
+    try:
+        data = request.get_json()
+        
+        if not data or 'comment_ids' not in data or 'action' not in data:
+            return jsonify({'message': 'comment_ids and action are required'}), 400
+        
+        action = data['action']
+        if action not in ('activate', 'deactivate'):
             return jsonify({'message': 'Invalid action'}), 400
         
-        content_list = Content.query.filter(Content.id.in_(content_ids)).all()
+        comment_ids = parse_ids(data['comment_ids'])
+        is_active = action == 'activate'
+        changed = bulk_set(Comment, comment_ids, 'is_active', is_active, returning=('content_id',))
         
-        for content in content_list:
-            if action == 'activate':
-                content.is_active = True
-            elif action == 'deactivate':
-                content.is_active = False
-            elif action == 'feature':
-                content.is_featured = True
-            elif action == 'unfeature':
-                content.is_featured = False
-            
-            content.updated_at = datetime.utcnow()
+        # Keep Content.comment_count in step with the rows that actually flipped
+        deltas = Counter(row.content_id for row in changed)
+        sign = 1 if is_active else -1
+        adjust_comment_counts({content_id: sign * count for content_id, count in deltas.items()})
+        db.session.commit()
+        
+        if changed:
+            response_cache.invalidate('content')
+        
+        return jsonify({
+            'message': f'Bulk {action} completed successfully',
+            'requested_count': len(comment_ids),
+            'updated_count': len(changed)
+        }), 200
         
+    except InvalidBulkRequest as e:
+        return jsonify({'message': str(e)}), 400
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'message': 'Bulk update failed', 'error': str(e)}), 500
+
+@admin_bp.route('/users/bulk-update', methods=['POST'])
+@token_required
+@admin_required
+def bulk_update_users(current_user):
+    try:
+        data = request.get_json()
+        
+        if not data or 'user_ids' not in data or 'action' not in data:
+            return jsonify({'message': 'user_ids and action are required'}), 400
+        
+        action = data['action']
+        if action not in ('activate', 'deactivate'):
+            return jsonify({'message': 'Invalid action'}), 400
+        
+        user_ids = parse_ids(data['user_ids'])
+        # Admins can't deactivate themselves here either
+        changed = bulk_set(
+            User, user_ids, 'is_active', action == 'activate',
+            criteria=(User.id != current_user.id,)
+        )
         db.session.commit()
         
+        for row in changed:
+            principal_cache.invalidate(row.id)
+        
         return jsonify({
             'message': f'Bulk {action} completed successfully',
-            'updated_count': len(content_list)
+            'requested_count': len(user_ids),
+            'updated_count': len(changed)
         }), 200
         
+    except InvalidBulkRequest as e:
+        return jsonify({'message': str(e)}), 400
     except Exception as e:
         db.session.rollback()
         return jsonify({'message': 'Bulk update failed', 'error': str(e)}), 500
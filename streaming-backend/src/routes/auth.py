@@ -1,12 +1,14 @@
 from flask import Blueprint, jsonify, request
 from functools import wraps
 from src.models.user import User, db
+from src.services.principals import principal_cache
+from src.services.passwords import HashingBusy
 from datetime import datetime
 import re
 
 auth_bp = Blueprint('auth', __name__)
 
-def token_required(f):
+def token_required(f, allow_query_token=False):
     @wraps(f)
     def decorated(*args, **kwargs):
         token = None
@@ -18,21 +20,42 @@ def token_required(f):
                 token = auth_header.split(" ")[1]  # Bearer <token>
             except IndexError:
                 return jsonify({'message': 'Invalid token format'}), 401
+        elif allow_query_token:
+            token = request.args.get('access_token')
         
         if not token:
             return jsonify({'message': 'Token is missing'}), 401
         
         try:
-            current_user = User.verify_token(token)
+            current_user = principal_cache.resolve_token(token)
             if current_user is None:
                 return jsonify({'message': 'Token is invalid or expired'}), 401
         except Exception as e:
             return jsonify({'message': 'Token verification failed'}), 401
         
+        if not current_user.is_active:
+            return jsonify({'message': 'Account is deactivated'}), 401
+        
         return f(current_user, *args, **kwargs)
     
     return decorated
 
+def stream_token_required(f):
+    # EventSource can't set headers, so streams also accept ?access_token=
+    return token_required(f, allow_query_token=True)
+
+def token_optional(f):
+    # Anonymous requests get current_user=None; a bad token is still rejected
+    required = token_required(f)
+    
+    @wraps(f)
+    def decorated(*args, **kwargs):
+        if 'Authorization' not in request.headers:
+            return f(None, *args, **kwargs)
+        return required(*args, **kwargs)
+    
+    return decorated
+
 def admin_required(f):
     @wraps(f)
     def decorated(current_user, *args, **kwargs):
@@ -58,6 +81,11 @@ def validate_password(password):
         return False
     return True
 
+def busy_response():
+    response = jsonify({'message': 'Too many sign-in attempts right now, please retry shortly'})
+    response.headers['Retry-After'] = '1'
+    return response, 503
+
 @auth_bp.route('/register', methods=['POST'])
 def register():
     try:
@@ -104,6 +132,9 @@ def register():
             'user': user.to_dict()
         }), 201
         
+    except HashingBusy:
+        db.session.rollback()
+        return busy_response()
     except Exception as e:
         db.session.rollback()
         return jsonify({'message': 'Registration failed', 'error': str(e)}), 500
@@ -130,9 +161,14 @@ def login():
         if not user.is_active:
             return jsonify({'message': 'Account is deactivated'}), 401
         
+        # Transparently upgrade hashes made with older parameters
+        if user.password_needs_rehash():
+            user.set_password(password)
+        
         # Update last login
         user.last_login = datetime.utcnow()
         db.session.commit()
+        principal_cache.invalidate(user.id)
         
         # Generate token
         token = user.generate_token()
@@ -143,6 +179,9 @@ def login():
             'user': user.to_dict()
         }), 200
         
+    except HashingBusy:
+        db.session.rollback()
+        return busy_response()
     except Exception as e:
         return jsonify({'message': 'Login failed', 'error': str(e)}), 500
 
@@ -182,6 +221,7 @@ def update_profile(current_user):
             current_user.email = email
         
         db.session.commit()
+        principal_cache.invalidate(current_user.id)
         
         return jsonify({
             'message': 'Profile updated successfully',
@@ -215,9 +255,13 @@ def change_password(current_user):
         # Update password
         current_user.set_password(new_password)
         db.session.commit()
+        principal_cache.invalidate(current_user.id)
         
         return jsonify({'message': 'Password changed successfully'}), 200
         
+    except HashingBusy:
+        db.session.rollback()
+        return busy_response()
     except Exception as e:
         db.session.rollback()
         return jsonify({'message': 'Password change failed', 'error': str(e)}), 500
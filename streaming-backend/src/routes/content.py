@@ -1,14 +1,39 @@
 from flask import Blueprint, jsonify, request
 from src.models.user import db
-from src.models.content import Content, Episode, Genre, content_genres
-from src.models.interactions import Rating, Comment, WatchHistory, Favorite
-from src.routes.auth import token_required, admin_required
-from sqlalchemy import or_, and_, func
+from src.models.content import Content, Episode, Genre
+from src.models.interactions import Rating, Comment, Favorite
+from src.routes.auth import token_required, token_optional, admin_required
+from src.services.recommendations import recommend
+from src.services.search import search_filter, ranked_search
+from src.services.cache import response_cache
+from src.services.fanout import notification_fanout
+from src.services.conditional import validators, not_modified, not_modified_response, with_validators
+from src.services.pagination import cursor_requested, keyset_paginate, InvalidCursor
+from src.services.view_counter import view_counter
+from src.services.home import home_assembler
+from src.services.suggest import suggest_index, DEFAULT_LIMIT, MAX_LIMIT
+from sqlalchemy import func
 from datetime import datetime
 
 content_bp = Blueprint('content', __name__)
 
+# Counters shown on content cards. The view counter and engagement deltas update
+# them without touching updated_at, so catalog validators include them and skip
+# Last-Modified, which couldn't see them change
+COUNTER_COLUMNS = (
+    Content.view_count, Content.rating, Content.rating_count, Content.comment_count, Content.favorite_count
+)
+
+@content_bp.route('/home', methods=['GET'])
+@token_optional
+def get_home(current_user):
+    try:
+        return jsonify(home_assembler.assemble(current_user.id if current_user else None)), 200
+    except Exception as e:
+        return jsonify({'message': 'Failed to load home page', 'error': str(e)}), 500
+
 @content_bp.route('/content', methods=['GET'])
+@response_cache.cached(tags=('content',))
 def get_content():
     try:
         # Query parameters
@@ -31,44 +56,58 @@ def get_content():
             query = query.filter(Content.genres.any(Genre.id == genre_id))
         
         if search:
-            search_term = f"%{search}%"
-            query = query.filter(or_(
-                Content.title.ilike(search_term),
-                Content.description.ilike(search_term),
-                Content.director.ilike(search_term),
-                Content.cast.ilike(search_term)
-            ))
+            query = query.filter(search_filter(search))
         
         if featured is not None:
             query = query.filter_by(is_featured=featured)
         
         # Sorting
-        if sort_by == 'rating':
-            if order == 'desc':
-                query = query.order_by(Content.rating.desc())
-            else:
-                query = query.order_by(Content.rating.asc())
-        elif sort_by == 'view_count':
-            if order == 'desc':
-                query = query.order_by(Content.view_count.desc())
-            else:
-                query = query.order_by(Content.view_count.asc())
-        elif sort_by == 'title':
-            if order == 'desc':
-                query = query.order_by(Content.title.desc())
-            else:
-                query = query.order_by(Content.title.asc())
-        else:  # created_at
-            if order == 'desc':
-                query = query.order_by(Content.created_at.desc())
-            else:
-                query = query.order_by(Content.created_at.asc())
-        
-        # Pagination
-        pagination = query.paginate(page=page, per_page=per_page, error_out=False)
+        sort_columns = {
+            'rating': Content.rating,
+            'view_count': Content.view_count,
+            'title': Content.title
+        }
+        sort_column = sort_columns.get(sort_by, Content.created_at)  # created_at
+        
+        if cursor_requested():
+            content_list, pagination = keyset_paginate(
+                query, [sort_column, Content.id], per_page, descending=(order == 'desc')
+            )
+            # Validated against the page itself, so keyset paging runs no COUNT
+            newest = max((item.updated_at for item in content_list if item.updated_at), default=None)
+            etag, last_modified = validators(newest, [
+                (item.id, getattr(item, sort_column.key), *(getattr(item, column.key) for column in COUNTER_COLUMNS))
+                for item in content_list
+            ], pagination.get('total'))
+            last_modified = None  # counters move without touching updated_at
+            if not_modified(etag, last_modified):
+                return not_modified_response(etag, last_modified)
+            response = jsonify({
+                'content': [item.to_dict() for item in content_list],
+                'pagination': pagination
+            })
+            return with_validators(response, etag, last_modified), 200
+        
+        # Conditional GET, validated against the filtered set before the page query
+        newest, total, *counters = query.with_entities(
+            func.max(Content.updated_at), func.count(Content.id), *(func.sum(column) for column in COUNTER_COLUMNS)
+        ).one()
+        etag, last_modified = validators(newest, total, *counters)
+        last_modified = None  # counters move without touching updated_at
+        if not_modified(etag, last_modified):
+            return not_modified_response(etag, last_modified)
+        
+        if order == 'desc':
+            query = query.order_by(sort_column.desc())
+        else:
+            query = query.order_by(sort_column.asc())
+        
+        # Pagination (the total is already known from the validator query)
+        pagination = query.paginate(page=page, per_page=per_page, error_out=False, count=False)
+        pagination.total = total
         content_list = pagination.items
         
-        return jsonify({
+        response = jsonify({
             'content': [item.to_dict() for item in content_list],
             'pagination': {
                 'page': page,
@@ -78,23 +117,47 @@ def get_content():
                 'has_next': pagination.has_next,
                 'has_prev': pagination.has_prev
             }
-        }), 200
+        })
+        return with_validators(response, etag, last_modified), 200
         
+    except InvalidCursor as e:
+        return jsonify({'message': str(e)}), 400
     except Exception as e:
         return jsonify({'message': 'Failed to fetch content', 'error': str(e)}), 500
 
 @content_bp.route('/content/<int:content_id>', methods=['GET'])
 def get_content_detail(content_id):
     try:
-        content = Content.query.filter_by(id=content_id, is_active=True).first()
-        if not content:
+        episode_count = db.session.query(func.count(Episode.id)).filter(
+            Episode.series_id == Content.id
+        ).scalar_subquery()
+        newest_episode = db.session.query(func.max(Episode.created_at)).filter(
+            Episode.series_id == Content.id
+        ).scalar_subquery()
+        
+        row = db.session.query(Content.updated_at, episode_count, newest_episode, *COUNTER_COLUMNS).filter(
+            Content.id == content_id, Content.is_active == True
+        ).first()
+        if not row:
             return jsonify({'message': 'Content not found'}), 404
         
-        # Increment view count
-        content.view_count += 1
-        db.session.commit()
+        updated_at, total_episodes, newest_episode, *counters = row
+        etag, last_modified = validators(newest_episode, updated_at, total_episodes, *counters)
+        last_modified = None  # counters move without touching updated_at
+        
+        # Counted in memory and flushed in batches by the view counter
+        view_counter.record_content_view(content_id)
         
-        return jsonify(content.to_dict(include_episodes=True)), 200
+        if not_modified(etag, last_modified):
+            return not_modified_response(etag, last_modified)
+        
+        content = Content.query.get(content_id)
+        data = content.to_dict()
+        if content.content_type == 'series':
+            # Episodes themselves are paged per season from /content/<id>/episodes
+            data['seasons'] = season_index(content_id)
+        response = jsonify(data)
+        return with_validators(response, etag, last_modified), 200
         
     except Exception as e:
         return jsonify({'message': 'Failed to fetch content', 'error': str(e)}), 500
@@ -141,6 +204,8 @@ def create_content(current_user):
             content.genres = genres
         
         db.session.commit()
+        suggest_index.refresh([content.id])
+        response_cache.invalidate('content')
         
         return jsonify({
             'message': 'Content created successfully',
@@ -177,6 +242,8 @@ def update_content(current_user, content_id):
         
         content.updated_at = datetime.utcnow()
         db.session.commit()
+        suggest_index.refresh([content.id])
+        response_cache.invalidate('content', f'episodes:{content.id}')
         
         return jsonify({
             'message': 'Content updated successfully',
@@ -197,6 +264,8 @@ def delete_content(current_user, content_id):
         # Soft delete
         content.is_active = False
         db.session.commit()
+        suggest_index.discard(content.id)
+        response_cache.invalidate('content', f'episodes:{content.id}')
         
         return jsonify({'message': 'Content deleted successfully'}), 200
         
@@ -205,7 +274,26 @@ def delete_content(current_user, content_id):
         return jsonify({'message': 'Failed to delete content', 'error': str(e)}), 500
 
 # Episode routes
+def season_index(series_id):
+    # Season number, episode count and first air date in one grouped query
+    rows = db.session.query(
+        Episode.season_number,
+        func.count(Episode.id),
+        func.min(Episode.air_date)
+    ).filter(
+        Episode.series_id == series_id,
+        Episode.is_active == True
+    ).group_by(Episode.season_number).order_by(Episode.season_number).all()
+    return [
+        {
+            'season_number': season_number,
+            'episode_count': episode_count,
+            'first_air_date': first_air_date.isoformat() if first_air_date else None
+        } for season_number, episode_count, first_air_date in rows
+    ]
+
 @content_bp.route('/content/<int:content_id>/episodes', methods=['GET'])
+@response_cache.cached(tags=('episodes:{content_id}',))
 def get_episodes(content_id):
     try:
         content = Content.query.filter_by(id=content_id, content_type='series', is_active=True).first()
@@ -213,15 +301,51 @@ def get_episodes(content_id):
             return jsonify({'message': 'Series not found'}), 404
         
         season = request.args.get('season', type=int)
+        paged = any(arg in request.args for arg in ('page', 'per_page', 'cursor'))
         
         query = Episode.query.filter_by(series_id=content_id, is_active=True)
-        if season:
+        if season is not None:
             query = query.filter_by(season_number=season)
         
-        episodes = query.order_by(Episode.season_number, Episode.episode_number).all()
+        newest, total = query.with_entities(func.max(Episode.created_at), func.count(Episode.id)).one()
+        etag, last_modified = validators(max(filter(None, (newest, content.updated_at)), default=None), total)
+        if not_modified(etag, last_modified):
+            return not_modified_response(etag, last_modified)
+        
+        if not paged:
+            # Legacy shape: every episode (of the season, if given) as a plain array
+            episodes = query.order_by(Episode.season_number, Episode.episode_number).all()
+            response = jsonify([episode.to_dict() for episode in episodes])
+            return with_validators(response, etag, last_modified), 200
+        
+        per_page = min(request.args.get('per_page', 50, type=int), 200)
+        if cursor_requested():
+            episodes, pagination = keyset_paginate(
+                query, [Episode.season_number, Episode.episode_number, Episode.id], per_page, descending=False
+            )
+        else:
+            page = request.args.get('page', 1, type=int)
+            paginated = query.order_by(Episode.season_number, Episode.episode_number, Episode.id).paginate(
+                page=page, per_page=per_page, error_out=False, count=False
+            )
+            episodes = paginated.items
+            paginated.total = total
+            pagination = {
+                'page': page,
+                'per_page': per_page,
+                'total': total,
+                'pages': paginated.pages
+            }
         
-        return jsonify([episode.to_dict() for episode in episodes]), 200
+        response = jsonify({
+            'season': season,
+            'episodes': [episode.to_dict() for episode in episodes],
+            'pagination': pagination
+        })
+        return with_validators(response, etag, last_modified), 200
         
+    except InvalidCursor as e:
+        return jsonify({'message': str(e)}), 400
     except Exception as e:
         return jsonify({'message': 'Failed to fetch episodes', 'error': str(e)}), 500
 
@@ -264,7 +388,13 @@ def create_episode(current_user, content_id):
         )
         
         db.session.add(episode)
+        db.session.flush()  # Get the ID
+        
+        # Followers are notified in the background, not in this request
+        notification_fanout.enqueue(episode)
         db.session.commit()
+        response_cache.invalidate(f'episodes:{content_id}')
+        notification_fanout.published()
         
         return jsonify({
             'message': 'Episode created successfully',
@@ -277,10 +407,17 @@ def create_episode(current_user, content_id):
 
 # Genre routes
 @content_bp.route('/genres', methods=['GET'])
+@response_cache.cached(tags=('genres',))
 def get_genres():
     try:
+        newest, total = db.session.query(func.max(Genre.created_at), func.count(Genre.id)).one()
+        etag, last_modified = validators(newest, total)
+        if not_modified(etag, last_modified):
+            return not_modified_response(etag, last_modified)
+        
         genres = Genre.query.all()
-        return jsonify([genre.to_dict() for genre in genres]), 200
+        response = jsonify([genre.to_dict() for genre in genres])
+        return with_validators(response, etag, last_modified), 200
     except Exception as e:
         return jsonify({'message': 'Failed to fetch genres', 'error': str(e)}), 500
 
@@ -306,6 +443,7 @@ def create_genre(current_user):
         
         db.session.add(genre)
         db.session.commit()
+        response_cache.invalidate('genres')
         
         return jsonify({
             'message': 'Genre created successfully',
@@ -318,61 +456,39 @@ def create_genre(current_user):
 
 # Search and recommendations
 @content_bp.route('/search', methods=['GET'])
+@response_cache.cached(tags=('content',))
 def search_content():
     try:
         query = request.args.get('q', '').strip()
         if not query:
             return jsonify({'message': 'Search query is required'}), 400
         
-        search_term = f"%{query}%"
-        content = Content.query.filter(
-            and_(
-                Content.is_active == True,
-                or_(
-                    Content.title.ilike(search_term),
-                    Content.description.ilike(search_term),
-                    Content.director.ilike(search_term),
-                    Content.cast.ilike(search_term)
-                )
-            )
-        ).order_by(Content.view_count.desc()).limit(20).all()
+        content = ranked_search(query, limit=20)
         
         return jsonify([item.to_dict() for item in content]), 200
         
     except Exception as e:
         return jsonify({'message': 'Search failed', 'error': str(e)}), 500
 
+@content_bp.route('/search/suggest', methods=['GET'])
+def suggest_content():
+    try:
+        query = request.args.get('q', '').strip()
+        limit = min(max(request.args.get('limit', DEFAULT_LIMIT, type=int), 1), MAX_LIMIT)
+        if not query:
+            return jsonify([]), 200
+        
+        suggest_index.ensure_fresh()
+        return jsonify(suggest_index.suggest(query, limit)), 200
+        
+    except Exception as e:
+        return jsonify({'message': 'Suggest failed', 'error': str(e)}), 500
+
 @content_bp.route('/recommendations', methods=['GET'])
 @token_required
 def get_recommendations(current_user):
     try:
-        # Simple recommendation based on user's watch history and ratings
-        # Get user's favorite genres from watch history
-        user_genres = db.session.query(Genre.id).join(
-            content_genres
-        ).join(Content).join(WatchHistory).filter(
-            WatchHistory.user_id == current_user.id
-        ).distinct().all()
-        
-        genre_ids = [g[0] for g in user_genres]
-        
-        if genre_ids:
-            # Recommend content from favorite genres
-            recommendations = Content.query.filter(
-                and_(
-                    Content.is_active == True,
-                    Content.genres.any(Genre.id.in_(genre_ids)),
-                    ~Content.id.in_(
-                        db.session.query(WatchHistory.content_id).filter_by(user_id=current_user.id)
-                    )
-                )
-            ).order_by(Content.rating.desc(), Content.view_count.desc()).limit(10).all()
-        else:
-            # Fallback to popular content
-            recommendations = Content.query.filter_by(is_active=True).order_by(
-                Content.rating.desc(), Content.view_count.desc()
-            ).limit(10).all()
-        
+        recommendations = recommend(current_user.id, limit=10)
         return jsonify([item.to_dict() for item in recommendations]), 200
         
     except Exception as e:
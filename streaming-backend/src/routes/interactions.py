@@ -1,12 +1,34 @@
-from flask import Blueprint, jsonify, request
+from flask import Blueprint, Response, jsonify, request
 from src.models.user import db
 from src.models.content import Content, Episode
 from src.models.interactions import Rating, Comment, WatchHistory, Favorite, Notification
-from src.routes.auth import token_required
+from src.routes.auth import token_required, stream_token_required
+from src.services import loading
+from src.services.aggregates import apply_rating_delta, adjust_counts
+from src.services.view_counter import view_counter
+from src.services.watch_progress import watch_progress
+from src.services.pagination import cursor_requested, keyset_paginate, InvalidCursor
+from src.services.bulk import parse_ids, InvalidBulkRequest
+from src.services.notifications import mark_read, unread_count
+from src.services.notification_stream import notification_stream, StreamsFull
+from src.services.threads import load_threads, descendants_query, serialize_replies
+from src.services.continue_watching import continue_watching, DEFAULT_LIMIT as CONTINUE_WATCHING_LIMIT, MAX_LIMIT as CONTINUE_WATCHING_MAX_LIMIT
 from datetime import datetime
 
 interactions_bp = Blueprint('interactions', __name__)
 
+MAX_MARK_READ_IDS = 1000  # one IN list per mark-read request
+
+MAX_PROGRESS_BATCH = 100
+MAX_ID = 2 ** 31 - 1  # Integer primary keys
+MAX_WATCH_SECONDS = 7 * 24 * 3600  # longer than any title
+
+def is_id(value):
+    return isinstance(value, int) and not isinstance(value, bool) and 0 < value <= MAX_ID
+
+def is_watch_seconds(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool) and 0 <= value <= MAX_WATCH_SECONDS
+
 # Rating routes
 @interactions_bp.route('/content/<int:content_id>/rating', methods=['POST'])
 @token_required
@@ -32,6 +54,7 @@ def rate_content(current_user, content_id):
         
         if existing_rating:
             # Update existing rating
+            apply_rating_delta(content_id, score - existing_rating.score)
             existing_rating.score = score
             existing_rating.updated_at = datetime.utcnow()
             message = 'Rating updated successfully'
@@ -43,13 +66,11 @@ def rate_content(current_user, content_id):
                 score=score
             )
             db.session.add(rating)
+            apply_rating_delta(content_id, score, 1)
             message = 'Rating added successfully'
         
         db.session.commit()
         
-        # Recalculate content average rating
-        content.calculate_average_rating()
-        
         return jsonify({'message': message}), 200
         
     except Exception as e:
@@ -79,7 +100,16 @@ def get_content_ratings(content_id):
         page = request.args.get('page', 1, type=int)
         per_page = min(request.args.get('per_page', 10, type=int), 50)
         
-        pagination = Rating.query.filter_by(content_id=content_id).order_by(
+        query = Rating.query.filter_by(content_id=content_id).options(*loading.rating_items())
+        
+        if cursor_requested():
+            ratings, pagination = keyset_paginate(query, [Rating.created_at, Rating.id], per_page)
+            return jsonify({
+                'ratings': [rating.to_dict() for rating in ratings],
+                'pagination': pagination
+            }), 200
+        
+        pagination = query.order_by(
             Rating.created_at.desc()
         ).paginate(page=page, per_page=per_page, error_out=False)
         
@@ -95,6 +125,8 @@ def get_content_ratings(content_id):
             }
         }), 200
         
+    except InvalidCursor as e:
+        return jsonify({'message': str(e)}), 400
     except Exception as e:
         return jsonify({'message': 'Failed to get ratings', 'error': str(e)}), 500
 
@@ -123,6 +155,7 @@ def add_comment(current_user, content_id):
         )
         
         db.session.add(comment)
+        adjust_counts(content_id, comments=1)
         db.session.commit()
         
         return jsonify({
@@ -139,20 +172,31 @@ def get_comments(content_id):
     try:
         page = request.args.get('page', 1, type=int)
         per_page = min(request.args.get('per_page', 20, type=int), 50)
+        # Replies returned per thread; the rest are paged via /comments/<id>/replies
+        per_thread = max(min(request.args.get('replies', 20, type=int), 100), 0)
         
         # Get top-level comments (no parent)
-        pagination = Comment.query.filter_by(
+        query = Comment.query.filter_by(
             content_id=content_id,
             parent_id=None,
             is_active=True
-        ).order_by(Comment.created_at.desc()).paginate(
+        ).options(*loading.comment_items())
+        
+        if cursor_requested():
+            comments, pagination = keyset_paginate(query, [Comment.created_at, Comment.id], per_page)
+            return jsonify({
+                'comments': load_threads(comments, per_thread),
+                'pagination': pagination
+            }), 200
+        
+        pagination = query.order_by(Comment.created_at.desc()).paginate(
             page=page, per_page=per_page, error_out=False
         )
         
         comments = pagination.items
         
         return jsonify({
-            'comments': [comment.to_dict(include_replies=True) for comment in comments],
+            'comments': load_threads(comments, per_thread),
             'pagination': {
                 'page': page,
                 'per_page': per_page,
@@ -161,9 +205,36 @@ def get_comments(content_id):
             }
         }), 200
         
+    except InvalidCursor as e:
+        return jsonify({'message': str(e)}), 400
     except Exception as e:
         return jsonify({'message': 'Failed to get comments', 'error': str(e)}), 500
 
+@interactions_bp.route('/comments/<int:comment_id>/replies', methods=['GET'])
+def get_comment_replies(comment_id):
+    try:
+        per_page = min(request.args.get('per_page', 20, type=int), 100)
+        
+        comment = Comment.query.filter_by(id=comment_id, is_active=True).first()
+        if not comment:
+            return jsonify({'message': 'Comment not found'}), 404
+        
+        # Every reply below this comment, oldest first; parent_id places each one
+        replies, pagination = keyset_paginate(
+            descendants_query([comment_id]), [Comment.created_at, Comment.id], per_page, descending=False
+        )
+        
+        return jsonify({
+            'comment_id': comment_id,
+            'replies': serialize_replies(replies),
+            'pagination': pagination
+        }), 200
+        
+    except InvalidCursor as e:
+        return jsonify({'message': str(e)}), 400
+    except Exception as e:
+        return jsonify({'message': 'Failed to get replies', 'error': str(e)}), 500
+
 @interactions_bp.route('/comments/<int:comment_id>', methods=['PUT'])
 @token_required
 def update_comment(current_user, comment_id):
@@ -202,6 +273,8 @@ def delete_comment(current_user, comment_id):
             return jsonify({'message': 'Comment not found or unauthorized'}), 404
         
         # Soft delete
+        if comment.is_active:
+            adjust_counts(comment.content_id, comments=-1)
         comment.is_active = False
         db.session.commit()
         
@@ -251,8 +324,10 @@ def update_watch_history(current_user):
             watch_history.total_time = total_time
             watch_history.completed = watch_time >= total_time * 0.9  # 90% completion
             watch_history.last_watched = datetime.utcnow()
+            started = False
         else:
             # Create new record
+            started = True
             watch_history = WatchHistory(
                 user_id=current_user.id,
                 content_id=content_id,
@@ -265,6 +340,10 @@ def update_watch_history(current_user):
         
         db.session.commit()
         
+        # A new history row for an episode means playback of it just started
+        if started and episode_id:
+            view_counter.record_episode_view(episode_id, content_id=content_id, user_id=current_user.id)
+        
         return jsonify({
             'message': 'Watch history updated successfully',
             'watch_history': watch_history.to_dict()
@@ -274,6 +353,74 @@ def update_watch_history(current_user):
         db.session.rollback()
         return jsonify({'message': 'Failed to update watch history', 'error': str(e)}), 500
 
+@interactions_bp.route('/watch-history/batch', methods=['POST'])
+@token_required
+def batch_update_watch_history(current_user):
+    try:
+        data = request.get_json()
+        updates = data.get('updates') if isinstance(data, dict) else data
+        
+        if not isinstance(updates, list) or not updates:
+            return jsonify({'message': 'updates must be a non-empty list'}), 400
+        
+        if len(updates) > MAX_PROGRESS_BATCH:
+            return jsonify({'message': f'At most {MAX_PROGRESS_BATCH} updates per batch'}), 400
+        
+        required_fields = ['content_id', 'watch_time', 'total_time']
+        candidates = []
+        rejected = []
+        for index, item in enumerate(updates):
+            if not isinstance(item, dict) or not all(k in item for k in required_fields):
+                rejected.append({'index': index, 'message': 'content_id, watch_time, and total_time are required'})
+                continue
+            if not is_id(item['content_id']) or (item.get('episode_id') and not is_id(item['episode_id'])):
+                rejected.append({'index': index, 'message': 'content_id and episode_id must be positive integers'})
+                continue
+            if not all(is_watch_seconds(item[k]) for k in ('watch_time', 'total_time')):
+                rejected.append({
+                    'index': index,
+                    'message': f'watch_time and total_time must be numbers between 0 and {MAX_WATCH_SECONDS}'
+                })
+                continue
+            candidates.append((index, item))
+        
+        # Validate every referenced title and episode with one query each
+        content_ids = {item['content_id'] for _, item in candidates}
+        episode_ids = {item['episode_id'] for _, item in candidates if item.get('episode_id')}
+        
+        active_content = {
+            row[0] for row in db.session.query(Content.id).filter(
+                Content.id.in_(content_ids), Content.is_active == True
+            )
+        } if content_ids else set()
+        active_episodes = dict(db.session.query(Episode.id, Episode.series_id).filter(
+            Episode.id.in_(episode_ids), Episode.is_active == True
+        ).all()) if episode_ids else {}
+        
+        accepted = []
+        for index, item in candidates:
+            content_id = item['content_id']
+            episode_id = item.get('episode_id') or None
+            if content_id not in active_content:
+                rejected.append({'index': index, 'message': 'Content not found'})
+            elif episode_id and active_episodes.get(episode_id) != content_id:
+                rejected.append({'index': index, 'message': 'Episode not found'})
+            else:
+                # Whole seconds: the columns are integers
+                accepted.append((content_id, episode_id, round(item['watch_time']), round(item['total_time'])))
+        
+        if accepted:
+            watch_progress.submit(current_user.id, accepted)
+        
+        return jsonify({
+            'message': 'Watch progress accepted',
+            'accepted': len(accepted),
+            'rejected': sorted(rejected, key=lambda r: r['index'])
+        }), 202
+        
+    except Exception as e:
+        return jsonify({'message': 'Failed to record watch progress', 'error': str(e)}), 500
+
 @interactions_bp.route('/watch-history', methods=['GET'])
 @token_required
 def get_watch_history(current_user):
@@ -281,7 +428,20 @@ def get_watch_history(current_user):
         page = request.args.get('page', 1, type=int)
         per_page = min(request.args.get('per_page', 20, type=int), 50)
         
-        pagination = WatchHistory.query.filter_by(user_id=current_user.id).order_by(
+        query = WatchHistory.query.filter_by(user_id=current_user.id).options(
+            *loading.watch_history_items()
+        )
+        
+        if cursor_requested():
+            history, pagination = keyset_paginate(
+                query, [WatchHistory.last_watched, WatchHistory.id], per_page
+            )
+            return jsonify({
+                'watch_history': [item.to_dict() for item in history],
+                'pagination': pagination
+            }), 200
+        
+        pagination = query.order_by(
             WatchHistory.last_watched.desc()
         ).paginate(page=page, per_page=per_page, error_out=False)
         
@@ -297,9 +457,21 @@ def get_watch_history(current_user):
             }
         }), 200
         
+    except InvalidCursor as e:
+        return jsonify({'message': str(e)}), 400
     except Exception as e:
         return jsonify({'message': 'Failed to get watch history', 'error': str(e)}), 500
 
+@interactions_bp.route('/watch-history/continue', methods=['GET'])
+@token_required
+def get_continue_watching(current_user):
+    try:
+        limit = min(max(request.args.get('limit', CONTINUE_WATCHING_LIMIT, type=int), 1), CONTINUE_WATCHING_MAX_LIMIT)
+        return jsonify({'items': continue_watching(current_user.id, limit)}), 200
+        
+    except Exception as e:
+        return jsonify({'message': 'Failed to get continue watching', 'error': str(e)}), 500
+
 # Favorites routes
 @interactions_bp.route('/favorites', methods=['POST'])
 @token_required
@@ -331,6 +503,7 @@ def add_favorite(current_user):
         )
         
         db.session.add(favorite)
+        adjust_counts(content_id, favorites=1)
         db.session.commit()
         
         return jsonify({
@@ -349,7 +522,16 @@ def get_favorites(current_user):
         page = request.args.get('page', 1, type=int)
         per_page = min(request.args.get('per_page', 20, type=int), 50)
         
-        pagination = Favorite.query.filter_by(user_id=current_user.id).order_by(
+        query = Favorite.query.filter_by(user_id=current_user.id).options(*loading.favorite_items())
+        
+        if cursor_requested():
+            favorites, pagination = keyset_paginate(query, [Favorite.created_at, Favorite.id], per_page)
+            return jsonify({
+                'favorites': [item.to_dict() for item in favorites],
+                'pagination': pagination
+            }), 200
+        
+        pagination = query.order_by(
             Favorite.created_at.desc()
         ).paginate(page=page, per_page=per_page, error_out=False)
         
@@ -365,6 +547,8 @@ def get_favorites(current_user):
             }
         }), 200
         
+    except InvalidCursor as e:
+        return jsonify({'message': str(e)}), 400
     except Exception as e:
         return jsonify({'message': 'Failed to get favorites', 'error': str(e)}), 500
 
@@ -381,6 +565,7 @@ def remove_favorite(current_user, content_id):
             return jsonify({'message': 'Favorite not found'}), 404
         
         db.session.delete(favorite)
+        adjust_counts(content_id, favorites=-1)
         db.session.commit()
         
         return jsonify({'message': 'Removed from favorites successfully'}), 200
@@ -412,10 +597,21 @@ def get_notifications(current_user):
         per_page = min(request.args.get('per_page', 20, type=int), 50)
         unread_only = request.args.get('unread_only', type=bool)
         
-        query = Notification.query.filter_by(user_id=current_user.id)
+        query = Notification.query.filter_by(user_id=current_user.id).options(
+            *loading.notification_items()
+        )
         if unread_only:
             query = query.filter_by(is_read=False)
         
+        if cursor_requested():
+            notifications, pagination = keyset_paginate(
+                query, [Notification.created_at, Notification.id], per_page
+            )
+            return jsonify({
+                'notifications': [notification.to_dict() for notification in notifications],
+                'pagination': pagination
+            }), 200
+        
         pagination = query.order_by(Notification.created_at.desc()).paginate(
             page=page, per_page=per_page, error_out=False
         )
@@ -432,22 +628,64 @@ def get_notifications(current_user):
             }
         }), 200
         
+    except InvalidCursor as e:
+        return jsonify({'message': str(e)}), 400
     except Exception as e:
         return jsonify({'message': 'Failed to get notifications', 'error': str(e)}), 500
 
+@interactions_bp.route('/notifications/stream', methods=['GET'])
+@stream_token_required
+def stream_notifications(current_user):
+    try:
+        # Resume after the last event the browser saw, else only new notifications
+        last_event_id = request.headers.get('Last-Event-ID') or request.args.get('last_event_id')
+        try:
+            last_event_id = int(last_event_id) if last_event_id else notification_stream.latest_id(current_user.id)
+        except ValueError:
+            return jsonify({'message': 'Last-Event-ID must be a notification id'}), 400
+        
+        subscription = notification_stream.subscribe(current_user.id)
+        response = Response(
+            notification_stream.events(subscription, last_event_id),
+            mimetype='text/event-stream',
+            headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+        )
+        # Also covers a client that disconnects before the first frame
+        response.call_on_close(lambda: notification_stream.unsubscribe(subscription))
+        return response
+        
+    except StreamsFull:
+        # EventSource gives up on an error status; a 200 that ends at once makes
+        # it reconnect after the `retry:` delay
+        return Response(
+            notification_stream.busy_frame(),
+            mimetype='text/event-stream',
+            headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+        )
+    except Exception as e:
+        return jsonify({'message': 'Failed to open notification stream', 'error': str(e)}), 500
+
+@interactions_bp.route('/notifications/unread-count', methods=['GET'])
+@token_required
+def get_unread_count(current_user):
+    try:
+        # One primary-key read of the maintained counter; cheap enough to poll
+        return jsonify({'unread_count': unread_count(current_user.id)}), 200
+        
+    except Exception as e:
+        return jsonify({'message': 'Failed to get unread count', 'error': str(e)}), 500
+
 @interactions_bp.route('/notifications/<int:notification_id>/read', methods=['POST'])
 @token_required
 def mark_notification_read(current_user, notification_id):
     try:
-        notification = Notification.query.filter_by(
-            id=notification_id,
-            user_id=current_user.id
-        ).first()
-        
-        if not notification:
-            return jsonify({'message': 'Notification not found'}), 404
-        
-        notification.is_read = True
+        if not mark_read(current_user.id, [notification_id]):
+            exists = db.session.query(Notification.id).filter_by(
+                id=notification_id,
+                user_id=current_user.id
+            ).first()
+            if not exists:
+                return jsonify({'message': 'Notification not found'}), 404
         db.session.commit()
         
         return jsonify({'message': 'Notification marked as read'}), 200
@@ -456,3 +694,34 @@ def mark_notification_read(current_user, notification_id):
         db.session.rollback()
         return jsonify({'message': 'Failed to mark notification as read', 'error': str(e)}), 500
 
+@interactions_bp.route('/notifications/read', methods=['POST'])
+@token_required
+def mark_notifications_read(current_user):
+    try:
+        # {"all": true} or {"ids": [...]}
+        data = request.get_json(silent=True) or {}
+        
+        if data.get('all'):
+            notification_ids = None
+        elif 'ids' in data:
+            notification_ids = parse_ids(data['ids'])
+            if len(notification_ids) > MAX_MARK_READ_IDS:
+                return jsonify({'message': f'At most {MAX_MARK_READ_IDS} ids per request'}), 400
+        else:
+            return jsonify({'message': 'ids or all is required'}), 400
+        
+        updated = mark_read(current_user.id, notification_ids)
+        db.session.commit()
+        
+        return jsonify({
+            'message': 'Notifications marked as read',
+            'updated_count': updated,
+            'unread_count': unread_count(current_user.id)
+        }), 200
+        
+    except InvalidBulkRequest as e:
+        return jsonify({'message': str(e)}), 400
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'message': 'Failed to mark notifications as read', 'error': str(e)}), 500
+
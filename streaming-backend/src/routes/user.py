@@ -1,5 +1,7 @@
 from flask import Blueprint, jsonify, request
 from src.models.user import User, db
+from src.services.principals import principal_cache
+from src.services.aggregates import retract_user_engagement
 
 user_bp = Blueprint('user', __name__)
 
@@ -29,11 +31,14 @@ def update_user(user_id):
     user.username = data.get('username', user.username)
     user.email = data.get('email', user.email)
     db.session.commit()
+    principal_cache.invalidate(user_id)
     return jsonify(user.to_dict())
 
 @user_bp.route('/users/<int:user_id>', methods=['DELETE'])
 def delete_user(user_id):
     user = User.query.get_or_404(user_id)
+    retract_user_engagement(user_id)
     db.session.delete(user)
     db.session.commit()
+    principal_cache.invalidate(user_id)
     return '', 204
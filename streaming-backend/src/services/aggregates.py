@@ -0,0 +1,125 @@
+from datetime import datetime
+from sqlalchemy import case, literal, union_all, select
+from src.models.user import db
+from src.models.content import Content
+from src.models.interactions import Rating, Comment, Favorite
+
+# Denormalized engagement aggregates on Content. Every rating, comment and
+# favorite write applies a delta in the same transaction with a single atomic
+# UPDATE, so Content.rating is derived in O(1) instead of re-reading every
+# Rating row. `reconcile_aggregates` recomputes everything with one GROUP BY
+# for backfills and drift repair (`flask reconcile-aggregates`).
+
+content_table = Content.__table__
+
+
+def apply_rating_delta(content_id, score_delta, count_delta=0):
+    # SET expressions read the pre-update row, so the new average is computed
+    # from old values plus the deltas
+    new_sum = content_table.c.rating_sum + score_delta
+    new_count = content_table.c.rating_count + count_delta
+    db.session.execute(
+        content_table.update().where(content_table.c.id == content_id).values(
+            rating_sum=new_sum,
+            rating_count=new_count,
+            rating=case((new_count > 0, new_sum / new_count), else_=0.0),
+            updated_at=datetime.utcnow()
+        )
+    )
+
+
+def adjust_counts(content_id, comments=0, favorites=0):
+    values = {}
+    if comments:
+        values['comment_count'] = content_table.c.comment_count + comments
+    if favorites:
+        values['favorite_count'] = content_table.c.favorite_count + favorites
+    if not values:
+        return
+    # Counters don't move updated_at; catalog validators are weak
+    values['updated_at'] = content_table.c.updated_at
+    db.session.execute(
+        content_table.update().where(content_table.c.id == content_id).values(**values)
+    )
+
+
+def adjust_comment_counts(deltas):
+    # Batched form of adjust_counts for bulk moderation: {content_id: delta}
+    deltas = [{'row_id': content_id, 'delta': delta} for content_id, delta in deltas.items() if delta]
+    if not deltas:
+        return
+    db.session.execute(
+        content_table.update().where(content_table.c.id == db.bindparam('row_id')).values(
+            comment_count=content_table.c.comment_count + db.bindparam('delta'),
+            updated_at=content_table.c.updated_at
+        ),
+        deltas
+    )
+
+
+def engagement_totals(user_id=None):
+    # (content_id, score sum, ratings, active comments, favorites) per title,
+    # optionally for one user's rows only
+    zero = literal(0)
+    one = literal(1)
+    ratings = select(Rating.content_id, Rating.score.label('score'), one.label('ratings'),
+                     zero.label('comments'), zero.label('favorites'))
+    comments = select(Comment.content_id, zero, zero, one, zero).where(Comment.is_active == True)
+    favorites = select(Favorite.content_id, zero, zero, zero, one)
+    if user_id is not None:
+        ratings = ratings.where(Rating.user_id == user_id)
+        comments = comments.where(Comment.user_id == user_id)
+        favorites = favorites.where(Favorite.user_id == user_id)
+    events = union_all(ratings, comments, favorites).subquery()
+
+    return db.session.execute(
+        select(
+            events.c.content_id,
+            db.func.sum(events.c.score),
+            db.func.sum(events.c.ratings),
+            db.func.sum(events.c.comments),
+            db.func.sum(events.c.favorites)
+        ).group_by(events.c.content_id)
+    ).all()
+
+
+def retract_user_engagement(user_id):
+    # Before a user is deleted (their ratings, comments and favorites cascade
+    # away), take them out of the maintained aggregates in the same transaction
+    for content_id, score, ratings, comments, favorites in engagement_totals(user_id):
+        if ratings:
+            apply_rating_delta(content_id, -float(score or 0), -int(ratings))
+        adjust_counts(content_id, comments=-int(comments or 0), favorites=-int(favorites or 0))
+
+
+def reconcile_aggregates():
+    totals = engagement_totals()
+
+    db.session.execute(content_table.update().values(
+        rating_sum=0.0, rating_count=0, rating=0.0, comment_count=0, favorite_count=0,
+        updated_at=content_table.c.updated_at
+    ))
+    if totals:
+        db.session.execute(
+            content_table.update().where(content_table.c.id == db.bindparam('row_id')).values(
+                rating_sum=db.bindparam('rating_sum'),
+                rating_count=db.bindparam('rating_count'),
+                rating=db.bindparam('average'),
+                comment_count=db.bindparam('comment_count'),
+                favorite_count=db.bindparam('favorite_count'),
+                updated_at=content_table.c.updated_at
+            ),
+            [
+                {
+                    'row_id': content_id,
+                    'rating_sum': float(score or 0),
+                    'rating_count': int(ratings or 0),
+                    'average': float(score) / ratings if ratings else 0.0,
+                    'comment_count': int(comments or 0),
+                    'favorite_count': int(favorites or 0)
+                }
+                for content_id, score, ratings, comments, favorites in totals
+            ]
+        )
+    db.session.commit()
+    return len(totals)
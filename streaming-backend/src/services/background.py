@@ -0,0 +1,66 @@
+import atexit
+import os
+import threading
+
+# Base for in-process write-behind workers: a daemon thread that calls
+# `run_once()` every `interval` seconds, can be woken early, and runs one last
+# time at exit. Threads don't survive a fork, so each (gunicorn) worker process
+# lazily starts its own on first use.
+
+
+class PeriodicWorker:
+    thread_name = 'periodic-worker'
+    run_at_exit = True  # write-behind buffers need a last flush; refreshers don't
+
+    def __init__(self, interval):
+        self.app = None
+        self.interval = interval
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread_lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+
+    def init_app(self, app):
+        self.app = app
+        atexit.register(self.shutdown)
+
+    @property
+    def synchronous(self):
+        # An interval of 0 means "no background thread, do the work inline"
+        return not self.interval or self.interval <= 0
+
+    def run_once(self):
+        raise NotImplementedError
+
+    def _running(self):
+        return self._thread is not None and self._pid == os.getpid() and self._thread.is_alive()
+
+    def ensure_running(self):
+        if self._running():
+            return
+        with self._thread_lock:
+            if self._running():
+                return
+            self._pid = os.getpid()
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name=self.thread_name, daemon=True)
+            self._thread.start()
+
+    def wake(self):
+        self._wake.set()
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            try:
+                self.run_once()
+            except Exception as e:
+                self.app.logger.warning('%s failed: %s', self.thread_name, e)
+
+    def shutdown(self):
+        self._stop.set()
+        self._wake.set()
+        if self.app is not None and self.run_at_exit:
+            self.run_once()
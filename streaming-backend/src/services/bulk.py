@@ -0,0 +1,46 @@
+from datetime import datetime
+from src.models.user import db
+
+# Set-based admin bulk actions. An action is one `UPDATE ... WHERE id IN (...)`
+# per chunk of BULK_CHUNK_SIZE ids (keeping well under driver bind-parameter
+# limits), restricted to rows whose value actually changes. RETURNING hands
+# back just the columns callers need for cache and aggregate upkeep, so no ORM
+# objects are loaded however many rows are touched.
+
+BULK_CHUNK_SIZE = 500
+MAX_BULK_IDS = 100000
+
+
+class InvalidBulkRequest(ValueError):
+    pass
+
+
+def parse_ids(values):
+    if not isinstance(values, list) or not values:
+        raise InvalidBulkRequest('ids must be a non-empty list')
+    if len(values) > MAX_BULK_IDS:
+        raise InvalidBulkRequest(f'At most {MAX_BULK_IDS} ids per request')
+    try:
+        # Duplicates are dropped; order doesn't matter to a set-based update
+        return sorted({int(value) for value in values})
+    except (TypeError, ValueError):
+        raise InvalidBulkRequest('ids must be integers')
+
+
+def bulk_set(model, ids, column, value, returning=(), touch=True, criteria=()):
+    """Set `column` to `value` on the given rows; returns (id, *returning) for rows that changed."""
+    table = model.__table__
+    values = {column: value}
+    if touch and 'updated_at' in table.c:
+        values['updated_at'] = datetime.utcnow()
+
+    changed = []
+    for start in range(0, len(ids), BULK_CHUNK_SIZE):
+        chunk = ids[start:start + BULK_CHUNK_SIZE]
+        statement = table.update().where(
+            table.c.id.in_(chunk),
+            table.c[column].is_distinct_from(value),
+            *criteria
+        ).values(**values).returning(table.c.id, *(table.c[name] for name in returning))
+        changed.extend(db.session.execute(statement).all())
+    return changed
@@ -0,0 +1,189 @@
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+from flask import request, current_app, make_response
+
+# Response cache for anonymous catalog GETs. Entries are keyed by endpoint, view
+# args and normalized query args, expire after a TTL, and carry tags so writes
+# can drop everything derived from the rows they touched. The default backend
+# is a bounded in-process LRU; anything implementing the CacheBackend methods
+# (e.g. a Redis-backed store shared by all workers) can be passed to init_app.
+
+DEFAULT_TTL = 60  # seconds
+DEFAULT_MAX_ENTRIES = 1024
+
+# Response headers replayed on a hit, so cached entries still answer conditional GETs
+CACHED_HEADERS = ('ETag', 'Last-Modified')
+
+
+class CacheBackend:
+    def get(self, key):
+        raise NotImplementedError
+
+    def set(self, key, value, ttl, tags=()):
+        raise NotImplementedError
+
+    def delete(self, key):
+        raise NotImplementedError
+
+    def invalidate_tags(self, tags):
+        raise NotImplementedError
+
+    def clear(self):
+        raise NotImplementedError
+
+    def stats(self):
+        return {}
+
+
+class MemoryLRUCache(CacheBackend):
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # key -> (expires_at, value, tags)
+        self._tags = {}  # tag -> set of keys
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def _drop_locked(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        for tag in entry[2]:
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= time.monotonic():
+                if entry is not None:
+                    self._drop_locked(key)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key, value, ttl, tags=()):
+        with self._lock:
+            self._drop_locked(key)
+            self._entries[key] = (time.monotonic() + ttl, value, tuple(tags))
+            for tag in tags:
+                self._tags.setdefault(tag, set()).add(key)
+            while len(self._entries) > self.max_entries:
+                oldest = next(iter(self._entries))
+                self._drop_locked(oldest)
+                self.evictions += 1
+
+    def delete(self, key):
+        with self._lock:
+            if key in self._entries:
+                self._drop_locked(key)
+                self.invalidations += 1
+
+    def invalidate_tags(self, tags):
+        with self._lock:
+            for tag in tags:
+                for key in list(self._tags.get(tag, ())):
+                    self._drop_locked(key)
+                    self.invalidations += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._tags.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'backend': 'memory',
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': round(self.hits / lookups, 4) if lookups else 0.0,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations
+            }
+
+
+class ResponseCache:
+    def __init__(self):
+        self.backend = None
+        self.default_ttl = DEFAULT_TTL
+
+    def init_app(self, app, backend=None):
+        self.default_ttl = app.config.get('RESPONSE_CACHE_TTL', DEFAULT_TTL)
+        self.backend = backend or MemoryLRUCache(
+            app.config.get('RESPONSE_CACHE_MAX_ENTRIES', DEFAULT_MAX_ENTRIES)
+        )
+        app.extensions['response_cache'] = self
+
+    @property
+    def enabled(self):
+        return self.backend is not None and self.default_ttl > 0
+
+    @staticmethod
+    def make_key():
+        # Sort args so the same filters in a different order share an entry
+        args = sorted(
+            (name, value) for name, values in request.args.lists() for value in values
+        )
+        view_args = sorted((request.view_args or {}).items())
+        return repr((request.endpoint, view_args, args))
+
+    def cached(self, tags=(), ttl=None):
+        # Tags may reference view args, e.g. 'episodes:{content_id}'
+        def decorator(f):
+            @wraps(f)
+            def decorated(*args, **kwargs):
+                if (not self.enabled or request.method != 'GET'
+                        or 'Authorization' in request.headers):
+                    return f(*args, **kwargs)
+
+                key = self.make_key()
+                hit = self.backend.get(key)
+                if hit is not None:
+                    body, status, mimetype, headers = hit
+                    response = current_app.response_class(
+                        body, status=status, mimetype=mimetype, headers=headers
+                    )
+                    response.headers['X-Cache'] = 'HIT'
+                    return response.make_conditional(request)
+
+                response = make_response(f(*args, **kwargs))
+                if response.status_code == 200 and not response.direct_passthrough:
+                    entry_tags = [tag.format(**kwargs) for tag in tags]
+                    self.backend.set(
+                        key,
+                        (
+                            response.get_data(), response.status_code, response.mimetype,
+                            [(name, response.headers[name]) for name in CACHED_HEADERS if name in response.headers]
+                        ),
+                        ttl or self.default_ttl,
+                        entry_tags
+                    )
+                response.headers['X-Cache'] = 'MISS'
+                return response
+            return decorated
+        return decorator
+
+    def invalidate(self, *tags):
+        if self.backend is not None and tags:
+            self.backend.invalidate_tags(tags)
+
+    def stats(self):
+        stats = self.backend.stats() if self.backend is not None else {}
+        stats['ttl'] = self.default_ttl
+        return stats
+
+
+response_cache = ResponseCache()
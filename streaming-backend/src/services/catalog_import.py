@@ -0,0 +1,375 @@
+import json
+from datetime import datetime
+from sqlalchemy import insert
+from src.models.user import db
+from src.models.content import Content, Episode, Genre, content_genres
+from src.services.cache import response_cache
+from src.services.suggest import suggest_index
+
+# Streaming catalog import. Input is NDJSON, one record per line:
+#
+#   {"type": "genre", "name": "Noir", "description": "..."}
+#   {"type": "content", "ref": "bb", "title": "Breaking Bad", "content_type": "series",
+#    "genres": ["Drama", "Crime"], "episodes": [{"season_number": 1, "episode_number": 1, "title": "Pilot"}]}
+#   {"type": "episode", "series_ref": "bb", "season_number": 1, "episode_number": 2, "title": "..."}
+#
+# Episodes name their series with `series_ref` (a `ref` from earlier in the same
+# import) or `series_id` (an existing title). Lines are read incrementally and
+# written in chunks of IMPORT_BATCH_SIZE: genre names are resolved in one query
+# per chunk, episodes are de-duplicated on (series, season, episode) in memory
+# and rows go in as executemany INSERTs. A bad line is reported with its line
+# number and skipped; it never aborts the rest of the import.
+
+DEFAULT_BATCH_SIZE = 500
+MAX_REPORTED_ERRORS = 1000
+INT_MIN, INT_MAX = -2 ** 31, 2 ** 31 - 1  # Integer columns
+
+CONTENT_FIELDS = (
+    'title', 'description', 'content_type', 'cover_image', 'trailer_url', 'release_year',
+    'duration', 'imdb_rating', 'language', 'country', 'director', 'cast', 'is_featured',
+    'is_active', 'video_url'
+)
+EPISODE_FIELDS = (
+    'title', 'description', 'episode_number', 'season_number', 'duration', 'video_url', 'thumbnail'
+)
+
+
+class ImportLineError(ValueError):
+    pass
+
+
+def _require(record, fields):
+    missing = [field for field in fields if record.get(field) in (None, '')]
+    if missing:
+        raise ImportLineError(f"missing {', '.join(missing)}")
+
+
+def _int(record, field):
+    value = record[field]
+    try:
+        if isinstance(value, (bool, float)):
+            raise TypeError
+        value = int(value)
+    except (TypeError, ValueError):
+        raise ImportLineError(f'{field} must be an integer')
+    if not INT_MIN <= value <= INT_MAX:
+        raise ImportLineError(f'{field} is out of range')
+    return value
+
+
+def _check_fields(record, table, fields):
+    # Type-check a line's values against the columns they go into, so one bad
+    # value is reported on its line instead of failing the batch's INSERT
+    for field in fields:
+        value = record.get(field)
+        if value is None:
+            continue
+        column_type = table.c[field].type
+        expected = column_type.python_type
+        if expected is bool:
+            if not isinstance(value, bool):
+                raise ImportLineError(f'{field} must be true or false')
+        elif expected is int:
+            if not isinstance(value, int) or isinstance(value, bool):
+                raise ImportLineError(f'{field} must be an integer')
+            if not INT_MIN <= value <= INT_MAX:
+                raise ImportLineError(f'{field} is out of range')
+        elif expected is float:
+            if not isinstance(value, (int, float)) or isinstance(value, bool):
+                raise ImportLineError(f'{field} must be a number')
+        elif expected is str:
+            if not isinstance(value, str):
+                raise ImportLineError(f'{field} must be a string')
+            if getattr(column_type, 'length', None) and len(value) > column_type.length:
+                raise ImportLineError(f'{field} is longer than {column_type.length} characters')
+
+
+class CatalogImporter:
+    def __init__(self, batch_size=DEFAULT_BATCH_SIZE):
+        self.batch_size = batch_size
+        self.genre_ids = {}  # name -> id, filled lazily
+        self.refs = {}  # import ref -> content id
+        self.series_ids = set()  # known series
+        self.episode_keys = {}  # series id -> {(season, episode)}
+        self.created = {'genres': 0, 'content': 0, 'episodes': 0}
+        self.errors = []
+        self.error_count = 0
+        self.lines = 0
+        self.new_content_ids = []
+        self.touched_series = set()
+        self._batch_refs = []
+
+    # Reporting
+
+    def error(self, line, message):
+        self.error_count += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({'line': line, 'error': message})
+
+    def report(self):
+        return {
+            'lines': self.lines,
+            'created': self.created,
+            'error_count': self.error_count,
+            'errors': self.errors,
+            'errors_truncated': self.error_count > len(self.errors)
+        }
+
+    # Driving
+
+    def run(self, lines):
+        batch = []
+        for raw in lines:
+            self.lines += 1
+            if isinstance(raw, bytes):
+                raw = raw.decode('utf-8', errors='replace')
+            raw = raw.strip()
+            if not raw:
+                continue
+            try:
+                record = json.loads(raw)
+                if not isinstance(record, dict):
+                    raise ImportLineError('expected a JSON object')
+            except ValueError as e:
+                self.error(self.lines, f'invalid JSON: {e}')
+                continue
+            batch.append((self.lines, record))
+            if len(batch) >= self.batch_size:
+                self.write_batch(batch)
+                batch = []
+        if batch:
+            self.write_batch(batch)
+        self.invalidate_caches()
+        return self.report()
+
+    def invalidate_caches(self):
+        if self.created['genres']:
+            response_cache.invalidate('genres')
+        if self.new_content_ids:
+            suggest_index.refresh(self.new_content_ids)
+            response_cache.invalidate('content')
+        response_cache.invalidate(*(f'episodes:{series_id}' for series_id in self.touched_series))
+
+    def write_batch(self, batch):
+        by_type = {'genre': [], 'content': [], 'episode': []}
+        for line, record in batch:
+            kind = record.get('type')
+            if not isinstance(kind, str) or kind not in by_type:
+                self.error(line, 'type must be genre, content or episode')
+                continue
+            by_type[kind].append((line, record))
+
+        created = dict(self.created)
+        content_mark = len(self.new_content_ids)
+        self._batch_refs = []
+        try:
+            self._import_genres(by_type['genre'])
+            episodes = self._import_content(by_type['content'])
+            self._import_episodes(episodes + by_type['episode'])
+            db.session.commit()
+        except Exception as e:
+            # A database error loses this chunk only; earlier chunks are committed.
+            # Forget what it added and drop the lookup caches, which reload lazily.
+            db.session.rollback()
+            self.created = created
+            del self.new_content_ids[content_mark:]
+            for ref in self._batch_refs:
+                self.refs.pop(ref, None)
+            self.genre_ids.clear()
+            self.series_ids.clear()
+            self.episode_keys.clear()
+            for line, _ in batch:
+                self.error(line, f'batch failed: {e}')
+
+    # Genres
+
+    def _resolve_genres(self, names):
+        unknown = {name for name in names if name not in self.genre_ids}
+        if unknown:
+            for genre_id, name in db.session.query(Genre.id, Genre.name).filter(Genre.name.in_(unknown)):
+                self.genre_ids[name] = genre_id
+
+    def _import_genres(self, records):
+        valid = []
+        for line, record in records:
+            try:
+                _require(record, ('name',))
+                _check_fields(record, Genre.__table__, ('name', 'description'))
+            except ImportLineError as e:
+                self.error(line, str(e))
+                continue
+            valid.append((line, record))
+
+        self._resolve_genres({record['name'] for _, record in valid})
+        rows = {}
+        for line, record in valid:
+            if record['name'] not in self.genre_ids and record['name'] not in rows:
+                rows[record['name']] = {
+                    'name': record['name'],
+                    'description': record.get('description'),
+                    'created_at': datetime.utcnow()
+                }
+        if rows:
+            ids = db.session.scalars(
+                insert(Genre).returning(Genre.id, sort_by_parameter_order=True),
+                list(rows.values())
+            ).all()
+            self.genre_ids.update(zip(rows, ids))
+            self.created['genres'] += len(ids)
+
+    # Content
+
+    def _import_content(self, records):
+        checked = []
+        for line, record in records:
+            try:
+                _require(record, ('title', 'content_type'))
+                _check_fields(record, Content.__table__, CONTENT_FIELDS)
+                if record['content_type'] not in ('movie', 'series'):
+                    raise ImportLineError('content_type must be movie or series')
+                genres = record.get('genres') or []
+                if not isinstance(genres, list) or not all(isinstance(name, str) for name in genres):
+                    raise ImportLineError('genres must be a list of names')
+                if not isinstance(record.get('episodes') or [], list):
+                    raise ImportLineError('episodes must be a list')
+                if not isinstance(record.get('ref'), (str, int, type(None))) or isinstance(record.get('ref'), bool):
+                    raise ImportLineError('ref must be a string or integer')
+            except ImportLineError as e:
+                self.error(line, str(e))
+                continue
+            checked.append((line, record, genres))
+
+        self._resolve_genres({name for _, _, genres in checked for name in genres})
+
+        rows, genre_links, nested = [], [], []
+        for line, record, genres in checked:
+            try:
+                missing = [name for name in genres if name not in self.genre_ids]
+                if missing:
+                    raise ImportLineError(f"unknown genres: {', '.join(missing)}")
+                if record.get('ref') is not None and record['ref'] in self.refs:
+                    raise ImportLineError(f"duplicate ref {record['ref']}")
+            except ImportLineError as e:
+                self.error(line, str(e))
+                continue
+
+            values = {field: record[field] for field in CONTENT_FIELDS if field in record}
+            values.setdefault('is_featured', False)
+            now = datetime.utcnow()
+            values.update(created_at=now, updated_at=now)
+            rows.append((line, record, values, genres))
+
+        if not rows:
+            return nested
+
+        ids = db.session.scalars(
+            insert(Content).returning(Content.id, sort_by_parameter_order=True),
+            [values for _, _, values, _ in rows]
+        ).all()
+        for content_id, (line, record, values, genres) in zip(ids, rows):
+            self.new_content_ids.append(content_id)
+            if record.get('ref') is not None:
+                self.refs[record['ref']] = content_id
+                self._batch_refs.append(record['ref'])
+            genre_links.extend(
+                {'content_id': content_id, 'genre_id': genre_id}
+                for genre_id in {self.genre_ids[name] for name in genres}
+            )
+            if values['content_type'] == 'series':
+                self.series_ids.add(content_id)
+                self.episode_keys[content_id] = set()
+                for episode in record.get('episodes') or []:
+                    if isinstance(episode, dict):
+                        nested.append((line, dict(episode, series_id=content_id)))
+                    else:
+                        self.error(line, 'episodes must be JSON objects')
+            elif record.get('episodes'):
+                self.error(line, 'episodes ignored for a movie')
+
+        if genre_links:
+            db.session.execute(content_genres.insert(), genre_links)
+        self.created['content'] += len(ids)
+        return nested
+
+    # Episodes
+
+    def _series_for(self, record):
+        if record.get('series_ref') is not None:
+            if not isinstance(record['series_ref'], (str, int)) or record['series_ref'] not in self.refs:
+                raise ImportLineError(f"unknown series_ref {record['series_ref']}")
+            series_id = self.refs[record['series_ref']]
+        elif record.get('series_id') is not None:
+            series_id = _int(record, 'series_id')
+        else:
+            raise ImportLineError('missing series_ref or series_id')
+        if series_id not in self.series_ids:
+            raise ImportLineError(f'series {series_id} not found')
+        return series_id
+
+    def _load_series(self, records):
+        # Series not seen yet in this run, with their episode keys, in two queries
+        wanted = set()
+        for _, record in records:
+            if record.get('series_ref') is not None:
+                if isinstance(record['series_ref'], (str, int)) and record['series_ref'] in self.refs:
+                    wanted.add(self.refs[record['series_ref']])
+            elif record.get('series_id') is not None:
+                try:
+                    wanted.add(int(record['series_id']))
+                except (TypeError, ValueError):
+                    pass
+        wanted -= set(self.episode_keys)
+        if not wanted:
+            return
+
+        found = {
+            content_id for content_id, in db.session.query(Content.id).filter(
+                Content.id.in_(wanted), Content.content_type == 'series'
+            )
+        }
+        self.series_ids.update(found)
+        for series_id in wanted:
+            self.episode_keys[series_id] = set()
+        for series_id, season, number in db.session.query(
+            Episode.series_id, Episode.season_number, Episode.episode_number
+        ).filter(Episode.series_id.in_(found)):
+            self.episode_keys[series_id].add((season, number))
+
+    def _import_episodes(self, records):
+        self._load_series(records)
+
+        rows = []
+        for line, record in records:
+            try:
+                series_id = self._series_for(record)
+                _require(record, ('title', 'season_number', 'episode_number'))
+                key = (_int(record, 'season_number'), _int(record, 'episode_number'))
+                _check_fields(record, Episode.__table__, tuple(
+                    field for field in EPISODE_FIELDS + ('is_active',) if field not in ('season_number', 'episode_number')
+                ))
+                if key in self.episode_keys[series_id]:
+                    raise ImportLineError(f'episode S{key[0]}E{key[1]} already exists for series {series_id}')
+                air_date = None
+                if record.get('air_date'):
+                    try:
+                        air_date = datetime.strptime(record['air_date'], '%Y-%m-%d').date()
+                    except (TypeError, ValueError):
+                        raise ImportLineError('air_date must be YYYY-MM-DD')
+            except ImportLineError as e:
+                self.error(line, str(e))
+                continue
+
+            self.episode_keys[series_id].add(key)
+            self.touched_series.add(series_id)
+            # Every row carries every column: they share one executemany INSERT
+            values = {field: record.get(field) for field in EPISODE_FIELDS}
+            values.update(
+                series_id=series_id, season_number=key[0], episode_number=key[1],
+                air_date=air_date, is_active=record.get('is_active', True),
+                view_count=0, created_at=datetime.utcnow()
+            )
+            rows.append(values)
+
+        if rows:
+            db.session.execute(Episode.__table__.insert(), rows)
+            self.created['episodes'] += len(rows)
@@ -0,0 +1,141 @@
+import time
+from datetime import datetime
+import numpy as np
+from scipy import sparse
+from sqlalchemy import case, func
+from src.models.user import db
+from src.models.interactions import Rating, WatchHistory, Favorite
+from src.models.recommendation import ContentSimilarity
+
+# Offline item-to-item collaborative filtering. Builds a sparse user x content
+# matrix of implicit feedback from watch progress, favorites and ratings, takes
+# the cosine similarity between content columns with one sparse product, and
+# persists the top-N neighbours per title. Requires numpy and scipy; only the
+# CLI imports this module, so the web workers don't need them loaded.
+
+DEFAULT_NEIGHBORS = 20
+INSERT_CHUNK_SIZE = 5000
+
+FAVORITE_WEIGHT = 1.0
+COMPLETED_WEIGHT = 1.0
+STARTED_WEIGHT = 0.3  # plus up to 0.7 more for progress
+
+
+def load_interactions():
+    # (user_ids, content_ids, weights) arrays; duplicates are summed by the caller
+    progress = case(
+        (WatchHistory.total_time > 0, WatchHistory.watch_time * 1.0 / WatchHistory.total_time),
+        else_=0.0
+    )
+    watched = db.session.query(
+        WatchHistory.user_id,
+        WatchHistory.content_id,
+        func.max(progress),
+        func.max(case((WatchHistory.completed == True, 1), else_=0))
+    ).group_by(WatchHistory.user_id, WatchHistory.content_id).all()
+
+    favorites = db.session.query(Favorite.user_id, Favorite.content_id).all()
+    ratings = db.session.query(Rating.user_id, Rating.content_id, Rating.score).filter(Rating.score > 5).all()
+
+    users, items, weights = [], [], []
+    if watched:
+        w = np.array(watched, dtype=np.float64)
+        users.append(w[:, 0])
+        items.append(w[:, 1])
+        weights.append(np.where(
+            w[:, 3] > 0, COMPLETED_WEIGHT, STARTED_WEIGHT + 0.7 * np.clip(w[:, 2], 0.0, 1.0)
+        ))
+    if favorites:
+        f = np.array(favorites, dtype=np.float64)
+        users.append(f[:, 0])
+        items.append(f[:, 1])
+        weights.append(np.full(len(f), FAVORITE_WEIGHT))
+    if ratings:
+        r = np.array(ratings, dtype=np.float64)
+        users.append(r[:, 0])
+        items.append(r[:, 1])
+        # 6..10 maps to 0.2..1.0; low ratings are not positive feedback
+        weights.append((r[:, 2] - 5.0) / 5.0)
+
+    if not users:
+        empty = np.array([], dtype=np.int64)
+        return empty, empty, np.array([], dtype=np.float32)
+
+    return (
+        np.concatenate(users).astype(np.int64),
+        np.concatenate(items).astype(np.int64),
+        np.concatenate(weights).astype(np.float32)
+    )
+
+
+def build_interaction_matrix():
+    # CSR users x items matrix plus the id arrays that index its rows/columns
+    user_ids, content_ids, weights = load_interactions()
+    users, user_index = np.unique(user_ids, return_inverse=True)
+    items, item_index = np.unique(content_ids, return_inverse=True)
+    matrix = sparse.coo_matrix(
+        (weights, (user_index, item_index)), shape=(len(users), len(items)), dtype=np.float32
+    ).tocsr()  # sums duplicate (user, item) entries
+    return matrix, users, items
+
+
+def item_similarity(matrix):
+    # Cosine similarity between columns, without the diagonal
+    norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=0)).ravel())
+    inverse = np.divide(1.0, norms, out=np.zeros_like(norms), where=norms > 0)
+    normalized = matrix @ sparse.diags(inverse.astype(np.float32))
+    similarity = (normalized.T @ normalized).tocsr()
+    similarity.setdiag(0)
+    similarity.eliminate_zeros()
+    return similarity
+
+
+def top_neighbors(similarity, n):
+    # Yields (row, neighbour columns, scores) with at most n neighbours per row
+    indptr, indices, data = similarity.indptr, similarity.indices, similarity.data
+    for row in range(similarity.shape[0]):
+        start, end = indptr[row], indptr[row + 1]
+        if start == end:
+            continue
+        row_scores = data[start:end]
+        row_columns = indices[start:end]
+        if end - start > n:
+            keep = np.argpartition(-row_scores, n)[:n]
+            row_scores = row_scores[keep]
+            row_columns = row_columns[keep]
+        order = np.argsort(-row_scores, kind='stable')
+        yield row, row_columns[order], row_scores[order]
+
+
+def build_item_neighbors(n=DEFAULT_NEIGHBORS):
+    started = time.perf_counter()
+    matrix, _, items = build_interaction_matrix()
+    similarity = item_similarity(matrix)
+
+    computed_at = datetime.utcnow()
+    rows = []
+    for row, columns, scores in top_neighbors(similarity, n):
+        content_id = int(items[row])
+        for rank, (column, score) in enumerate(zip(columns, scores), start=1):
+            rows.append({
+                'content_id': content_id,
+                'neighbor_id': int(items[column]),
+                'score': float(score),
+                'rank': rank,
+                'computed_at': computed_at
+            })
+
+    # Swap the whole table in one transaction so readers never see a partial build
+    table = ContentSimilarity.__table__
+    db.session.execute(table.delete())
+    for i in range(0, len(rows), INSERT_CHUNK_SIZE):
+        db.session.execute(table.insert(), rows[i:i + INSERT_CHUNK_SIZE])
+    db.session.commit()
+
+    return {
+        'users': matrix.shape[0],
+        'titles': matrix.shape[1],
+        'interactions': int(matrix.nnz),
+        'pairs': len(rows),
+        'seconds': round(time.perf_counter() - started, 3)
+    }
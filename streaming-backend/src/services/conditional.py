@@ -0,0 +1,39 @@
+import hashlib
+from datetime import datetime, date
+from flask import request, current_app
+from werkzeug.http import is_resource_modified
+
+# Weak validators for catalog reads. They are derived from cheap aggregates
+# (max timestamp, row count, counter sums) plus the request's view and query args, so a
+# client that already holds the payload gets a 304 before the list query and
+# serialization run. Weak because view counters in the body are allowed to lag.
+
+
+def make_etag(*parts):
+    args = sorted((name, value) for name, values in request.args.lists() for value in values)
+    view_args = sorted((request.view_args or {}).items())
+    raw = repr((request.endpoint, view_args, args) + tuple(
+        part.isoformat() if isinstance(part, (datetime, date)) else part for part in parts
+    ))
+    return hashlib.blake2b(raw.encode(), digest_size=12).hexdigest()
+
+
+def validators(last_modified, *parts):
+    # (etag, last_modified) for a result set whose newest change was at `last_modified`
+    return make_etag(last_modified, *parts), last_modified
+
+
+def not_modified(etag, last_modified=None):
+    return not is_resource_modified(request.environ, etag=etag, last_modified=last_modified)
+
+
+def not_modified_response(etag, last_modified=None):
+    response = current_app.response_class(status=304)
+    return with_validators(response, etag, last_modified)
+
+
+def with_validators(response, etag, last_modified=None):
+    response.set_etag(etag, weak=True)
+    if last_modified:
+        response.last_modified = last_modified
+    return response
@@ -0,0 +1,66 @@
+from sqlalchemy import func, select
+from src.models.content import Content, Episode
+from src.models.interactions import WatchHistory
+
+# "Continue watching" row. One windowed query over the user's unfinished watch
+# history keeps the most recently watched row per title (for a series, the
+# episode they were last part-way through), newest first; it walks the
+# (user_id, last_watched) index instead of paging the whole history. Content
+# cards and episodes for the row are then loaded with one IN query each.
+
+DEFAULT_LIMIT = 20
+MAX_LIMIT = 50
+
+
+def latest_unfinished(user_id, limit):
+    ranked = select(
+        WatchHistory.id,
+        func.row_number().over(
+            partition_by=WatchHistory.content_id,
+            order_by=(WatchHistory.last_watched.desc(), WatchHistory.id.desc())
+        ).label('position')
+    ).where(
+        WatchHistory.user_id == user_id,
+        WatchHistory.completed == False,
+        WatchHistory.watch_time > 0
+    ).subquery()
+
+    return WatchHistory.query.join(ranked, WatchHistory.id == ranked.c.id).join(
+        Content, Content.id == WatchHistory.content_id
+    ).filter(
+        ranked.c.position == 1,
+        Content.is_active == True
+    ).order_by(WatchHistory.last_watched.desc(), WatchHistory.id.desc()).limit(limit).all()
+
+
+def continue_watching(user_id, limit=DEFAULT_LIMIT, include_content=True):
+    """Serialized continue-watching items; without `include_content` they carry content_id only."""
+    history = latest_unfinished(user_id, limit)
+
+    cards = {}
+    if include_content and history:
+        for content in Content.query.filter(Content.id.in_({item.content_id for item in history})):
+            cards[content.id] = content.to_dict()
+
+    episode_ids = {item.episode_id for item in history if item.episode_id}
+    episodes = {
+        episode.id: episode.to_dict()
+        for episode in Episode.query.filter(Episode.id.in_(episode_ids))
+    } if episode_ids else {}
+
+    items = [
+        {
+            'id': item.id,
+            'content_id': item.content_id,
+            'episode_id': item.episode_id,
+            'watch_time': item.watch_time,
+            'total_time': item.total_time,
+            'progress_percentage': item.progress_percentage,
+            'last_watched': item.last_watched.isoformat() if item.last_watched else None,
+            'episode': episodes.get(item.episode_id)
+        } for item in history
+    ]
+    if include_content:
+        for item in items:
+            item['content'] = cards.get(item['content_id'])
+    return items
@@ -0,0 +1,124 @@
+import threading
+import time
+from datetime import datetime, timedelta
+from sqlalchemy import case, func, desc
+from src.models.user import User, db
+from src.models.content import Content, Episode, Genre
+from src.models.interactions import Comment
+from src.services import loading
+from src.services.background import PeriodicWorker
+
+# Materialized admin dashboard. A snapshot of every dashboard figure is
+# computed in a handful of grouped queries and served from memory with its
+# `as_of` time. A background thread recomputes it every
+# DASHBOARD_STATS_REFRESH_INTERVAL seconds while the dashboard is being
+# watched; an idle dashboard costs nothing.
+
+DEFAULT_REFRESH_INTERVAL = 60  # seconds
+IDLE_AFTER = 5  # refresh intervals without a request
+
+
+def compute_snapshot():
+    now = datetime.utcnow()
+    thirty_days_ago = now - timedelta(days=30)
+    seven_days_ago = now - timedelta(days=7)
+
+    total_users, active_users, new_users = db.session.query(
+        func.count(User.id),
+        func.sum(case((User.last_login >= thirty_days_ago, 1), else_=0)),
+        func.sum(case((User.created_at >= seven_days_ago, 1), else_=0))
+    ).one()
+
+    # One pass over content gives per-type active counts and lifetime views
+    content_by_type = {}
+    total_views = 0
+    for content_type, is_active, count, views in db.session.query(
+        Content.content_type, Content.is_active, func.count(Content.id), func.sum(Content.view_count)
+    ).group_by(Content.content_type, Content.is_active):
+        total_views += views or 0
+        if is_active:
+            content_by_type[content_type] = content_by_type.get(content_type, 0) + count
+
+    content_by_genre = db.session.query(
+        Genre.name,
+        func.count(Content.id)
+    ).join(Content.genres).filter(Content.is_active == True).group_by(Genre.name).all()
+
+    total_episodes = db.session.query(func.count(Episode.id)).filter(Episode.is_active == True).scalar()
+
+    top_content = Content.query.filter_by(is_active=True).order_by(desc(Content.view_count)).limit(5).all()
+    recent_comments = Comment.query.filter_by(is_active=True).options(
+        *loading.comment_items()
+    ).order_by(desc(Comment.created_at)).limit(5).all()
+
+    return {
+        'as_of': now.isoformat(),
+        'stats': {
+            'total_users': total_users or 0,
+            'active_users': active_users or 0,
+            'new_users_week': new_users or 0,
+            'total_content': sum(content_by_type.values()),
+            'total_movies': content_by_type.get('movie', 0),
+            'total_series': content_by_type.get('series', 0),
+            'total_episodes': total_episodes or 0,
+            'total_views': total_views
+        },
+        'top_content': [content.to_dict() for content in top_content],
+        'recent_comments': [comment.to_dict() for comment in recent_comments],
+        'content_by_type': [
+            {'type': content_type, 'count': count} for content_type, count in sorted(content_by_type.items())
+        ],
+        'content_by_genre': [
+            {'genre': name, 'count': count} for name, count in content_by_genre
+        ]
+    }
+
+
+class DashboardStats(PeriodicWorker):
+    thread_name = 'dashboard-stats-refresh'
+    run_at_exit = False
+
+    def __init__(self):
+        super().__init__(DEFAULT_REFRESH_INTERVAL)
+        self._lock = threading.Lock()
+        self._snapshot = None
+        self._refreshed_at = None
+        self._last_request = None
+
+    def init_app(self, app):
+        super().init_app(app)
+        self.interval = app.config.get('DASHBOARD_STATS_REFRESH_INTERVAL', DEFAULT_REFRESH_INTERVAL)
+        app.extensions['dashboard_stats'] = self
+
+    def refresh(self):
+        with self.app.app_context():
+            snapshot = compute_snapshot()
+        with self._lock:
+            self._snapshot = snapshot
+            self._refreshed_at = time.monotonic()
+        return snapshot
+
+    def run_once(self):
+        # Only keep refreshing while someone is looking at the dashboard
+        if self._last_request is None or self.synchronous:
+            return
+        if time.monotonic() - self._last_request > self.interval * IDLE_AFTER:
+            return
+        self.refresh()
+
+    def snapshot(self, force=False):
+        self._last_request = time.monotonic()
+        with self._lock:
+            snapshot, refreshed_at = self._snapshot, self._refreshed_at
+
+        stale = refreshed_at is None or time.monotonic() - refreshed_at > max(self.interval, 0)
+        if snapshot is None or force or (stale and self.synchronous):
+            return self.refresh()
+
+        self.ensure_running()
+        if stale:
+            self.wake()
+        return snapshot
+
+
+dashboard_stats = DashboardStats()
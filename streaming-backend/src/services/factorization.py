@@ -0,0 +1,280 @@
+import os
+import resource
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+import numpy as np
+from scipy import sparse
+from src.models.user import db
+from src.models.interactions import Rating, WatchHistory, Favorite
+from src.models.recommendation import UserRecommendation
+from src.services.collaborative import build_interaction_matrix
+
+# Implicit-feedback ALS (Hu, Koren & Volinsky) over the same user x content
+# matrix as the item-to-item job. Each half-step solves one small k x k system
+# per user (or title) using only that row's non-zeros; rows are split into
+# shards solved in a process pool. The model is saved as compact float32
+# arrays, and a per-user top-N table is written for get_recommendations.
+#
+# Incremental runs fold in users who interacted since the last training: their
+# factors are re-solved against the saved item factors and only their rows of
+# the top-N table are rewritten. New titles appear after the next full run.
+
+DEFAULT_FACTORS = 32
+DEFAULT_ITERATIONS = 10
+DEFAULT_REGULARIZATION = 0.1
+DEFAULT_ALPHA = 40.0
+DEFAULT_TOP_N = 50
+INSERT_CHUNK_SIZE = 5000
+SCORE_BLOCK_BYTES = 64 * 1024 * 1024
+
+
+def default_model_path(app):
+    return app.config.get('RECOMMENDER_MODEL_PATH') or os.path.join(app.instance_path, 'recommender.npz')
+
+
+# Pool workers (top-level so they pickle)
+
+def _solve_rows(indptr, indices, data, fixed, regularization, alpha):
+    # One ALS half-step for a shard of rows against the fixed factor matrix
+    k = fixed.shape[1]
+    gram = fixed.T @ fixed + regularization * np.eye(k, dtype=np.float64)
+    solved = np.zeros((len(indptr) - 1, k), dtype=np.float32)
+    for row in range(len(indptr) - 1):
+        start, end = indptr[row], indptr[row + 1]
+        if start == end:
+            continue
+        factors = fixed[indices[start:end]].astype(np.float64)
+        confidence = alpha * data[start:end].astype(np.float64)  # c - 1
+        a = gram + (factors.T * confidence) @ factors
+        b = factors.T @ (1.0 + confidence)
+        solved[row] = np.linalg.solve(a, b)
+    return solved
+
+
+def _top_n_rows(user_factors, item_factors, seen_indptr, seen_indices, n):
+    # Top-n unseen items for a shard of users, scored in memory-bounded blocks
+    n_items = item_factors.shape[0]
+    n = min(n, n_items)
+    block = max(1, SCORE_BLOCK_BYTES // (4 * max(1, n_items)))
+    top_items = np.zeros((user_factors.shape[0], n), dtype=np.int64)
+    top_scores = np.zeros((user_factors.shape[0], n), dtype=np.float32)
+    counts = np.zeros(user_factors.shape[0], dtype=np.int64)
+
+    for first in range(0, user_factors.shape[0], block):
+        scores = user_factors[first:first + block] @ item_factors.T
+        for offset in range(scores.shape[0]):
+            row = first + offset
+            seen = seen_indices[seen_indptr[row]:seen_indptr[row + 1]]
+            scores[offset, seen] = -np.inf
+        if n < n_items:
+            candidates = np.argpartition(-scores, n - 1, axis=1)[:, :n]
+        else:
+            candidates = np.tile(np.arange(n_items), (scores.shape[0], 1))
+        candidate_scores = np.take_along_axis(scores, candidates, axis=1)
+        order = np.argsort(-candidate_scores, axis=1, kind='stable')
+        top_items[first:first + block] = np.take_along_axis(candidates, order, axis=1)
+        top_scores[first:first + block] = np.take_along_axis(candidate_scores, order, axis=1)
+        counts[first:first + block] = np.isfinite(top_scores[first:first + block]).sum(axis=1)
+    return top_items, top_scores, counts
+
+
+class ShardedRunner:
+    def __init__(self, workers):
+        self.workers = workers
+        self.executor = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+
+    def shards(self, n_rows):
+        count = max(1, self.workers * 4) if self.executor else 1
+        bounds = np.linspace(0, n_rows, count + 1, dtype=np.int64)
+        return [(int(a), int(b)) for a, b in zip(bounds[:-1], bounds[1:]) if b > a]
+
+    def map(self, fn, argument_sets):
+        if self.executor is None:
+            return [fn(*args) for args in argument_sets]
+        return list(self.executor.map(fn, *zip(*argument_sets)))
+
+    def solve(self, matrix, fixed, regularization, alpha):
+        argument_sets = []
+        for start, end in self.shards(matrix.shape[0]):
+            shard = matrix[start:end]
+            argument_sets.append((shard.indptr, shard.indices, shard.data, fixed, regularization, alpha))
+        if not argument_sets:
+            return np.zeros((0, fixed.shape[1]), dtype=np.float32)
+        return np.vstack(self.map(_solve_rows, argument_sets))
+
+    def top_n(self, user_factors, item_factors, seen, n):
+        argument_sets = []
+        for start, end in self.shards(user_factors.shape[0]):
+            shard = seen[start:end]
+            argument_sets.append((user_factors[start:end], item_factors, shard.indptr, shard.indices, n))
+        results = self.map(_top_n_rows, argument_sets)
+        return [part for result in results for part in zip(*result)]
+
+    def close(self):
+        if self.executor is not None:
+            self.executor.shutdown()
+
+
+def _peak_memory_mb():
+    # ru_maxrss is in KiB on Linux
+    own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    return round(own / 1024.0, 1), round(children / 1024.0, 1)
+
+
+def _write_top_n(user_ids, item_ids, results, replace_all):
+    computed_at = datetime.utcnow()
+    rows = []
+    for user_id, (items, scores, count) in zip(user_ids, results):
+        for rank in range(int(count)):
+            rows.append({
+                'user_id': int(user_id),
+                'content_id': int(item_ids[items[rank]]),
+                'score': float(scores[rank]),
+                'rank': rank + 1,
+                'computed_at': computed_at
+            })
+
+    table = UserRecommendation.__table__
+    if replace_all:
+        db.session.execute(table.delete())
+    else:
+        ids = [int(user_id) for user_id in user_ids]
+        for i in range(0, len(ids), INSERT_CHUNK_SIZE):
+            db.session.execute(table.delete().where(table.c.user_id.in_(ids[i:i + INSERT_CHUNK_SIZE])))
+    for i in range(0, len(rows), INSERT_CHUNK_SIZE):
+        db.session.execute(table.insert(), rows[i:i + INSERT_CHUNK_SIZE])
+    db.session.commit()
+    return len(rows)
+
+
+def train(model_path, factors=DEFAULT_FACTORS, iterations=DEFAULT_ITERATIONS,
+          regularization=DEFAULT_REGULARIZATION, alpha=DEFAULT_ALPHA,
+          top_n=DEFAULT_TOP_N, workers=None):
+    workers = workers or os.cpu_count() or 1
+    report = {'mode': 'full', 'workers': workers}
+    started = time.perf_counter()
+    trained_at = datetime.utcnow()
+
+    matrix, user_ids, item_ids = build_interaction_matrix()
+    report['load_seconds'] = round(time.perf_counter() - started, 3)
+    report['users'], report['titles'] = matrix.shape
+    report['interactions'] = int(matrix.nnz)
+    if matrix.nnz == 0:
+        report['recommendations'] = _write_top_n([], item_ids, [], replace_all=True)
+        return report
+
+    transposed = matrix.T.tocsr()
+    rng = np.random.default_rng(42)
+    user_factors = (rng.standard_normal((matrix.shape[0], factors)) * 0.01).astype(np.float32)
+    item_factors = (rng.standard_normal((matrix.shape[1], factors)) * 0.01).astype(np.float32)
+
+    runner = ShardedRunner(workers)
+    try:
+        phase = time.perf_counter()
+        for _ in range(iterations):
+            user_factors = runner.solve(matrix, item_factors, regularization, alpha)
+            item_factors = runner.solve(transposed, user_factors, regularization, alpha)
+        report['train_seconds'] = round(time.perf_counter() - phase, 3)
+
+        phase = time.perf_counter()
+        results = runner.top_n(user_factors, item_factors, matrix, top_n)
+        report['recommendations'] = _write_top_n(user_ids, item_ids, results, replace_all=True)
+        report['top_n_seconds'] = round(time.perf_counter() - phase, 3)
+    finally:
+        runner.close()
+
+    os.makedirs(os.path.dirname(model_path) or '.', exist_ok=True)
+    np.savez(
+        model_path,
+        user_ids=user_ids, user_factors=user_factors,
+        item_ids=item_ids, item_factors=item_factors,
+        trained_at=np.array(trained_at.isoformat()),
+        params=np.array([factors, regularization, alpha], dtype=np.float64)
+    )
+
+    report['factor_bytes'] = int(user_factors.nbytes + item_factors.nbytes)
+    report['peak_rss_mb'], report['peak_child_rss_mb'] = _peak_memory_mb()
+    report['total_seconds'] = round(time.perf_counter() - started, 3)
+    return report
+
+
+def _users_active_since(since):
+    users = set()
+    for column, user_column in (
+        (WatchHistory.last_watched, WatchHistory.user_id),
+        (Favorite.created_at, Favorite.user_id),
+        (Rating.updated_at, Rating.user_id)
+    ):
+        users.update(row[0] for row in db.session.query(user_column).filter(column >= since).distinct())
+    return users
+
+
+def train_incremental(model_path, top_n=DEFAULT_TOP_N, workers=None):
+    if not os.path.exists(model_path):
+        return train(model_path, top_n=top_n, workers=workers)
+
+    workers = workers or os.cpu_count() or 1
+    started = time.perf_counter()
+    trained_at = datetime.utcnow()
+
+    with np.load(model_path) as model:
+        saved = {name: model[name] for name in model.files}
+    since = datetime.fromisoformat(str(saved['trained_at']))
+    _, regularization, alpha = saved['params']
+    item_ids, item_factors = saved['item_ids'], saved['item_factors']
+    user_ids, user_factors = saved['user_ids'], saved['user_factors']
+
+    report = {'mode': 'incremental', 'workers': workers, 'since': since.isoformat()}
+    changed = _users_active_since(since)
+    report['changed_users'] = len(changed)
+    if not changed:
+        report['total_seconds'] = round(time.perf_counter() - started, 3)
+        return report
+
+    # Rows of the changed users over the titles the model knows about
+    matrix, matrix_users, matrix_items = build_interaction_matrix()
+    user_rows = np.flatnonzero(np.isin(matrix_users, np.fromiter(changed, dtype=np.int64)))
+    known = np.isin(matrix_items, item_ids)
+    column_map = np.searchsorted(item_ids, matrix_items[known])
+    subset = matrix[user_rows][:, np.flatnonzero(known)].tocoo()
+    folded = sparse.csr_matrix(
+        (subset.data, (subset.row, column_map[subset.col])), shape=(len(user_rows), len(item_ids))
+    )
+    folded_user_ids = matrix_users[user_rows]
+
+    runner = ShardedRunner(workers)
+    try:
+        phase = time.perf_counter()
+        new_factors = runner.solve(folded, item_factors, float(regularization), float(alpha))
+        report['train_seconds'] = round(time.perf_counter() - phase, 3)
+
+        phase = time.perf_counter()
+        results = runner.top_n(new_factors, item_factors, folded, top_n)
+        report['recommendations'] = _write_top_n(folded_user_ids, item_ids, results, replace_all=False)
+        report['top_n_seconds'] = round(time.perf_counter() - phase, 3)
+    finally:
+        runner.close()
+
+    # Merge folded-in users back into the saved model
+    positions = {int(user_id): i for i, user_id in enumerate(user_ids)}
+    additions_ids, additions = [], []
+    for user_id, factors in zip(folded_user_ids, new_factors):
+        if int(user_id) in positions:
+            user_factors[positions[int(user_id)]] = factors
+        else:
+            additions_ids.append(user_id)
+            additions.append(factors)
+    if additions:
+        user_ids = np.concatenate([user_ids, np.array(additions_ids, dtype=user_ids.dtype)])
+        user_factors = np.vstack([user_factors, np.array(additions, dtype=np.float32)])
+        order = np.argsort(user_ids)
+        user_ids, user_factors = user_ids[order], user_factors[order]
+    saved.update(user_ids=user_ids, user_factors=user_factors, trained_at=np.array(trained_at.isoformat()))
+    np.savez(model_path, **saved)
+
+    report['factor_bytes'] = int(user_factors.nbytes + item_factors.nbytes)
+    report['peak_rss_mb'], report['peak_child_rss_mb'] = _peak_memory_mb()
+    report['total_seconds'] = round(time.perf_counter() - started, 3)
+    return report
@@ -0,0 +1,135 @@
+from datetime import datetime
+from sqlalchemy import select, union
+from src.models.user import User, db
+from src.models.content import Content, Episode
+from src.models.interactions import Favorite, WatchHistory, Notification, NotificationFanout
+from src.services.background import PeriodicWorker
+from src.services.notifications import add_unread
+from src.services.notification_stream import notification_stream
+
+# New-episode notification fan-out. Publishing an episode only records a
+# NotificationFanout job in the same transaction; this worker then notifies
+# everyone who favorited or has watched the series. Followers are selected in
+# user_id order, NOTIFICATION_FANOUT_CHUNK_SIZE at a time, and each chunk's
+# notifications (and unread counters) are written in the same transaction that
+# advances the job's checkpoint, so a crash or a second worker never notifies
+# anyone twice (the unique (user_id, episode_id) index backs this up). Jobs run
+# every NOTIFICATION_FANOUT_INTERVAL seconds or as soon as one is queued; an
+# interval of 0 runs them inline, and `flask fanout-notifications` drains the
+# queue.
+
+DEFAULT_INTERVAL = 30  # seconds
+DEFAULT_CHUNK_SIZE = 1000
+
+
+def _followers(series_id, after_user_id, limit):
+    followers = union(
+        select(Favorite.user_id.label('user_id')).where(Favorite.content_id == series_id),
+        select(WatchHistory.user_id.label('user_id')).where(WatchHistory.content_id == series_id)
+    ).subquery()
+    return db.session.scalars(
+        select(followers.c.user_id).join(User, User.id == followers.c.user_id).where(
+            followers.c.user_id > after_user_id,
+            User.is_active == True
+        ).order_by(followers.c.user_id).limit(limit)
+    ).all()
+
+
+def _message(episode, series):
+    return {
+        'title': f'New episode of {series.title}',
+        'message': f'S{episode.season_number}E{episode.episode_number}: {episode.title}',
+        'notification_type': 'new_episode',
+        'content_id': series.id,
+        'episode_id': episode.id
+    }
+
+
+def run_fanout(job, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Notify the remaining followers for one job; returns notifications written."""
+    episode = db.session.get(Episode, job.episode_id)
+    series = db.session.get(Content, job.series_id)
+    table = NotificationFanout.__table__
+    written = 0
+
+    if episode is not None and series is not None and episode.is_active and series.is_active:
+        template = _message(episode, series)
+        last_user_id = job.last_user_id
+        while True:
+            user_ids = _followers(job.series_id, last_user_id, chunk_size)
+            if not user_ids:
+                break
+
+            # Claim the chunk first by moving the checkpoint from where we read
+            # it. An overlapping run matches no row (on Postgres it waits for
+            # ours to commit), so it drops the chunk before inserting anything.
+            moved = db.session.execute(
+                table.update().where(
+                    table.c.episode_id == job.episode_id,
+                    table.c.last_user_id == last_user_id
+                ).values(last_user_id=user_ids[-1], sent_count=table.c.sent_count + len(user_ids))
+            ).rowcount
+            if not moved:
+                db.session.rollback()
+                return written
+
+            now = datetime.utcnow()
+            db.session.execute(Notification.__table__.insert(), [
+                dict(template, user_id=user_id, is_read=False, created_at=now) for user_id in user_ids
+            ])
+            add_unread(user_ids)
+            db.session.commit()
+            notification_stream.publish(user_ids)
+
+            written += len(user_ids)
+            last_user_id = user_ids[-1]
+            if len(user_ids) < chunk_size:
+                break
+
+    db.session.execute(
+        table.update().where(table.c.episode_id == job.episode_id).values(
+            status='done', completed_at=datetime.utcnow()
+        )
+    )
+    db.session.commit()
+    return written
+
+
+def run_pending(chunk_size=DEFAULT_CHUNK_SIZE):
+    jobs = NotificationFanout.query.filter_by(status='pending').order_by(NotificationFanout.created_at).all()
+    return sum(run_fanout(job, chunk_size) for job in jobs)
+
+
+class NotificationFanoutWorker(PeriodicWorker):
+    thread_name = 'notification-fanout'
+    run_at_exit = False  # jobs are durable; another process resumes them
+
+    def __init__(self):
+        super().__init__(DEFAULT_INTERVAL)
+        self.chunk_size = DEFAULT_CHUNK_SIZE
+
+    def init_app(self, app):
+        super().init_app(app)
+        self.interval = app.config.get('NOTIFICATION_FANOUT_INTERVAL', DEFAULT_INTERVAL)
+        self.chunk_size = app.config.get('NOTIFICATION_FANOUT_CHUNK_SIZE', DEFAULT_CHUNK_SIZE)
+        app.extensions['notification_fanout'] = self
+
+    def enqueue(self, episode):
+        # Called inside the publishing transaction; the caller commits
+        if db.session.get(NotificationFanout, episode.id) is None:
+            db.session.add(NotificationFanout(episode_id=episode.id, series_id=episode.series_id))
+
+    def published(self):
+        # After the publishing transaction commits
+        if self.synchronous:
+            self.run_once()
+        else:
+            self.ensure_running()
+            self.wake()
+
+    def run_once(self):
+        with self.app.app_context():
+            return run_pending(self.chunk_size)
+
+
+notification_fanout = NotificationFanoutWorker()
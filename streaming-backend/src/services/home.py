@@ -0,0 +1,181 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FuturesTimeout
+from sqlalchemy import select
+from src.models.user import db
+from src.models.content import Content, Genre
+from src.services.continue_watching import continue_watching
+from src.services.recommendations import recommend
+
+# GET /api/home: every home-screen row in one response. The rows don't depend
+# on each other, so each request runs them on its own small thread pool (at most
+# HOME_ROW_WORKERS threads), each row inside its own app context and therefore
+# its own session and connection. A per-request pool means a burst of home
+# requests can't queue behind one another's rows. Rows only pick
+# content ids; the cards are then loaded in one query and each title is
+# serialized once into a shared `content` map however many rows list it. Each
+# row gets HOME_ROW_TIMEOUT seconds from when it starts running; a row that is
+# late or fails is left out (and named in `omitted`) instead of failing the
+# page, and a late row's thread is left to finish on its own.
+# HOME_ROW_WORKERS=0 builds the rows inline on the request thread.
+
+DEFAULT_WORKERS = 6  # one per row
+DEFAULT_TIMEOUT = 2.0  # seconds
+DEFAULT_ROW_LIMIT = 20
+
+ROW_TITLES = {
+    'featured': 'Featured',
+    'continue_watching': 'Continue Watching',
+    'recommendations': 'Recommended for You',
+    'popular': 'Popular',
+    'recently_added': 'Recently Added'
+}
+
+
+def _content_ids(*criteria, order_by, limit):
+    return db.session.scalars(
+        select(Content.id).where(Content.is_active == True, *criteria).order_by(*order_by).limit(limit)
+    ).all()
+
+
+def featured_row(user_id, limit):
+    return {'content_ids': _content_ids(
+        Content.is_featured == True, order_by=(Content.created_at.desc(), Content.id.desc()), limit=limit
+    )}
+
+
+def popular_row(user_id, limit):
+    return {'content_ids': _content_ids(order_by=(Content.view_count.desc(), Content.id.desc()), limit=limit)}
+
+
+def recently_added_row(user_id, limit):
+    return {'content_ids': _content_ids(order_by=(Content.created_at.desc(), Content.id.desc()), limit=limit)}
+
+
+def continue_watching_row(user_id, limit):
+    items = continue_watching(user_id, limit, include_content=False)
+    return {'content_ids': [item['content_id'] for item in items], 'items': items}
+
+
+def recommendations_row(user_id, limit):
+    return {'content_ids': [content.id for content in recommend(user_id, limit=limit)]}
+
+
+def genres_row(user_id, limit):
+    return {'genres': [genre.to_dict() for genre in Genre.query.order_by(Genre.name)]}
+
+
+PUBLIC_ROWS = (
+    ('featured', featured_row),
+    ('popular', popular_row),
+    ('recently_added', recently_added_row),
+    ('genres', genres_row)
+)
+PERSONAL_ROWS = (
+    ('continue_watching', continue_watching_row),
+    ('recommendations', recommendations_row)
+)
+
+
+class RowStart:
+    # Set by a row's thread when it starts running
+    def __init__(self):
+        self.event = threading.Event()
+        self.at = None
+
+    def set(self):
+        self.at = time.monotonic()
+        self.event.set()
+
+    def wait(self, timeout):
+        return self.event.wait(timeout)
+
+
+class HomeAssembler:
+    def __init__(self):
+        self.app = None
+        self.workers = DEFAULT_WORKERS
+        self.timeout = DEFAULT_TIMEOUT
+        self.row_limit = DEFAULT_ROW_LIMIT
+
+    def init_app(self, app):
+        self.app = app
+        self.workers = app.config.get('HOME_ROW_WORKERS', DEFAULT_WORKERS)
+        self.timeout = app.config.get('HOME_ROW_TIMEOUT', DEFAULT_TIMEOUT)
+        self.row_limit = app.config.get('HOME_ROW_LIMIT', DEFAULT_ROW_LIMIT)
+        app.extensions['home'] = self
+
+    def _run_row(self, build, user_id, started):
+        started.set()
+        with self.app.app_context():
+            return build(user_id, self.row_limit)
+
+    def build_rows(self, user_id):
+        """Run the row builders; returns ({key: row}, [omitted keys])."""
+        builders = PUBLIC_ROWS + (PERSONAL_ROWS if user_id is not None else ())
+        rows, omitted = {}, []
+
+        if not self.workers or self.workers <= 0:
+            for key, build in builders:
+                try:
+                    rows[key] = build(user_id, self.row_limit)
+                except Exception:
+                    self.app.logger.exception('Home row %s failed', key)
+                    db.session.rollback()
+                    omitted.append(key)
+            return rows, omitted
+
+        executor = ThreadPoolExecutor(max_workers=min(self.workers, len(builders)), thread_name_prefix='home-row')
+        futures = []
+        for key, build in builders:
+            started = RowStart()
+            futures.append((key, started, executor.submit(self._run_row, build, user_id, started)))
+        try:
+            for key, started, future in futures:
+                try:
+                    # The deadline runs from when the row starts, not from when it was queued;
+                    # a row still queued after a full timeout is given up on
+                    if not started.wait(self.timeout):
+                        raise FuturesTimeout()
+                    rows[key] = future.result(timeout=max(0, self.timeout - (time.monotonic() - started.at)))
+                except FuturesTimeout:
+                    future.cancel()
+                    self.app.logger.warning('Home row %s timed out after %.1fs', key, self.timeout)
+                    omitted.append(key)
+                except Exception:
+                    self.app.logger.exception('Home row %s failed', key)
+                    omitted.append(key)
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+        return rows, omitted
+
+    def assemble(self, user_id=None):
+        rows, omitted = self.build_rows(user_id)
+
+        wanted = {content_id for row in rows.values() for content_id in row.get('content_ids', ())}
+        cards = {
+            content.id: content.to_dict()
+            for content in Content.query.filter(Content.id.in_(wanted))
+        } if wanted else {}
+
+        page_rows = []
+        for key, title in ROW_TITLES.items():
+            row = rows.get(key)
+            if row is None:
+                continue
+            # Drop ids whose title disappeared between the row query and the card load
+            page_row = dict(row, key=key, title=title)
+            page_row['content_ids'] = [content_id for content_id in row['content_ids'] if content_id in cards]
+            if 'items' in row:
+                page_row['items'] = [item for item in row['items'] if item['content_id'] in cards]
+            page_rows.append(page_row)
+
+        return {
+            'rows': page_rows,
+            'genres': rows['genres']['genres'] if 'genres' in rows else None,
+            'content': {str(content_id): card for content_id, card in cards.items()},
+            'omitted': omitted
+        }
+
+
+home_assembler = HomeAssembler()
@@ -0,0 +1,30 @@
+from sqlalchemy.orm import joinedload
+from src.models.interactions import Rating, Comment, WatchHistory, Favorite, Notification
+
+# Eager-loading options per serializer, so a list endpoint issues a fixed number
+# of queries however many rows it returns. Content.genres is loaded with
+# `selectin` by default, which also applies when Content is itself eager-loaded
+# below, so nested content cards cost one extra query per page, not per row.
+#
+# Options are built on demand because backref attributes such as Rating.user
+# only exist once the mappers have been configured.
+
+
+def watch_history_items():
+    return (joinedload(WatchHistory.content),)
+
+
+def favorite_items():
+    return (joinedload(Favorite.content),)
+
+
+def notification_items():
+    return (joinedload(Notification.content),)
+
+
+def rating_items():
+    return (joinedload(Rating.user),)
+
+
+def comment_items():
+    return (joinedload(Comment.user),)
@@ -0,0 +1,268 @@
+import json
+import random
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+from sqlalchemy import func, or_
+from src.models.user import db
+from src.models.interactions import Notification
+from src.services import loading
+from src.services.background import PeriodicWorker
+
+# Server-Sent Events for notifications. Each open stream subscribes to an
+# in-process doorbell keyed by user id; when it rings, the stream reads that
+# user's notifications past the last event id it sent and pushes them. Event
+# ids are the highest notification id sent so far, so a reconnecting
+# EventSource resumes from Last-Event-ID with nothing lost or repeated.
+#
+# Notifications written by different workers can commit out of id order, so a
+# lower id may become visible after a higher one was sent. Reads therefore also
+# re-scan the last OVERLAP_WINDOW seconds of notifications and skip ids already
+# sent; the database backend's poll does the same. Idle streams hold no database
+# connection, only a thread parked on an Event that wakes for a heartbeat
+# comment every NOTIFICATION_STREAM_HEARTBEAT seconds.
+#
+# Doorbells are rung through a pluggable backend:
+#   'local'     rings subscribers in this process only (single-process deployments)
+#   'database'  also polls the notification table once per process every
+#               NOTIFICATION_STREAM_POLL_INTERVAL seconds, so notifications written
+#               by any worker reach streams held by any other worker
+# Anything with `publish(user_ids)` and `start()` can be installed with
+# `notification_stream.set_backend()`, e.g. a Redis pub/sub bridge.
+#
+# Streams end after NOTIFICATION_STREAM_MAX_DURATION seconds (the browser
+# reconnects transparently) and at most NOTIFICATION_STREAM_MAX_CONNECTIONS are
+# open per process. Past the cap a new stream gets only a `retry:` frame and is
+# closed, so EventSource tries again a few seconds later (a 503 would make it
+# give up for good). gunicorn runs gevent workers (see gunicorn.conf.py), where
+# an open stream parks a greenlet. Under GUNICORN_WORKER_CLASS=gthread each
+# stream holds a thread for as long as it is open, so the cap is clamped below
+# GUNICORN_THREADS and a quarter of the threads stay free for ordinary requests.
+
+DEFAULT_HEARTBEAT = 15  # seconds
+DEFAULT_POLL_INTERVAL = 2  # seconds
+DEFAULT_MAX_DURATION = 300  # seconds
+DEFAULT_MAX_CONNECTIONS = 32
+REPLAY_LIMIT = 100  # notifications sent per read
+RECONNECT_DELAY = 3000  # ms, sent as the SSE `retry:` hint
+BUSY_RECONNECT_DELAY = (5000, 15000)  # ms, spread out so refused streams don't retry together
+OVERLAP_WINDOW = 30  # seconds of recent notifications re-read for late commits
+
+
+def _overlap_cutoff():
+    return datetime.utcnow() - timedelta(seconds=OVERLAP_WINDOW)
+
+
+def _prune(seen, cutoff):
+    # Ids older than the overlap window can't be read again
+    for notification_id in [nid for nid, created_at in seen.items() if created_at and created_at < cutoff]:
+        del seen[notification_id]
+
+
+class StreamsFull(Exception):
+    pass
+
+
+class Subscription:
+    def __init__(self, user_id):
+        self.user_id = user_id
+        self.bell = threading.Event()
+
+    def wait(self, timeout):
+        rang = self.bell.wait(timeout)
+        self.bell.clear()
+        return rang
+
+
+class LocalBackend:
+    def __init__(self, stream):
+        self.stream = stream
+
+    def publish(self, user_ids):
+        self.stream.ring(user_ids)
+
+    def start(self):
+        pass
+
+
+class DatabaseBackend(PeriodicWorker):
+    thread_name = 'notification-stream-poll'
+    run_at_exit = False
+
+    def __init__(self, stream, interval):
+        super().__init__(interval)
+        self.stream = stream
+        self.app = stream.app
+        self._high_water = None
+        self._seen = {}  # notification id -> created_at, within the overlap window
+
+    def publish(self, user_ids):
+        # Same-process streams hear about it immediately; others on their next poll
+        self.stream.ring(user_ids)
+
+    def start(self):
+        if not self.synchronous:
+            self.ensure_running()
+
+    def run_once(self):
+        users = self.stream.subscribed_users()
+        if not users:
+            self._high_water = None  # nobody listening; start fresh next time
+            self._seen = {}
+            return
+
+        cutoff = _overlap_cutoff()
+        with self.app.app_context():
+            if self._high_water is None:
+                self._high_water = db.session.query(func.max(Notification.id)).scalar() or 0
+                return
+            rows = db.session.query(Notification.user_id, Notification.id, Notification.created_at).filter(
+                Notification.user_id.in_(users),
+                or_(Notification.id > self._high_water, Notification.created_at >= cutoff)
+            ).all()
+
+        rung = set()
+        for user_id, notification_id, created_at in rows:
+            if notification_id not in self._seen:
+                self._seen[notification_id] = created_at
+                rung.add(user_id)
+            self._high_water = max(self._high_water, notification_id)
+        _prune(self._seen, cutoff)
+        if rung:
+            self.stream.ring(rung)
+
+
+class NotificationStream:
+    def __init__(self):
+        self.app = None
+        self.backend = None
+        self.heartbeat = DEFAULT_HEARTBEAT
+        self.max_duration = DEFAULT_MAX_DURATION
+        self.max_connections = DEFAULT_MAX_CONNECTIONS
+        self._lock = threading.Lock()
+        self._subscribers = defaultdict(set)
+        self._count = 0
+
+    def init_app(self, app):
+        self.app = app
+        self.heartbeat = app.config.get('NOTIFICATION_STREAM_HEARTBEAT', DEFAULT_HEARTBEAT)
+        self.max_duration = app.config.get('NOTIFICATION_STREAM_MAX_DURATION', DEFAULT_MAX_DURATION)
+        self.max_connections = app.config.get('NOTIFICATION_STREAM_MAX_CONNECTIONS', DEFAULT_MAX_CONNECTIONS)
+        threads = app.config.get('GUNICORN_THREADS')
+        if app.config.get('GUNICORN_WORKER_CLASS') == 'gthread' and threads:
+            self.max_connections = max(1, min(self.max_connections, threads - max(1, threads // 4)))
+        if app.config.get('NOTIFICATION_STREAM_BACKEND', 'database') == 'local':
+            self.set_backend(LocalBackend(self))
+        else:
+            poll_interval = app.config.get('NOTIFICATION_STREAM_POLL_INTERVAL', DEFAULT_POLL_INTERVAL)
+            self.set_backend(DatabaseBackend(self, poll_interval))
+        app.extensions['notification_stream'] = self
+
+    def set_backend(self, backend):
+        self.backend = backend
+
+    # Pub/sub
+
+    def publish(self, user_ids):
+        if self.backend is not None and user_ids:
+            self.backend.publish(user_ids)
+
+    def ring(self, user_ids):
+        with self._lock:
+            subscriptions = [sub for user_id in user_ids for sub in self._subscribers.get(user_id, ())]
+        for subscription in subscriptions:
+            subscription.bell.set()
+
+    def subscribed_users(self):
+        with self._lock:
+            return set(self._subscribers)
+
+    def subscribe(self, user_id):
+        with self._lock:
+            if self._count >= self.max_connections:
+                raise StreamsFull()
+            subscription = Subscription(user_id)
+            self._subscribers[user_id].add(subscription)
+            self._count += 1
+        self.backend.start()
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscribers = self._subscribers.get(subscription.user_id)
+            if subscribers and subscription in subscribers:
+                subscribers.discard(subscription)
+                self._count -= 1
+                if not subscribers:
+                    del self._subscribers[subscription.user_id]
+
+    def stats(self):
+        with self._lock:
+            return {'connections': self._count, 'users': len(self._subscribers)}
+
+    # Streaming
+
+    def latest_id(self, user_id):
+        with self.app.app_context():
+            return db.session.query(func.max(Notification.id)).filter(
+                Notification.user_id == user_id
+            ).scalar() or 0
+
+    def _delivered(self, user_id, last_event_id):
+        # On resume, recent notifications up to Last-Event-ID went out on the
+        # previous connection
+        with self.app.app_context():
+            return dict(db.session.query(Notification.id, Notification.created_at).filter(
+                Notification.user_id == user_id,
+                Notification.created_at >= _overlap_cutoff(),
+                Notification.id <= last_event_id
+            ))
+
+    def _read(self, user_id, after_id, sent):
+        # Short-lived context: the session (and its connection) is released on exit
+        cutoff = _overlap_cutoff()
+        _prune(sent, cutoff)
+        with self.app.app_context():
+            query = Notification.query.filter(
+                Notification.user_id == user_id,
+                or_(Notification.id > after_id, Notification.created_at >= cutoff)
+            )
+            if sent:
+                query = query.filter(Notification.id.notin_(sent))
+            notifications = query.options(*loading.notification_items()).order_by(
+                Notification.id
+            ).limit(REPLAY_LIMIT).all()
+            for notification in notifications:
+                sent[notification.id] = notification.created_at
+            return [notification.to_dict() for notification in notifications]
+
+    def busy_frame(self):
+        """The whole body sent to a stream refused at the cap."""
+        return f'retry: {random.randint(*BUSY_RECONNECT_DELAY)}\n: too many open streams\n\n'
+
+    def events(self, subscription, last_event_id):
+        """Generator of SSE frames for one connection, starting after `last_event_id`."""
+        deadline = time.monotonic() + self.max_duration
+        try:
+            yield f'retry: {RECONNECT_DELAY}\n\n'
+            sent = self._delivered(subscription.user_id, last_event_id)
+            while True:
+                notifications = self._read(subscription.user_id, last_event_id, sent)
+                for notification in notifications:
+                    # A late, lower id mustn't move the resume point backwards
+                    last_event_id = max(last_event_id, notification['id'])
+                    yield f"id: {last_event_id}\nevent: notification\ndata: {json.dumps(notification)}\n\n"
+                if len(notifications) == REPLAY_LIMIT:
+                    continue  # more backlog to replay
+
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                if not subscription.wait(min(self.heartbeat, remaining)):
+                    yield ': heartbeat\n\n'
+        finally:
+            self.unsubscribe(subscription)
+
+
+notification_stream = NotificationStream()
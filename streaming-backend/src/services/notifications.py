@@ -0,0 +1,66 @@
+from sqlalchemy import case, func
+from src.models.user import User, db
+from src.models.interactions import Notification
+
+# Per-user unread notification counter. User.unread_notifications is moved by
+# the same transactions that insert notifications or mark them read, so the
+# badge endpoint reads one primary-key row instead of counting. Marking read
+# is a single set-based UPDATE whose rowcount is what the counter drops by.
+# `flask reconcile-aggregates` recounts it from the notification rows.
+
+user_table = User.__table__
+notification_table = Notification.__table__
+
+
+def add_unread(user_ids, count=1):
+    if user_ids:
+        db.session.execute(
+            user_table.update().where(user_table.c.id.in_(user_ids)).values(
+                unread_notifications=user_table.c.unread_notifications + count
+            )
+        )
+
+
+def _drop_unread(user_id, count):
+    if count:
+        db.session.execute(
+            user_table.update().where(user_table.c.id == user_id).values(
+                unread_notifications=case(
+                    (user_table.c.unread_notifications > count, user_table.c.unread_notifications - count),
+                    else_=0
+                )
+            )
+        )
+
+
+def mark_read(user_id, notification_ids=None):
+    """Mark the user's unread notifications (all, or just these ids) read; returns how many changed."""
+    criteria = [notification_table.c.user_id == user_id, notification_table.c.is_read == False]
+    if notification_ids is not None:
+        criteria.append(notification_table.c.id.in_(notification_ids))
+    changed = db.session.execute(
+        notification_table.update().where(*criteria).values(is_read=True)
+    ).rowcount
+    _drop_unread(user_id, changed)
+    return changed
+
+
+def unread_count(user_id):
+    return db.session.query(User.unread_notifications).filter(User.id == user_id).scalar() or 0
+
+
+def reconcile_unread_counts():
+    counts = db.session.query(Notification.user_id, func.count(Notification.id)).filter(
+        Notification.is_read == False
+    ).group_by(Notification.user_id).all()
+
+    db.session.execute(user_table.update().values(unread_notifications=0))
+    if counts:
+        db.session.execute(
+            user_table.update().where(user_table.c.id == db.bindparam('row_id')).values(
+                unread_notifications=db.bindparam('unread')
+            ),
+            [{'row_id': user_id, 'unread': count} for user_id, count in counts]
+        )
+    db.session.commit()
+    return len(counts)
@@ -0,0 +1,114 @@
+import base64
+import json
+import threading
+import time
+from datetime import datetime, date
+from flask import request
+from sqlalchemy import tuple_
+
+# Keyset (cursor) pagination. Instead of OFFSET + COUNT(*), rows are ordered on
+# a stable composite key such as (created_at, id) and the next page starts
+# strictly after the last key seen, so page 1000 costs the same as page 1.
+# Clients opt in by sending `cursor=` (empty for the first page) and follow
+# `next_cursor` until it is null. Totals are only computed when asked for with
+# `with_total=true`, and are cached briefly per filter set.
+
+TOTAL_CACHE_TTL = 60  # seconds
+TOTAL_CACHE_SIZE = 1024
+
+_total_cache = {}
+_total_lock = threading.Lock()
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def cursor_requested():
+    return 'cursor' in request.args
+
+
+def _encode_value(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+
+def _decode_value(column, value):
+    if value is None:
+        return None
+    python_type = column.type.python_type
+    if python_type is datetime:
+        return datetime.fromisoformat(value)
+    if python_type is date:
+        return date.fromisoformat(value)
+    return python_type(value)
+
+
+def encode_cursor(values):
+    raw = json.dumps([_encode_value(v) for v in values], separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor, columns):
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if not isinstance(values, list) or len(values) != len(columns):
+            raise ValueError('cursor does not match sort key')
+        return [_decode_value(column, value) for column, value in zip(columns, values)]
+    except (ValueError, TypeError) as e:
+        raise InvalidCursor(f'Invalid cursor: {e}')
+
+
+def cached_total(query):
+    # COUNT(*) for the unpaged query, shared across pages for a short while
+    statement = query.order_by(None).statement.compile()
+    key = (str(statement), tuple(sorted((k, repr(v)) for k, v in statement.params.items())))
+    now = time.monotonic()
+
+    with _total_lock:
+        hit = _total_cache.get(key)
+        if hit and hit[0] > now:
+            return hit[1]
+
+    total = query.order_by(None).count()
+
+    with _total_lock:
+        if len(_total_cache) >= TOTAL_CACHE_SIZE:
+            _total_cache.clear()
+        _total_cache[key] = (now + TOTAL_CACHE_TTL, total)
+    return total
+
+
+def keyset_paginate(query, columns, per_page, descending=True):
+    # `columns` must end in a unique column (normally the primary key)
+    per_page = max(1, per_page)  # callers pass ?per_page= through unchecked
+    cursor = request.args.get('cursor', '')
+    with_total = request.args.get('with_total', 'false').lower() in ('1', 'true', 'yes')
+
+    total = cached_total(query) if with_total else None
+
+    key = tuple_(*columns)
+    if cursor:
+        after = tuple_(*decode_cursor(cursor, columns))
+        query = query.filter(key < after if descending else key > after)
+
+    ordering = [column.desc() if descending else column.asc() for column in columns]
+    rows = query.order_by(None).order_by(*ordering).limit(per_page + 1).all()
+
+    has_next = len(rows) > per_page
+    items = rows[:per_page]
+    next_cursor = None
+    if has_next:
+        last = items[-1]
+        next_cursor = encode_cursor([getattr(last, column.key) for column in columns])
+
+    pagination = {
+        'per_page': per_page,
+        'next_cursor': next_cursor,
+        'has_next': has_next
+    }
+    if total is not None:
+        pagination['total'] = total
+    return items, pagination
@@ -0,0 +1,86 @@
+import atexit
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from werkzeug.security import generate_password_hash, check_password_hash
+
+# Password hashing off the request thread. scrypt/PBKDF2 are deliberately slow
+# and hold the GIL, so during a login storm they starve every other request in
+# the worker. Hashes run in a small per-process ProcessPoolExecutor instead; at
+# most PASSWORD_HASH_MAX_PENDING hashes may be queued or running at once, and a
+# request that can't get a slot within PASSWORD_HASH_WAIT seconds fails fast
+# with HashingBusy (503) rather than piling up. PASSWORD_HASH_WORKERS=0 hashes
+# inline. Hashes made with an older PASSWORD_HASH_METHOD are upgraded on login.
+
+DEFAULT_METHOD = 'scrypt'  # any werkzeug method string, e.g. 'pbkdf2:sha256:600000'
+DEFAULT_WORKERS = min(2, os.cpu_count() or 1)
+DEFAULT_MAX_PENDING = 16
+DEFAULT_WAIT = 2.0  # seconds
+
+
+class HashingBusy(Exception):
+    pass
+
+
+class PasswordHasher:
+    def __init__(self):
+        self.method = DEFAULT_METHOD
+        self.workers = DEFAULT_WORKERS
+        self.max_pending = DEFAULT_MAX_PENDING
+        self.wait = DEFAULT_WAIT
+        self._slots = threading.BoundedSemaphore(self.max_pending)
+        self._executor = None
+        self._executor_pid = None
+        self._executor_lock = threading.Lock()
+        self._prefix = None
+
+    def init_app(self, app):
+        self.method = app.config.get('PASSWORD_HASH_METHOD', DEFAULT_METHOD)
+        self.workers = app.config.get('PASSWORD_HASH_WORKERS', DEFAULT_WORKERS)
+        self.max_pending = app.config.get('PASSWORD_HASH_MAX_PENDING', DEFAULT_MAX_PENDING)
+        self.wait = app.config.get('PASSWORD_HASH_WAIT', DEFAULT_WAIT)
+        self._slots = threading.BoundedSemaphore(max(1, self.max_pending))
+        self._prefix = None
+        app.extensions['password_hasher'] = self
+        atexit.register(self.shutdown)
+
+    def _get_executor(self):
+        # A pool inherited through fork has no live workers, so build one per process
+        pid = os.getpid()
+        if self._executor is None or self._executor_pid != pid:
+            with self._executor_lock:
+                if self._executor is None or self._executor_pid != pid:
+                    self._executor = ProcessPoolExecutor(max_workers=self.workers)
+                    self._executor_pid = pid
+        return self._executor
+
+    def _run(self, fn, *args):
+        if not self.workers or self.workers <= 0:
+            return fn(*args)
+
+        if not self._slots.acquire(timeout=self.wait):
+            raise HashingBusy('Too many password hashes in flight')
+        try:
+            return self._get_executor().submit(fn, *args).result()
+        finally:
+            self._slots.release()
+
+    def hash(self, password):
+        return self._run(generate_password_hash, password, self.method)
+
+    def verify(self, password_hash, password):
+        return self._run(check_password_hash, password_hash, password)
+
+    def needs_rehash(self, password_hash):
+        # Compare the "method:params" part, e.g. scrypt:32768:8:1 or pbkdf2:sha256:1000000
+        if self._prefix is None:
+            self._prefix = self.hash('').split('$', 1)[0]
+        return password_hash.split('$', 1)[0] != self._prefix
+
+    def shutdown(self):
+        if self._executor is not None and self._executor_pid == os.getpid():
+            self._executor.shutdown(wait=False, cancel_futures=True)
+        self._executor = None
+
+
+password_hasher = PasswordHasher()
@@ -0,0 +1,66 @@
+import jwt
+from flask import current_app
+from sqlalchemy.orm import make_transient_to_detached
+from src.models.user import User, db
+from src.services.cache import MemoryLRUCache
+
+# Cache of authenticated principals for token_required. The JWT is still
+# verified on every request (it is CPU-only), but the user row is served from a
+# bounded TTL cache keyed by user id instead of a SELECT per request. Cached
+# users are plain column snapshots; on a hit they are attached to the request's
+# session with merge(load=False), so routes can still modify and commit them.
+# Every endpoint that changes a user calls invalidate(); the TTL bounds how long
+# another worker can serve a stale copy.
+
+DEFAULT_TTL = 30  # seconds
+DEFAULT_MAX_ENTRIES = 10000
+
+
+class PrincipalCache:
+    def __init__(self):
+        self.ttl = DEFAULT_TTL
+        self.backend = MemoryLRUCache(DEFAULT_MAX_ENTRIES)
+
+    def init_app(self, app):
+        self.ttl = app.config.get('PRINCIPAL_CACHE_TTL', DEFAULT_TTL)
+        self.backend = MemoryLRUCache(app.config.get('PRINCIPAL_CACHE_MAX_ENTRIES', DEFAULT_MAX_ENTRIES))
+        app.extensions['principal_cache'] = self
+
+    @staticmethod
+    def _snapshot(user):
+        return {column.key: getattr(user, column.key) for column in User.__table__.columns}
+
+    @staticmethod
+    def _attach(snapshot):
+        user = User(**snapshot)
+        make_transient_to_detached(user)
+        return db.session.merge(user, load=False)
+
+    def load(self, user_id):
+        if self.ttl > 0:
+            snapshot = self.backend.get(user_id)
+            if snapshot is not None:
+                return self._attach(snapshot)
+
+        user = db.session.get(User, user_id)
+        if user is not None and self.ttl > 0:
+            self.backend.set(user_id, self._snapshot(user), self.ttl)
+        return user
+
+    def resolve_token(self, token):
+        try:
+            payload = jwt.decode(token, current_app.config['SECRET_KEY'], algorithms=['HS256'])
+        except jwt.InvalidTokenError:  # includes ExpiredSignatureError
+            return None
+        return self.load(payload['user_id'])
+
+    def invalidate(self, user_id):
+        self.backend.delete(user_id)
+
+    def stats(self):
+        stats = self.backend.stats()
+        stats['ttl'] = self.ttl
+        return stats
+
+
+principal_cache = PrincipalCache()
@@ -0,0 +1,102 @@
+from collections import defaultdict
+from src.models.user import db
+from src.models.content import Content, Genre, content_genres
+from src.models.interactions import Rating, WatchHistory, Favorite
+from src.models.recommendation import ContentSimilarity, UserRecommendation
+
+# Query-time side of the offline recommenders. The matrix-factorization job
+# leaves a ready-made top-N per user; failing that, the item-to-item job's
+# neighbours of a bounded set of the user's recent positive interactions are
+# merged. Either way the cost depends on fixed caps, not the catalog size.
+
+SEED_LIMIT = 20
+
+
+def _seed_weights(user_id):
+    seeds = defaultdict(float)
+
+    recent = db.session.query(WatchHistory.content_id, WatchHistory.completed).filter(
+        WatchHistory.user_id == user_id
+    ).order_by(WatchHistory.last_watched.desc()).limit(SEED_LIMIT).all()
+    for position, (content_id, completed) in enumerate(recent):
+        # Newer history counts a little more than older
+        seeds[content_id] = max(seeds[content_id], (1.0 if completed else 0.6) * (1.0 - position / (2.0 * SEED_LIMIT)))
+
+    for (content_id,) in db.session.query(Favorite.content_id).filter(
+        Favorite.user_id == user_id
+    ).order_by(Favorite.created_at.desc()).limit(SEED_LIMIT):
+        seeds[content_id] += 1.0
+
+    for content_id, score in db.session.query(Rating.content_id, Rating.score).filter(
+        Rating.user_id == user_id, Rating.score > 5
+    ).order_by(Rating.updated_at.desc()).limit(SEED_LIMIT):
+        seeds[content_id] += (score - 5.0) / 5.0
+
+    return seeds
+
+
+def _load_ranked(user_id, ranked_ids, limit):
+    # Active, not-yet-watched content for `ranked_ids`, kept in that order
+    watched = db.session.query(WatchHistory.content_id).filter(WatchHistory.user_id == user_id)
+    content = Content.query.filter(
+        Content.id.in_(ranked_ids),
+        Content.is_active == True,
+        ~Content.id.in_(watched)
+    ).all()
+
+    position = {content_id: i for i, content_id in enumerate(ranked_ids)}
+    content.sort(key=lambda item: position[item.id])
+    return content[:limit]
+
+
+def factorized_recommendations(user_id, limit=10):
+    ranked_ids = [row[0] for row in db.session.query(UserRecommendation.content_id).filter(
+        UserRecommendation.user_id == user_id
+    ).order_by(UserRecommendation.rank).limit(limit * 3)]
+    if not ranked_ids:
+        return []
+    return _load_ranked(user_id, ranked_ids, limit)
+
+
+def item_based_recommendations(user_id, limit=10):
+    seeds = _seed_weights(user_id)
+    if not seeds:
+        return []
+
+    scores = defaultdict(float)
+    for content_id, neighbor_id, score in db.session.query(
+        ContentSimilarity.content_id, ContentSimilarity.neighbor_id, ContentSimilarity.score
+    ).filter(ContentSimilarity.content_id.in_(seeds.keys())):
+        scores[neighbor_id] += seeds[content_id] * score
+
+    if not scores:
+        return []
+
+    candidates = sorted(scores, key=scores.get, reverse=True)[:limit * 3]
+    return _load_ranked(user_id, candidates, limit)
+
+
+def cold_start_recommendations(user_id, limit=10):
+    # Top-rated unwatched titles from genres the user has watched, else popular titles
+    genre_ids = [row[0] for row in db.session.query(Genre.id).join(
+        content_genres
+    ).join(Content).join(WatchHistory).filter(
+        WatchHistory.user_id == user_id
+    ).distinct()]
+
+    query = Content.query.filter(Content.is_active == True)
+    if genre_ids:
+        query = query.filter(
+            Content.genres.any(Genre.id.in_(genre_ids)),
+            ~Content.id.in_(db.session.query(WatchHistory.content_id).filter_by(user_id=user_id))
+        )
+    return query.order_by(Content.rating.desc(), Content.view_count.desc()).limit(limit).all()
+
+
+def recommend(user_id, limit=10):
+    """Precomputed per-user top-N, then item-to-item neighbours of recent activity, then cold start."""
+    return (
+        factorized_recommendations(user_id, limit=limit)
+        or item_based_recommendations(user_id, limit=limit)
+        or cold_start_recommendations(user_id, limit=limit)
+    )
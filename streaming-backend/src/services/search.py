@@ -0,0 +1,165 @@
+import re
+from flask import current_app
+from sqlalchemy import text, literal_column, or_, Integer, Float
+from sqlalchemy.exc import DBAPIError
+from src.models.user import db
+from src.models.content import Content
+
+# Full-text search over content titles, descriptions, directors and cast.
+# SQLite uses an external-content FTS5 table kept in sync by triggers, so every
+# write to `content` (ORM or set-based) updates the index in the same transaction.
+# PostgreSQL uses a GIN expression index over a weighted tsvector, which the
+# database maintains on its own. Anything else falls back to ILIKE scans.
+
+SEARCH_EXTENSION = 'search'
+
+# Relevance is multiplied by a popularity factor in [1, 2) that saturates, so a
+# handful of views can't bury a much better textual match.
+POPULARITY_PIVOT = 1000.0
+
+_SQLITE_SCHEMA = [
+    """CREATE VIRTUAL TABLE IF NOT EXISTS content_fts USING fts5(
+        title, description, director, "cast",
+        content='content', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+    )""",
+    """CREATE TRIGGER IF NOT EXISTS content_fts_ai AFTER INSERT ON content BEGIN
+        INSERT INTO content_fts(rowid, title, description, director, "cast")
+        VALUES (new.id, new.title, new.description, new.director, new."cast");
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS content_fts_ad AFTER DELETE ON content BEGIN
+        INSERT INTO content_fts(content_fts, rowid, title, description, director, "cast")
+        VALUES ('delete', old.id, old.title, old.description, old.director, old."cast");
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS content_fts_au
+    AFTER UPDATE OF title, description, director, "cast" ON content BEGIN
+        INSERT INTO content_fts(content_fts, rowid, title, description, director, "cast")
+        VALUES ('delete', old.id, old.title, old.description, old.director, old."cast");
+        INSERT INTO content_fts(rowid, title, description, director, "cast")
+        VALUES (new.id, new.title, new.description, new.director, new."cast");
+    END""",
+]
+
+# Column weights for bm25(): title, description, director, cast
+_SQLITE_RANK = 'bm25(content_fts, 10.0, 1.0, 4.0, 4.0)'
+
+# Shared verbatim between the index DDL and the queries so the planner matches it
+_PG_VECTOR = (
+    "setweight(to_tsvector('simple', coalesce(content.title, '')), 'A') || "
+    "setweight(to_tsvector('simple', coalesce(content.director, '')), 'B') || "
+    "setweight(to_tsvector('simple', coalesce(content.\"cast\", '')), 'B') || "
+    "setweight(to_tsvector('simple', coalesce(content.description, '')), 'C')"
+)
+
+_PG_SCHEMA = [
+    f"CREATE INDEX IF NOT EXISTS ix_content_search ON content USING GIN (({_PG_VECTOR}))",
+]
+
+_TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def init_app(app):
+    with app.app_context():
+        create_search_index()
+
+
+# Create (or repair) the full-text index for the bound database
+def create_search_index():
+    dialect = db.engine.dialect.name
+    backend = None
+
+    try:
+        if dialect == 'sqlite':
+            with db.engine.begin() as conn:
+                existing = conn.execute(text(
+                    "SELECT count(*) FROM sqlite_master WHERE type = 'trigger' AND name LIKE 'content_fts_%'"
+                )).scalar()
+                for statement in _SQLITE_SCHEMA:
+                    conn.execute(text(statement))
+                # Triggers vanish with the content table (e.g. drop_all), so the
+                # index has to be repopulated whenever they are recreated
+                if existing < 3:
+                    conn.execute(text("INSERT INTO content_fts(content_fts) VALUES ('rebuild')"))
+            backend = 'fts5'
+        elif dialect == 'postgresql':
+            with db.engine.begin() as conn:
+                for statement in _PG_SCHEMA:
+                    conn.execute(text(statement))
+            backend = 'postgresql'
+    except DBAPIError as e:
+        # e.g. SQLite compiled without FTS5
+        current_app.logger.warning('Full-text search unavailable, using ILIKE: %s', e)
+
+    current_app.extensions[SEARCH_EXTENSION] = backend
+    return backend
+
+
+def rebuild_search_index():
+    if current_app.extensions.get(SEARCH_EXTENSION) == 'fts5':
+        db.session.execute(text("INSERT INTO content_fts(content_fts) VALUES ('rebuild')"))
+        db.session.commit()
+
+
+def tokenize(query):
+    return _TOKEN_RE.findall((query or '').lower())
+
+
+def _backend():
+    return current_app.extensions.get(SEARCH_EXTENSION)
+
+
+def _ilike_filter(query):
+    search_term = f"%{query}%"
+    return or_(
+        Content.title.ilike(search_term),
+        Content.description.ilike(search_term),
+        Content.director.ilike(search_term),
+        Content.cast.ilike(search_term)
+    )
+
+
+def _fts_subquery(tokens):
+    # Every token must match; the last one is a prefix so partial words hit
+    backend = _backend()
+    if backend == 'fts5':
+        match = ' '.join(f'"{token}"' for token in tokens[:-1])
+        match = f'{match} "{tokens[-1]}"*'.strip()
+        return text(
+            f"SELECT rowid AS content_id, {_SQLITE_RANK} AS score "
+            "FROM content_fts WHERE content_fts MATCH :fts_query"
+        ).bindparams(fts_query=match).columns(content_id=Integer, score=Float).subquery('fts')
+
+    tsquery = ' & '.join(tokens[:-1] + [f'{tokens[-1]}:*'])
+    # ts_rank_cd grows with relevance; negate it so both backends sort ascending
+    return text(
+        f"SELECT content.id AS content_id, -ts_rank_cd({_PG_VECTOR}, to_tsquery('simple', :fts_query)) AS score "
+        f"FROM content WHERE ({_PG_VECTOR}) @@ to_tsquery('simple', :fts_query)"
+    ).bindparams(fts_query=tsquery).columns(content_id=Integer, score=Float).subquery('fts')
+
+
+# WHERE clause restricting Content to rows matching `query`
+def search_filter(query):
+    tokens = tokenize(query)
+    if not _backend() or not tokens:
+        return _ilike_filter(query)
+
+    fts = _fts_subquery(tokens)
+    return Content.id.in_(db.session.query(fts.c.content_id))
+
+
+# Active content matching `query`, ordered by relevance blended with popularity
+def ranked_search(query, limit=20):
+    tokens = tokenize(query)
+    if not _backend() or not tokens:
+        return Content.query.filter(
+            Content.is_active == True,
+            _ilike_filter(query)
+        ).order_by(Content.view_count.desc()).limit(limit).all()
+
+    fts = _fts_subquery(tokens)
+    views = db.func.coalesce(Content.view_count, 0)
+    popularity = 1.0 + views / (views + literal_column(str(POPULARITY_PIVOT)))
+
+    return Content.query.join(fts, fts.c.content_id == Content.id).filter(
+        Content.is_active == True
+    ).order_by((fts.c.score * popularity).asc(), Content.view_count.desc()).limit(limit).all()
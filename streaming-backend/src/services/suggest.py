@@ -0,0 +1,233 @@
+import json
+import heapq
+import threading
+import time
+from bisect import bisect_left, insort
+from itertools import groupby
+from src.models.user import db
+from src.models.content import Content
+
+# In-process prefix index for search-as-you-type. Every word-start suffix of a
+# title, director or cast name is kept in one sorted list, so a prefix lookup is
+# a bisect plus a forward scan over the matching keys. One- to three-letter
+# prefixes match too much of a large catalog to scan per keystroke, so their
+# top MAX_LIMIT titles are ranked once when the index is built (and re-ranked
+# for the prefixes a refreshed title touches). Each worker holds its own copy;
+# writes made through this worker update it in place and a periodic full
+# rebuild picks up changes made by other workers.
+
+DEFAULT_LIMIT = 8
+MAX_LIMIT = 20
+REBUILD_INTERVAL = 300  # seconds
+RESULT_CACHE_SIZE = 2048
+SHORT_PREFIX_LENGTH = 3  # prefixes up to this long are ranked ahead of time
+
+_KIND_ORDER = {'title': 0, 'director': 1, 'cast': 2}
+
+
+def normalize(value):
+    return ' '.join((value or '').lower().split())
+
+
+def split_cast(cast):
+    if not cast:
+        return []
+    if cast.lstrip().startswith('['):
+        try:
+            return [str(name).strip() for name in json.loads(cast) if str(name).strip()]
+        except ValueError:
+            pass
+    return [name.strip() for name in cast.split(',') if name.strip()]
+
+
+def _word_suffixes(phrase):
+    words = normalize(phrase).split(' ')
+    return [' '.join(words[i:]) for i in range(len(words)) if words[i]]
+
+
+def _short_prefixes(key):
+    return [key[:n] for n in range(1, min(len(key), SHORT_PREFIX_LENGTH) + 1)]
+
+
+def _best_matches(entries):
+    # content_id -> (kind, phrase) of its strongest matching entry
+    best = {}
+    for _, content_id, kind, phrase in entries:
+        current = best.get(content_id)
+        if current is None or _KIND_ORDER[kind] < _KIND_ORDER[current[0]]:
+            best[content_id] = (kind, phrase)
+    return best
+
+
+class SuggestIndex:
+    def __init__(self, rebuild_interval=REBUILD_INTERVAL):
+        self.rebuild_interval = rebuild_interval
+        self._lock = threading.RLock()
+        self._keys = []  # sorted (key, content_id, kind, phrase)
+        self._docs = {}  # content_id -> (score, card, keys)
+        self._short = {}  # short prefix -> ranked [(content_id, kind, phrase)]
+        self._results = {}
+        self._built_at = None
+
+    def __len__(self):
+        return len(self._docs)
+
+    # Building
+
+    def _load_rows(self, ids=None):
+        query = db.session.query(
+            Content.id, Content.title, Content.director, Content.cast,
+            Content.content_type, Content.cover_image, Content.release_year,
+            Content.view_count, Content.rating, Content.is_active
+        )
+        if ids is not None:
+            query = query.filter(Content.id.in_(ids))
+        else:
+            query = query.filter(Content.is_active == True)
+        return query.all()
+
+    def _entries_for(self, row):
+        phrases = [('title', row.title)]
+        if row.director:
+            phrases.append(('director', row.director))
+        phrases.extend(('cast', name) for name in split_cast(row.cast))
+
+        keys = set()
+        for kind, phrase in phrases:
+            for key in _word_suffixes(phrase):
+                keys.add((key, row.id, kind, phrase))
+        return sorted(keys)
+
+    def _document(self, row):
+        score = (row.view_count or 0, row.rating or 0.0)
+        card = {
+            'id': row.id,
+            'title': row.title,
+            'content_type': row.content_type,
+            'cover_image': row.cover_image,
+            'release_year': row.release_year
+        }
+        return score, card, self._entries_for(row)
+
+    def _rank(self, best, limit, docs=None):
+        docs = self._docs if docs is None else docs
+        # Most popular first; ties go to the older title so rankings are repeatable
+        top = heapq.nlargest(limit, best, key=lambda content_id: (docs[content_id][0], -content_id))
+        return [(content_id,) + best[content_id] for content_id in top]
+
+    def _scan(self, prefix):
+        i = bisect_left(self._keys, (prefix,))
+        keys = self._keys
+        j = i
+        while j < len(keys) and keys[j][0].startswith(prefix):
+            j += 1
+        return _best_matches(keys[i:j])
+
+    def _rank_short_prefixes(self, keys, docs):
+        # One pass over the sorted keys per prefix length
+        short = {}
+        for length in range(1, SHORT_PREFIX_LENGTH + 1):
+            for prefix, entries in groupby(keys, key=lambda entry: entry[0][:length]):
+                if len(prefix) == length:
+                    short[prefix] = self._rank(_best_matches(entries), MAX_LIMIT, docs)
+        return short
+
+    def rebuild(self):
+        docs = {row.id: self._document(row) for row in self._load_rows()}
+        keys = sorted(key for _, _, entries in docs.values() for key in entries)
+        short = self._rank_short_prefixes(keys, docs)
+        with self._lock:
+            self._docs = docs
+            self._keys = keys
+            self._short = short
+            self._results = {}
+            self._built_at = time.monotonic()
+
+    def ensure_fresh(self):
+        if self._built_at is None or time.monotonic() - self._built_at > self.rebuild_interval:
+            self.rebuild()
+
+    # Incremental maintenance
+
+    def _remove_locked(self, content_id):
+        doc = self._docs.pop(content_id, None)
+        if not doc:
+            return
+        for entry in doc[2]:
+            i = bisect_left(self._keys, entry)
+            if i < len(self._keys) and self._keys[i] == entry:
+                del self._keys[i]
+
+    def _replace_locked(self, content_id, doc):
+        # Swap one title's entries and patch the short-prefix rankings it appears in
+        old = self._docs.get(content_id)
+        self._remove_locked(content_id)
+        if doc is not None:
+            self._docs[content_id] = doc
+            for entry in doc[2]:
+                insort(self._keys, entry)
+
+        old_score = old[0] if old else None
+        prefixes = {prefix for d in (old, doc) if d for entry in d[2] for prefix in _short_prefixes(entry[0])}
+        for prefix in prefixes:
+            ranked = [item for item in self._short.get(prefix, ()) if item[0] != content_id]
+            listed = len(ranked) < len(self._short.get(prefix, ()))
+            best = _best_matches(entry for entry in (doc[2] if doc else ()) if entry[0].startswith(prefix))
+            if listed and (not best or doc[0] < old_score):
+                # It may have been holding a place another title now deserves
+                best = self._scan(prefix)
+                ranked = []
+            if best:
+                ranked = self._rank({**{item[0]: item[1:] for item in ranked}, **best}, MAX_LIMIT)
+            if ranked:
+                self._short[prefix] = ranked
+            else:
+                self._short.pop(prefix, None)
+
+    def refresh(self, content_ids):
+        # Re-read the given titles and replace (or drop) their entries
+        if self._built_at is None:
+            return  # Not built yet; the first lookup loads everything
+        content_ids = list(content_ids)
+        rows = {row.id: row for row in self._load_rows(content_ids)}
+        with self._lock:
+            for content_id in content_ids:
+                row = rows.get(content_id)
+                doc = self._document(row) if row is not None and row.is_active else None
+                self._replace_locked(content_id, doc)
+            self._results = {}
+
+    def discard(self, content_id):
+        with self._lock:
+            self._replace_locked(content_id, None)
+            self._results = {}
+
+    # Lookup
+
+    def suggest(self, prefix, limit=DEFAULT_LIMIT):
+        prefix = normalize(prefix)
+        if not prefix:
+            return []
+
+        cache_key = (prefix, limit)
+        cached = self._results.get(cache_key)
+        if cached is not None:
+            return cached
+
+        with self._lock:
+            if len(prefix) <= SHORT_PREFIX_LENGTH:
+                top = self._short.get(prefix, [])[:limit]
+            else:
+                top = self._rank(self._scan(prefix), limit)
+            results = [
+                dict(self._docs[content_id][1], match={'type': kind, 'text': phrase})
+                for content_id, kind, phrase in top
+            ]
+
+            if len(self._results) >= RESULT_CACHE_SIZE:
+                self._results = {}
+            self._results[cache_key] = results
+            return results
+
+
+suggest_index = SuggestIndex()
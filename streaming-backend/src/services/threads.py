@@ -0,0 +1,97 @@
+from sqlalchemy import func, literal, select
+from sqlalchemy.orm import aliased
+from src.models.user import db
+from src.models.interactions import Comment
+from src.services import loading
+
+# Threaded comments. Descendants of a page of root comments are found with one
+# recursive CTE walking parent_id, whatever the nesting depth. Each thread
+# returns its first `per_thread` replies in chronological order (a child
+# always sorts after its parent, so the cut never orphans a reply); the rest
+# are paged with GET /api/comments/<id>/replies. Authors are joined in the
+# same query and direct reply counts come from one GROUP BY, so a page of
+# threads costs a fixed handful of queries.
+
+MAX_THREAD_DEPTH = 50  # guards the recursion against corrupt parent cycles
+
+
+def thread_cte(root_ids):
+    # (id, root_id, depth) for the roots and every active reply beneath them
+    tree = select(
+        Comment.id.label('id'),
+        Comment.id.label('root_id'),
+        literal(0).label('depth')
+    ).where(Comment.id.in_(root_ids)).cte('thread', recursive=True)
+
+    child = aliased(Comment)
+    return tree.union_all(
+        select(child.id, tree.c.root_id, tree.c.depth + 1).where(
+            child.parent_id == tree.c.id,
+            child.is_active == True,
+            tree.c.depth < MAX_THREAD_DEPTH
+        )
+    )
+
+
+def descendants_query(root_ids):
+    # Active replies (at any depth) below the given comments
+    tree = thread_cte(root_ids)
+    return Comment.query.join(tree, Comment.id == tree.c.id).filter(
+        tree.c.depth > 0
+    ).options(*loading.comment_items())
+
+
+def reply_counts(comment_ids):
+    if not comment_ids:
+        return {}
+    return dict(db.session.query(Comment.parent_id, func.count(Comment.id)).filter(
+        Comment.parent_id.in_(comment_ids),
+        Comment.is_active == True
+    ).group_by(Comment.parent_id).all())
+
+
+def serialize_replies(comments):
+    counts = reply_counts([comment.id for comment in comments])
+    return [dict(comment.to_dict(), reply_count=counts.get(comment.id, 0)) for comment in comments]
+
+
+def load_threads(roots, per_thread):
+    """Serialize root comments with their reply trees nested under `replies`."""
+    root_ids = [root.id for root in roots]
+    if not root_ids:
+        return []
+
+    tree = thread_cte(root_ids)
+    ranked = select(
+        tree.c.id,
+        tree.c.root_id,
+        func.row_number().over(
+            partition_by=tree.c.root_id,
+            order_by=(Comment.created_at, Comment.id)
+        ).label('position')
+    ).join(Comment, Comment.id == tree.c.id).where(tree.c.depth > 0).subquery()
+
+    replies = Comment.query.join(ranked, Comment.id == ranked.c.id).filter(
+        ranked.c.position <= per_thread
+    ).options(*loading.comment_items()).order_by(Comment.created_at, Comment.id).all()
+
+    totals = dict(db.session.query(tree.c.root_id, func.count()).filter(
+        tree.c.depth > 0
+    ).group_by(tree.c.root_id).all())
+    counts = reply_counts(root_ids + [reply.id for reply in replies])
+
+    nodes = {}
+    for comment in list(roots) + replies:
+        nodes[comment.id] = dict(comment.to_dict(), reply_count=counts.get(comment.id, 0), replies=[])
+    for reply in replies:
+        parent = nodes.get(reply.parent_id)
+        if parent is not None:
+            parent['replies'].append(nodes[reply.id])
+
+    threads = []
+    for root in roots:
+        node = nodes[root.id]
+        node['total_replies'] = totals.get(root.id, 0)
+        node['has_more_replies'] = node['total_replies'] > per_thread
+        threads.append(node)
+    return threads
@@ -0,0 +1,133 @@
+import threading
+from collections import Counter
+from datetime import datetime
+from sqlalchemy import bindparam
+from src.models.user import db
+from src.models.content import Content, Episode
+from src.models.analytics import ViewEvent
+from src.services.background import PeriodicWorker
+from src.services.view_rollup import view_rollup
+
+# Write-behind view counters. Views are tallied in memory per worker and flushed
+# as batched `UPDATE ... SET view_count = view_count + :n` statements, so a page
+# view no longer opens a write transaction on a hot row. Counters flush every
+# VIEW_COUNTER_FLUSH_INTERVAL seconds, as soon as VIEW_COUNTER_MAX_PENDING views
+# are waiting, and once more when the process exits. An interval of 0 writes
+# through synchronously (useful where background threads don't survive, e.g.
+# serverless deployments).
+#
+# Each view is also buffered as a ViewEvent row and bulk-inserted in the same
+# flush, feeding the daily rollups behind the windowed admin analytics.
+
+DEFAULT_FLUSH_INTERVAL = 10  # seconds
+DEFAULT_MAX_PENDING = 1000
+
+
+def _increment_statement(model):
+    table = model.__table__
+    values = {'view_count': db.func.coalesce(table.c.view_count, 0) + bindparam('increment')}
+    if 'updated_at' in table.c:
+        # Keep updated_at (and the catalog validators derived from it) stable
+        values['updated_at'] = table.c.updated_at
+    return table.update().where(table.c.id == bindparam('row_id')).values(**values)
+
+
+class ViewCounter(PeriodicWorker):
+    thread_name = 'view-counter-flush'
+
+    def __init__(self):
+        super().__init__(DEFAULT_FLUSH_INTERVAL)
+        self.max_pending = DEFAULT_MAX_PENDING
+        self._lock = threading.Lock()
+        self._pending = {Content: Counter(), Episode: Counter()}
+        self._events = []
+        self._pending_total = 0
+
+    def init_app(self, app):
+        super().init_app(app)
+        self.interval = app.config.get('VIEW_COUNTER_FLUSH_INTERVAL', DEFAULT_FLUSH_INTERVAL)
+        self.max_pending = app.config.get('VIEW_COUNTER_MAX_PENDING', DEFAULT_MAX_PENDING)
+        app.extensions['view_counter'] = self
+
+    # Recording
+
+    def record_content_view(self, content_id, count=1, user_id=None):
+        event = {'content_id': content_id, 'episode_id': None, 'user_id': user_id, 'source': 'detail'}
+        self._record(Content, content_id, count, event)
+
+    def record_episode_view(self, episode_id, count=1, content_id=None, user_id=None):
+        # Playback starts are only logged as events when the title is known
+        event = None
+        if content_id is not None:
+            event = {'content_id': content_id, 'episode_id': episode_id, 'user_id': user_id, 'source': 'playback'}
+        self._record(Episode, episode_id, count, event)
+
+    def _record(self, model, row_id, count, event=None):
+        with self._lock:
+            self._pending[model][row_id] += count
+            if event is not None:
+                event['occurred_at'] = datetime.utcnow()
+                self._events.extend([event] * count)
+            self._pending_total += count
+            threshold_reached = self._pending_total >= self.max_pending
+
+        if self.synchronous:
+            self.flush()
+            return
+
+        self.ensure_running()
+        if threshold_reached:
+            self.wake()
+
+    def pending(self):
+        with self._lock:
+            return {model.__tablename__: dict(counts) for model, counts in self._pending.items()}
+
+    # Flushing
+
+    def _swap(self):
+        with self._lock:
+            batch, events = self._pending, self._events
+            self._pending = {model: Counter() for model in batch}
+            self._events = []
+            self._pending_total = 0
+        return batch, events
+
+    def _restore(self, batch, events):
+        with self._lock:
+            for model, counts in batch.items():
+                self._pending[model].update(counts)
+                self._pending_total += sum(counts.values())
+            self._events[:0] = events
+
+    def flush(self):
+        batch, events = self._swap()
+        if not any(batch.values()):
+            return 0
+
+        try:
+            with self.app.app_context():
+                for model, counts in batch.items():
+                    if counts:
+                        db.session.execute(_increment_statement(model), [
+                            {'row_id': row_id, 'increment': increment}
+                            for row_id, increment in counts.items()
+                        ])
+                if events:
+                    db.session.execute(ViewEvent.__table__.insert(), events)
+                db.session.commit()
+        except Exception as e:
+            # Keep the views for the next attempt rather than dropping them
+            self._restore(batch, events)
+            self.app.logger.warning('View counter flush failed: %s', e)
+            return 0
+
+        if events:
+            view_rollup.ensure_running()
+
+        return sum(sum(counts.values()) for counts in batch.values())
+
+    run_once = flush
+
+
+view_counter = ViewCounter()
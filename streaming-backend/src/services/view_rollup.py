@@ -0,0 +1,191 @@
+from collections import Counter, defaultdict
+from datetime import datetime, timedelta
+from sqlalchemy import bindparam, case, func, select
+from src.models.user import db
+from src.models.analytics import ViewEvent, DailyContentViews, RollupCheckpoint
+from src.services.background import PeriodicWorker
+
+# Daily view rollups. Raw ViewEvent rows are folded into per-day, per-title
+# counts in DailyContentViews. Each chunk of events is claimed by flipping its
+# rolled_up flag with UPDATE ... RETURNING in the same transaction that adds
+# its counts, so every event is rolled up exactly once however often (and in
+# however many processes) the job runs. A high-water id wouldn't do: view
+# counter flushes from several workers commit out of id order, so an event
+# with a lower id can become visible after a higher one was already counted.
+# The job runs every VIEW_ROLLUP_INTERVAL seconds in the background (0 leaves
+# it to `flask rollup-views` from cron) and prunes rolled-up events older than
+# VIEW_EVENT_RETENTION_DAYS.
+#
+# Windowed queries read the rollups plus the small tail of events not yet
+# rolled up, so they stay exact without scanning the event log.
+
+CHECKPOINT = 'daily_content_views'
+DEFAULT_ROLLUP_INTERVAL = 300  # seconds
+DEFAULT_RETENTION_DAYS = 30
+ROLLUP_CHUNK_SIZE = 50000  # events aggregated per transaction
+
+
+def _mark_checkpointed_events():
+    # Databases from before the rolled_up flag track progress with an id
+    # checkpoint; mark what it covers once, then retire it
+    checkpoint = db.session.get(RollupCheckpoint, CHECKPOINT)
+    if checkpoint is None or not checkpoint.last_event_id:
+        return
+    ViewEvent.query.filter(
+        ViewEvent.rolled_up == False,
+        ViewEvent.id <= checkpoint.last_event_id
+    ).update({'rolled_up': True}, synchronize_session=False)
+    checkpoint.last_event_id = 0
+    checkpoint.updated_at = datetime.utcnow()
+    db.session.commit()
+
+
+def _event_counts(*criteria):
+    day = func.date(ViewEvent.occurred_at, type_=db.Date)
+    return db.session.query(
+        day,
+        ViewEvent.content_id,
+        func.sum(case((ViewEvent.source == 'detail', 1), else_=0)),
+        func.sum(case((ViewEvent.source == 'playback', 1), else_=0))
+    ).filter(*criteria).group_by(day, ViewEvent.content_id)
+
+
+def _claim_events(chunk_size):
+    """Flag up to chunk_size events as rolled up; returns their (day, content_id, views, playbacks) counts."""
+    table = ViewEvent.__table__
+    chunk = select(table.c.id).where(table.c.rolled_up == False).order_by(table.c.id).limit(chunk_size)
+    claimed = db.session.execute(
+        table.update().where(
+            table.c.id.in_(chunk.scalar_subquery()),
+            # Re-checked against the committed row if another rollup got there first
+            table.c.rolled_up == False
+        ).values(rolled_up=True).returning(table.c.occurred_at, table.c.content_id, table.c.source)
+    ).all()
+
+    counts = defaultdict(Counter)
+    for occurred_at, content_id, source in claimed:
+        counts[(occurred_at.date(), content_id)][source] += 1
+    rows = [
+        (day, content_id, sources['detail'], sources['playback'])
+        for (day, content_id), sources in counts.items()
+    ]
+    return rows, len(claimed)
+
+
+def _merge_counts(rows):
+    keys = {(day, content_id) for day, content_id, _, _ in rows}
+    existing = set(db.session.query(DailyContentViews.day, DailyContentViews.content_id).filter(
+        DailyContentViews.day.in_({day for day, _ in keys}),
+        DailyContentViews.content_id.in_({content_id for _, content_id in keys})
+    ))
+
+    updates, inserts = [], []
+    for day, content_id, views, playbacks in rows:
+        if (day, content_id) in existing:
+            updates.append({
+                'row_day': day, 'row_content_id': content_id,
+                'add_views': views or 0, 'add_playbacks': playbacks or 0
+            })
+        else:
+            inserts.append({
+                'day': day, 'content_id': content_id,
+                'views': views or 0, 'playbacks': playbacks or 0
+            })
+
+    table = DailyContentViews.__table__
+    if updates:
+        db.session.execute(
+            table.update().where(
+                table.c.day == bindparam('row_day'),
+                table.c.content_id == bindparam('row_content_id')
+            ).values(
+                views=table.c.views + bindparam('add_views'),
+                playbacks=table.c.playbacks + bindparam('add_playbacks')
+            ),
+            updates
+        )
+    if inserts:
+        db.session.execute(table.insert(), inserts)
+
+
+def rollup_views(retention_days=DEFAULT_RETENTION_DAYS, chunk_size=ROLLUP_CHUNK_SIZE):
+    """Fold new view events into DailyContentViews; returns the number of events rolled up."""
+    _mark_checkpointed_events()
+    rolled = 0
+
+    while True:
+        rows, claimed = _claim_events(chunk_size)
+        if rows:
+            _merge_counts(rows)
+        db.session.commit()
+
+        rolled += sum(views + playbacks for _, _, views, playbacks in rows)
+        if claimed < chunk_size:
+            break
+
+    if retention_days:
+        cutoff = datetime.utcnow() - timedelta(days=retention_days)
+        ViewEvent.query.filter(
+            ViewEvent.rolled_up == True,
+            ViewEvent.occurred_at < cutoff
+        ).delete(synchronize_session=False)
+        db.session.commit()
+
+    return rolled
+
+
+def window_counts(start_day, end_day):
+    """Per-title and per-day view counts for the inclusive window [start_day, end_day]."""
+    per_content = defaultdict(Counter)
+    per_day = defaultdict(Counter)
+
+    rolled = db.session.query(
+        DailyContentViews.day,
+        DailyContentViews.content_id,
+        DailyContentViews.views,
+        DailyContentViews.playbacks
+    ).filter(DailyContentViews.day >= start_day, DailyContentViews.day <= end_day)
+
+    # Events not yet rolled up are few; the (rolled_up, id) index finds them
+    window_start = datetime.combine(start_day, datetime.min.time())
+    window_end = datetime.combine(end_day + timedelta(days=1), datetime.min.time())
+    pending = _event_counts(
+        ViewEvent.rolled_up == False,
+        ViewEvent.occurred_at >= window_start,
+        ViewEvent.occurred_at < window_end
+    )
+
+    for rows in (rolled, pending):
+        for day, content_id, views, playbacks in rows:
+            counts = {'views': views or 0, 'playbacks': playbacks or 0}
+            per_content[content_id].update(counts)
+            per_day[day].update(counts)
+
+    return per_content, per_day
+
+
+class ViewRollup(PeriodicWorker):
+    thread_name = 'view-rollup'
+    run_at_exit = False
+
+    def __init__(self):
+        super().__init__(DEFAULT_ROLLUP_INTERVAL)
+        self.retention_days = DEFAULT_RETENTION_DAYS
+
+    def init_app(self, app):
+        super().init_app(app)
+        self.interval = app.config.get('VIEW_ROLLUP_INTERVAL', DEFAULT_ROLLUP_INTERVAL)
+        self.retention_days = app.config.get('VIEW_EVENT_RETENTION_DAYS', DEFAULT_RETENTION_DAYS)
+        app.extensions['view_rollup'] = self
+
+    def run_once(self):
+        with self.app.app_context():
+            return rollup_views(self.retention_days)
+
+    def ensure_running(self):
+        # Synchronous mode means "cron runs `flask rollup-views`"
+        if self.app is not None and not self.synchronous:
+            super().ensure_running()
+
+
+view_rollup = ViewRollup()
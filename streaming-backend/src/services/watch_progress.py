@@ -0,0 +1,190 @@
+import threading
+from datetime import datetime
+from sqlalchemy import bindparam
+from sqlalchemy.exc import OperationalError
+from src.models.user import db
+from src.models.interactions import WatchHistory
+from src.services.view_counter import view_counter
+from src.services.background import PeriodicWorker
+
+# Coalescing ingestion for player heartbeats. Progress updates are buffered in
+# memory keyed by (user_id, content_id, episode_id); a newer update replaces the
+# pending one, so a player posting every few seconds produces one write per key
+# per flush interval. Flushes look up the existing rows for the whole batch in
+# one query, then apply executemany UPDATEs and INSERTs. ON CONFLICT upserts
+# can't be used because episode_id is NULL for movies and NULLs never conflict.
+#
+# Each chunk commits on its own. A chunk that fails is retried row by row so
+# one bad row can't hold up everyone else's progress; a row that keeps failing
+# is dropped (and logged) after MAX_FLUSH_ATTEMPTS flushes. If the database is
+# unreachable, everything not yet written goes back in the buffer untouched.
+
+DEFAULT_FLUSH_INTERVAL = 5  # seconds
+DEFAULT_MAX_PENDING = 5000
+FLUSH_CHUNK_SIZE = 500
+MAX_FLUSH_ATTEMPTS = 3
+
+COMPLETION_THRESHOLD = 0.9  # 90% watched counts as completed
+
+
+class WatchProgressCoalescer(PeriodicWorker):
+    thread_name = 'watch-progress-flush'
+
+    def __init__(self):
+        super().__init__(DEFAULT_FLUSH_INTERVAL)
+        self.max_pending = DEFAULT_MAX_PENDING
+        self._lock = threading.Lock()
+        self._pending = {}
+        self.received = 0
+        self.written = 0
+
+    def init_app(self, app):
+        super().init_app(app)
+        self.interval = app.config.get('WATCH_PROGRESS_FLUSH_INTERVAL', DEFAULT_FLUSH_INTERVAL)
+        self.max_pending = app.config.get('WATCH_PROGRESS_MAX_PENDING', DEFAULT_MAX_PENDING)
+        app.extensions['watch_progress'] = self
+
+    def submit(self, user_id, updates):
+        # updates: iterable of (content_id, episode_id, watch_time, total_time)
+        now = datetime.utcnow()
+        with self._lock:
+            for content_id, episode_id, watch_time, total_time in updates:
+                # (watch_time, total_time, seen_at, failed flush attempts)
+                self._pending[(user_id, content_id, episode_id)] = (watch_time, total_time, now, 0)
+                self.received += 1
+            threshold_reached = len(self._pending) >= self.max_pending
+
+        if self.synchronous:
+            self.flush()
+            return
+
+        self.ensure_running()
+        if threshold_reached:
+            self.wake()
+
+    def stats(self):
+        with self._lock:
+            return {'pending': len(self._pending), 'received': self.received, 'written': self.written}
+
+    def _swap(self):
+        with self._lock:
+            batch, self._pending = self._pending, {}
+        return batch
+
+    def _restore(self, batch):
+        with self._lock:
+            # Anything submitted since the swap is newer and wins
+            for key, value in batch.items():
+                self._pending.setdefault(key, value)
+
+    def flush(self):
+        batch = self._swap()
+        if not batch:
+            return 0
+
+        items = list(batch.items())
+        written, started = set(), []
+        with self.app.app_context():
+            try:
+                for i in range(0, len(items), FLUSH_CHUNK_SIZE):
+                    chunk = items[i:i + FLUSH_CHUNK_SIZE]
+                    try:
+                        chunk_started = self._write_chunk(chunk)
+                        db.session.commit()
+                        started.extend(chunk_started)
+                        written.update(key for key, _ in chunk)
+                    except OperationalError:
+                        raise
+                    except Exception:
+                        db.session.rollback()
+                        started.extend(self._write_rows(chunk, written))
+            except OperationalError as e:
+                db.session.rollback()
+                self._restore({key: value for key, value in items if key not in written})
+                self.app.logger.warning('Watch progress flush failed, will retry: %s', e)
+
+        for user_id, content_id, episode_id in started:
+            view_counter.record_episode_view(episode_id, content_id=content_id, user_id=user_id)
+
+        with self._lock:
+            self.written += len(written)
+        return len(written)
+
+    def _write_rows(self, items, written):
+        # Isolate the row(s) that failed a chunk; the rest are written one by one
+        started, retry = [], {}
+        for key, value in items:
+            try:
+                row_started = self._write_chunk([(key, value)])
+                db.session.commit()
+                started.extend(row_started)
+                written.add(key)
+            except OperationalError:
+                raise
+            except Exception as e:
+                db.session.rollback()
+                watch_time, total_time, seen_at, attempts = value
+                if attempts + 1 >= MAX_FLUSH_ATTEMPTS:
+                    self.app.logger.error('Dropping watch progress %s %s after %d failed flushes: %s',
+                                          key, value[:2], attempts + 1, e)
+                else:
+                    retry[key] = (watch_time, total_time, seen_at, attempts + 1)
+        self._restore(retry)
+        return started
+
+    run_once = flush
+
+    def _write_chunk(self, items):
+        keys = [key for key, _ in items]
+        user_ids = {user_id for user_id, _, _ in keys}
+        content_ids = {content_id for _, content_id, _ in keys}
+
+        # Narrow on indexed columns, then match the exact keys (including NULL episodes) here
+        existing = {}
+        rows = db.session.query(
+            WatchHistory.id, WatchHistory.user_id, WatchHistory.content_id, WatchHistory.episode_id
+        ).filter(
+            WatchHistory.user_id.in_(user_ids),
+            WatchHistory.content_id.in_(content_ids)
+        )
+        wanted = set(keys)
+        for row_id, user_id, content_id, episode_id in rows:
+            if (user_id, content_id, episode_id) in wanted:
+                existing[(user_id, content_id, episode_id)] = row_id
+
+        updates, inserts, started = [], [], []
+        for (user_id, content_id, episode_id), (watch_time, total_time, seen_at, _) in items:
+            values = {
+                'watch_time': watch_time,
+                'total_time': total_time,
+                'completed': bool(total_time) and watch_time >= total_time * COMPLETION_THRESHOLD,
+                'last_watched': seen_at
+            }
+            row_id = existing.get((user_id, content_id, episode_id))
+            if row_id is not None:
+                updates.append(dict(values, row_id=row_id))
+            else:
+                inserts.append(dict(
+                    values, user_id=user_id, content_id=content_id,
+                    episode_id=episode_id, created_at=seen_at
+                ))
+                if episode_id:
+                    started.append((user_id, content_id, episode_id))
+
+        table = WatchHistory.__table__
+        if updates:
+            db.session.execute(
+                table.update().where(table.c.id == bindparam('row_id')).values(
+                    watch_time=bindparam('watch_time'),
+                    total_time=bindparam('total_time'),
+                    completed=bindparam('completed'),
+                    last_watched=bindparam('last_watched')
+                ),
+                updates
+            )
+        if inserts:
+            db.session.execute(table.insert(), inserts)
+        return started
+
+
+watch_progress = WatchProgressCoalescer()
@@ -0,0 +1,82 @@
+import os
+import sys
+import tempfile
+
+import pytest
+from sqlalchemy import event
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# src.main builds the app at import time, so point it at a scratch database and
+# run every background worker inline before importing it
+_db_dir = tempfile.mkdtemp(prefix='streamflix-tests-')
+os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(_db_dir, 'test.db')}"
+os.environ.update({
+    'PASSWORD_HASH_WORKERS': '0',
+    'PASSWORD_HASH_METHOD': 'pbkdf2:sha256:1000',
+    'RESPONSE_CACHE_TTL': '0',
+    'PRINCIPAL_CACHE_TTL': '0',
+    'VIEW_COUNTER_FLUSH_INTERVAL': '0',
+    'VIEW_ROLLUP_INTERVAL': '0',
+    'WATCH_PROGRESS_FLUSH_INTERVAL': '0',
+    'DASHBOARD_STATS_REFRESH_INTERVAL': '0',
+    'NOTIFICATION_FANOUT_INTERVAL': '0',
+    'NOTIFICATION_STREAM_BACKEND': 'local',
+    'HOME_ROW_WORKERS': '0',
+})
+
+from src.main import app as flask_app  # noqa: E402
+from src.models.user import User, db  # noqa: E402
+from src.services.search import create_search_index  # noqa: E402
+
+
+@pytest.fixture
+def app():
+    with flask_app.app_context():
+        db.session.remove()
+        db.drop_all()
+        db.create_all()
+        create_search_index()
+        yield flask_app
+        db.session.remove()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def make_user(app):
+    def make(username, is_admin=False):
+        user = User(username=username, email=f'{username}@example.com', is_admin=is_admin)
+        user.set_password('Password123!')
+        db.session.add(user)
+        db.session.commit()
+        return user
+    return make
+
+
+def auth_headers(user):
+    return {'Authorization': f'Bearer {user.generate_token()}'}
+
+
+class QueryCounter:
+    def __init__(self, engine):
+        self.engine = engine
+        self.statements = []
+
+    @property
+    def count(self):
+        return len(self.statements)
+
+    def _record(self, conn, cursor, statement, *args):
+        self.statements.append(statement)
+
+    def __enter__(self):
+        self.statements = []
+        event.listen(self.engine, 'before_cursor_execute', self._record)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(self.engine, 'before_cursor_execute', self._record)
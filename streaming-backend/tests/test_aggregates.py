@@ -0,0 +1,42 @@
+from src.models.user import db
+from src.models.content import Content
+from src.models.interactions import Rating, Comment, Favorite
+from src.services.aggregates import reconcile_aggregates
+
+AGGREGATES = ('rating', 'rating_sum', 'rating_count', 'comment_count', 'favorite_count')
+
+
+def snapshot(content_ids):
+    db.session.expire_all()
+    return {
+        content.id: tuple(getattr(content, name) for name in AGGREGATES)
+        for content in Content.query.filter(Content.id.in_(content_ids))
+    }
+
+
+def test_deleting_a_user_retracts_their_engagement(client, make_user):
+    leaving, staying = make_user('leaving'), make_user('staying')
+    first, second = Content(title='First', content_type='movie'), Content(title='Second', content_type='movie')
+    db.session.add_all([first, second])
+    db.session.flush()
+    db.session.add_all([
+        Rating(user_id=leaving.id, content_id=first.id, score=9),
+        Rating(user_id=staying.id, content_id=first.id, score=5),
+        Rating(user_id=leaving.id, content_id=second.id, score=2),
+        Comment(user_id=leaving.id, content_id=first.id, text='Great'),
+        Comment(user_id=leaving.id, content_id=first.id, text='Hidden', is_active=False),
+        Comment(user_id=staying.id, content_id=second.id, text='Fine'),
+        Favorite(user_id=leaving.id, content_id=first.id),
+        Favorite(user_id=staying.id, content_id=second.id),
+    ])
+    db.session.commit()
+    reconcile_aggregates()
+    ids = [first.id, second.id]
+
+    assert client.delete(f'/api/users/{leaving.id}').status_code == 204
+    maintained = snapshot(ids)
+
+    reconcile_aggregates()
+    assert maintained == snapshot(ids)
+    assert maintained[first.id] == (5.0, 5.0, 1, 0, 0)
+    assert maintained[second.id] == (0.0, 0.0, 0, 1, 1)
@@ -0,0 +1,65 @@
+import json
+
+from src.models.content import Content, Episode
+from src.services.catalog_import import CatalogImporter
+
+
+def ndjson(*records):
+    return [json.dumps(record) for record in records]
+
+
+def test_episodes_with_sparse_optional_fields_share_a_batch(app):
+    report = CatalogImporter(batch_size=10).run(ndjson(
+        {'type': 'content', 'ref': 'show', 'title': 'Show', 'content_type': 'series', 'episodes': [
+            {'season_number': 1, 'episode_number': 1, 'title': 'Pilot', 'duration': 42},
+            {'season_number': 1, 'episode_number': 2, 'title': 'Second'},
+        ]},
+        {'type': 'episode', 'series_ref': 'show', 'season_number': 1, 'episode_number': 3,
+         'title': 'Third', 'thumbnail': 'https://example.com/3.jpg'},
+        {'type': 'episode', 'series_ref': 'show', 'season_number': 1, 'episode_number': 4, 'title': 'Fourth'},
+    ))
+
+    assert report['error_count'] == 0, report['errors']
+    assert report['created'] == {'genres': 0, 'content': 1, 'episodes': 4}
+
+    series = Content.query.filter_by(title='Show').one()
+    episodes = {episode.episode_number: episode for episode in Episode.query.filter_by(series_id=series.id)}
+    assert episodes[1].duration == 42
+    assert episodes[2].duration is None
+    assert episodes[3].thumbnail == 'https://example.com/3.jpg'
+    assert all(episode.is_active and episode.view_count == 0 for episode in episodes.values())
+
+
+def test_bad_line_does_not_fail_its_batch(app):
+    report = CatalogImporter(batch_size=10).run(ndjson(
+        {'type': 'content', 'title': 'Film', 'content_type': 'movie', 'duration': 120},
+        {'type': 'content', 'title': 'Short'},
+        {'type': 'content', 'title': 'Other Film', 'content_type': 'movie'},
+    ))
+
+    assert report['created']['content'] == 2
+    assert report['errors'] == [{'line': 2, 'error': 'missing content_type'}]
+
+
+def test_badly_typed_values_are_reported_on_their_line(app):
+    report = CatalogImporter(batch_size=50).run(ndjson(
+        {'type': 'genre', 'name': 'Noir'},
+        {'type': 'genre', 'name': 5},
+        {'type': ['content']},
+        {'type': 'content', 'title': 'Bad genres', 'content_type': 'movie', 'genres': 5},
+        {'type': 'content', 'title': 'Bad year', 'content_type': 'movie', 'release_year': '1999'},
+        {'type': 'content', 'title': 'Huge', 'content_type': 'movie', 'duration': 10 ** 12},
+        {'type': 'content', 'title': 'x' * 201, 'content_type': 'movie'},
+        {'type': 'content', 'title': 'Flag', 'content_type': 'movie', 'is_featured': 'yes'},
+        {'type': 'content', 'ref': 'show', 'title': 'Show', 'content_type': 'series', 'genres': ['Noir'],
+         'episodes': 3},
+        {'type': 'content', 'ref': 'ok', 'title': 'Good', 'content_type': 'series', 'genres': ['Noir']},
+        {'type': 'episode', 'series_ref': 'ok', 'season_number': True, 'episode_number': 1, 'title': 'Bool'},
+        {'type': 'episode', 'series_ref': 'ok', 'season_number': 1, 'episode_number': 1, 'title': 'Pilot',
+         'duration': 'long'},
+        {'type': 'episode', 'series_ref': 'ok', 'season_number': 1, 'episode_number': 2, 'title': 'Second'},
+    ))
+
+    assert report['created'] == {'genres': 1, 'content': 1, 'episodes': 1}
+    assert sorted(error['line'] for error in report['errors']) == [2, 3, 4, 5, 6, 7, 8, 9, 11, 12]
+    assert not any(error['error'].startswith('batch failed') for error in report['errors'])
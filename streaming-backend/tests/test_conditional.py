@@ -0,0 +1,67 @@
+import pytest
+
+from conftest import QueryCounter
+from src.models.user import db
+from src.models.content import Content
+from src.services.view_counter import view_counter
+
+
+@pytest.fixture
+def titles(app):
+    titles = [Content(title=f'Title {i}', content_type='movie', view_count=i) for i in range(5)]
+    db.session.add_all(titles)
+    db.session.commit()
+    return titles
+
+
+@pytest.mark.parametrize('sort_by', ['view_count', 'rating'])
+@pytest.mark.parametrize('cursor', ['', '&cursor='])
+def test_aggregate_sorted_lists_revalidate_when_the_aggregate_moves(client, titles, sort_by, cursor):
+    url = f'/api/content?sort_by={sort_by}&per_page=3{cursor}'
+    etag = client.get(url).headers['ETag']
+    assert client.get(url, headers={'If-None-Match': etag}).status_code == 304
+
+    # The view counter and rating deltas update these without touching updated_at
+    table = Content.__table__
+    db.session.execute(table.update().where(table.c.id == titles[0].id).values(
+        {sort_by: 100, 'updated_at': table.c.updated_at}
+    ))
+    db.session.commit()
+
+    response = client.get(url, headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert response.get_json()['content'][0]['id'] == titles[0].id
+
+
+def test_cursor_pages_run_no_count(client, titles):
+    with QueryCounter(db.engine) as counter:
+        response = client.get('/api/content?per_page=2&cursor=')
+    assert response.status_code == 200
+    assert not [statement for statement in counter.statements if 'count(' in statement.lower()]
+
+    etag = response.headers['ETag']
+    assert client.get('/api/content?per_page=2&cursor=', headers={'If-None-Match': etag}).status_code == 304
+
+
+def bump_counter(content_id, column):
+    # Counter deltas leave updated_at alone
+    table = Content.__table__
+    db.session.execute(table.update().where(table.c.id == content_id).values(
+        {column: table.c[column] + 1, 'updated_at': table.c.updated_at}
+    ))
+    db.session.commit()
+
+
+@pytest.mark.parametrize('column', ['view_count', 'comment_count', 'favorite_count'])
+@pytest.mark.parametrize('url', ['/api/content', '/api/content?cursor=', '/api/content/{id}'])
+def test_catalog_validators_see_counter_changes(client, titles, monkeypatch, column, url):
+    # Views are written through in tests, which would change the detail on every read
+    monkeypatch.setattr(view_counter, 'record_content_view', lambda *args, **kwargs: None)
+    url = url.format(id=titles[2].id)
+    response = client.get(url)
+    etag = response.headers['ETag']
+    assert 'Last-Modified' not in response.headers
+    assert client.get(url, headers={'If-None-Match': etag}).status_code == 304
+
+    bump_counter(titles[2].id, column)
+    assert client.get(url, headers={'If-None-Match': etag}).status_code == 200
@@ -0,0 +1,45 @@
+import pytest
+
+from src.models.user import db
+from src.models.content import Content, Episode
+
+
+@pytest.fixture
+def series(app):
+    series = Content(title='Show', content_type='series')
+    db.session.add(series)
+    db.session.flush()
+    db.session.add_all(
+        Episode(series_id=series.id, season_number=season, episode_number=number, title=f'S{season}E{number}')
+        for season in (1, 2) for number in (1, 2, 3)
+    )
+    db.session.commit()
+    return series
+
+
+def test_unpaged_requests_keep_the_plain_array(client, series):
+    everything = client.get(f'/api/content/{series.id}/episodes').get_json()
+    assert isinstance(everything, list) and len(everything) == 6
+
+    season = client.get(f'/api/content/{series.id}/episodes?season=2').get_json()
+    assert [episode['title'] for episode in season] == ['S2E1', 'S2E2', 'S2E3']
+
+
+def test_paged_requests_page_within_a_season(client, series):
+    page = client.get(f'/api/content/{series.id}/episodes?season=2&per_page=2').get_json()
+    assert [episode['title'] for episode in page['episodes']] == ['S2E1', 'S2E2']
+    assert page['pagination']['total'] == 3
+
+    first = client.get(f'/api/content/{series.id}/episodes?per_page=4&cursor=').get_json()
+    rest = client.get(
+        f"/api/content/{series.id}/episodes?per_page=4&cursor={first['pagination']['next_cursor']}"
+    ).get_json()
+    assert [episode['title'] for episode in first['episodes'] + rest['episodes']] == [
+        'S1E1', 'S1E2', 'S1E3', 'S2E1', 'S2E2', 'S2E3'
+    ]
+
+
+def test_series_detail_lists_seasons(client, series):
+    detail = client.get(f'/api/content/{series.id}').get_json()
+    assert 'episodes' not in detail
+    assert [(season['season_number'], season['episode_count']) for season in detail['seasons']] == [(1, 3), (2, 3)]
@@ -0,0 +1,30 @@
+from types import SimpleNamespace
+
+from src.models.user import User, db
+from src.models.content import Content, Episode
+from src.models.interactions import Favorite, Notification, NotificationFanout
+from src.services.fanout import run_fanout
+
+
+def test_overlapping_run_drops_an_already_claimed_chunk(app, make_user):
+    followers = [make_user(f'fan{i}') for i in range(5)]
+    series = Content(title='Show', content_type='series')
+    db.session.add(series)
+    db.session.flush()
+    episode = Episode(series_id=series.id, season_number=1, episode_number=1, title='Pilot')
+    db.session.add(episode)
+    db.session.add_all(Favorite(user_id=user.id, content_id=series.id) for user in followers)
+    db.session.flush()
+    db.session.add(NotificationFanout(episode_id=episode.id, series_id=series.id))
+    db.session.commit()
+
+    # A second run that read the job before the first one advanced it
+    stale = SimpleNamespace(episode_id=episode.id, series_id=series.id, last_user_id=0)
+
+    assert run_fanout(db.session.get(NotificationFanout, episode.id), chunk_size=2) == 5
+    assert run_fanout(stale, chunk_size=2) == 0
+
+    assert Notification.query.filter_by(episode_id=episode.id).count() == 5
+    assert {user.unread_notifications for user in User.query.filter(User.id.in_([u.id for u in followers]))} == {1}
+    job = db.session.get(NotificationFanout, episode.id)
+    assert (job.status, job.sent_count) == ('done', 5)
@@ -0,0 +1,41 @@
+import time
+
+from src.services import home
+from src.services.home import HomeAssembler
+
+
+def sleeper(seconds, row):
+    def build(user_id, limit):
+        time.sleep(seconds)
+        return row
+    return build
+
+
+def test_row_deadline_starts_when_the_row_runs(app, monkeypatch):
+    monkeypatch.setattr(home, 'PUBLIC_ROWS', (
+        ('first', sleeper(0.15, {'content_ids': [1]})),
+        ('queued', sleeper(0.15, {'content_ids': [2]})),
+        ('slow', sleeper(0.5, {'content_ids': [3]})),
+    ))
+    assembler = HomeAssembler()
+    assembler.init_app(app)
+    assembler.workers, assembler.timeout = 1, 0.25
+
+    # 'queued' waits 0.15s for the single thread, then finishes inside its own 0.25s
+    rows, omitted = assembler.build_rows(None)
+    assert rows == {'first': {'content_ids': [1]}, 'queued': {'content_ids': [2]}}
+    assert omitted == ['slow']
+
+
+def test_requests_do_not_share_row_threads(app, monkeypatch):
+    assembler = HomeAssembler()
+    assembler.init_app(app)
+    assembler.workers, assembler.timeout = 1, 0.05
+
+    # A row stuck from an earlier request doesn't hold up the next one
+    monkeypatch.setattr(home, 'PUBLIC_ROWS', (('stuck', sleeper(0.5, {'content_ids': []})),))
+    assert assembler.build_rows(None) == ({}, ['stuck'])
+
+    monkeypatch.setattr(home, 'PUBLIC_ROWS', (('only', sleeper(0.05, {'content_ids': []})),))
+    assembler.timeout = 0.3
+    assert assembler.build_rows(None) == ({'only': {'content_ids': []}}, [])
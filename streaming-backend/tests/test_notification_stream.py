@@ -0,0 +1,104 @@
+import pytest
+from flask import Flask
+
+from conftest import auth_headers
+from src.models.user import db
+from src.models.interactions import Notification
+from src.services.notification_stream import (
+    DatabaseBackend, NotificationStream, StreamsFull, notification_stream
+)
+
+
+def stream_for(**config):
+    app = Flask(__name__)
+    app.config.update(NOTIFICATION_STREAM_BACKEND='local', **config)
+    stream = NotificationStream()
+    stream.init_app(app)
+    return stream
+
+
+def test_stream_cap_leaves_gunicorn_threads_free():
+    gthread = {'GUNICORN_WORKER_CLASS': 'gthread'}
+    assert stream_for(GUNICORN_THREADS=64, NOTIFICATION_STREAM_MAX_CONNECTIONS=200, **gthread).max_connections == 48
+    assert stream_for(GUNICORN_THREADS=64, NOTIFICATION_STREAM_MAX_CONNECTIONS=10, **gthread).max_connections == 10
+    assert stream_for(GUNICORN_THREADS=2, NOTIFICATION_STREAM_MAX_CONNECTIONS=10, **gthread).max_connections == 1
+    # gevent streams park greenlets, not threads
+    assert stream_for(GUNICORN_WORKER_CLASS='gevent', GUNICORN_THREADS=64,
+                      NOTIFICATION_STREAM_MAX_CONNECTIONS=500).max_connections == 500
+
+
+def test_subscribe_past_cap_is_refused():
+    stream = stream_for(NOTIFICATION_STREAM_MAX_CONNECTIONS=6)
+    subscriptions = [stream.subscribe(user_id) for user_id in range(6)]
+    with pytest.raises(StreamsFull):
+        stream.subscribe(99)
+
+    stream.unsubscribe(subscriptions[0])
+    stream.subscribe(99)
+
+
+def test_refused_stream_gets_a_retry_frame(client, make_user, monkeypatch):
+    user = make_user('viewer')
+    monkeypatch.setattr(notification_stream, 'max_connections', 0)
+
+    response = client.get('/api/notifications/stream', headers=auth_headers(user))
+    assert response.status_code == 200
+    assert response.mimetype == 'text/event-stream'
+    assert response.get_data(as_text=True).startswith('retry: ')
+
+
+def test_late_committed_lower_ids_are_still_sent(app, make_user, monkeypatch):
+    user = make_user('viewer')
+    monkeypatch.setattr(notification_stream, 'heartbeat', 0.01)
+
+    def notify(notification_id):
+        db.session.add(Notification(id=notification_id, user_id=user.id, title=f'#{notification_id}', message='New'))
+        db.session.commit()
+
+    subscription = notification_stream.subscribe(user.id)
+    frames = notification_stream.events(subscription, last_event_id=0)
+    assert next(frames).startswith('retry: ')
+    notify(10)
+    assert next(frames).startswith('id: 10\n')
+
+    # Written by another worker that committed after #10 went out
+    notify(5)
+    subscription.bell.set()
+    frame = next(frames)
+    assert frame.startswith('id: 10\n') and '"id": 5,' in frame
+    assert next(frames) == ': heartbeat\n\n'
+    frames.close()
+
+
+def test_resumed_stream_does_not_repeat_recent_notifications(app, make_user, monkeypatch):
+    user = make_user('viewer')
+    monkeypatch.setattr(notification_stream, 'heartbeat', 0.01)
+    db.session.add_all([
+        Notification(id=notification_id, user_id=user.id, title=f'#{notification_id}', message='New')
+        for notification_id in (3, 4, 7)
+    ])
+    db.session.commit()
+
+    frames = notification_stream.events(notification_stream.subscribe(user.id), last_event_id=4)
+    next(frames)
+    assert next(frames).startswith('id: 7\n')
+    assert next(frames) == ': heartbeat\n\n'
+    frames.close()
+
+
+def test_database_poll_rings_for_late_committed_lower_ids(app, make_user):
+    user = make_user('viewer')
+    backend = DatabaseBackend(notification_stream, 0)
+    subscription = notification_stream.subscribe(user.id)
+    try:
+        backend.run_once()
+        for notification_id in (10, 5):
+            db.session.add(Notification(id=notification_id, user_id=user.id, title='New', message='New'))
+            db.session.commit()
+            backend.run_once()
+            assert subscription.wait(0)
+
+        backend.run_once()
+        assert not subscription.wait(0)
+    finally:
+        notification_stream.unsubscribe(subscription)
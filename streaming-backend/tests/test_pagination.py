@@ -0,0 +1,27 @@
+import pytest
+
+from conftest import auth_headers
+from src.models.user import db
+from src.models.content import Content
+from src.models.interactions import Comment
+
+
+@pytest.mark.parametrize('per_page', [0, -3])
+def test_cursor_pages_clamp_per_page(client, make_user, per_page):
+    user = make_user('reader')
+    title = Content(title='Title', content_type='movie')
+    db.session.add(title)
+    db.session.flush()
+    root = Comment(user_id=user.id, content_id=title.id, text='Root')
+    db.session.add(root)
+    db.session.flush()
+    db.session.add_all(Comment(user_id=user.id, content_id=title.id, text=f'Reply {i}', parent_id=root.id)
+                       for i in range(3))
+    db.session.commit()
+
+    for url in (f'/api/content?per_page={per_page}&cursor=',
+                f'/api/comments/{root.id}/replies?per_page={per_page}&cursor=',
+                f'/api/favorites?per_page={per_page}&cursor='):
+        response = client.get(url, headers=auth_headers(user))
+        assert response.status_code == 200, (url, response.get_json())
+        assert response.get_json()['pagination']['per_page'] == 1
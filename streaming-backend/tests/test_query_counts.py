@@ -0,0 +1,75 @@
+import pytest
+
+from conftest import QueryCounter, auth_headers
+from src.models.user import db
+from src.models.content import Content, Genre
+from src.models.interactions import Rating, Comment, WatchHistory, Favorite, Notification
+
+# List endpoints eager-load what their serializers touch, so the number of
+# statements per request must not grow with the page size.
+
+ROWS = 30
+SMALL_PAGE = 5
+LARGE_PAGE = 25
+
+
+@pytest.fixture
+def catalog(app, make_user):
+    admin = make_user('admin', is_admin=True)
+    viewer = make_user('viewer')
+    others = [make_user(f'user{i}') for i in range(ROWS)]
+
+    genres = [Genre(name=f'Genre {i}') for i in range(3)]
+    titles = [
+        Content(title=f'Title {i}', content_type='movie', genres=[genres[i % 3]])
+        for i in range(ROWS)
+    ]
+    db.session.add_all(genres + titles)
+    db.session.flush()
+
+    target = titles[0]
+    for i, (user, title) in enumerate(zip(others, titles)):
+        db.session.add(Favorite(user_id=viewer.id, content_id=title.id))
+        db.session.add(WatchHistory(user_id=viewer.id, content_id=title.id, watch_time=60, total_time=600))
+        db.session.add(Notification(
+            user_id=viewer.id, title=f'Notice {i}', message='New episode', content_id=title.id
+        ))
+        db.session.add(Rating(user_id=user.id, content_id=target.id, score=7))
+        root = Comment(user_id=user.id, content_id=target.id, text=f'Comment {i}')
+        db.session.add(root)
+        db.session.flush()
+        db.session.add(Comment(user_id=others[-1 - i].id, content_id=target.id, text='Reply', parent_id=root.id))
+    db.session.commit()
+
+    return {'admin': auth_headers(admin), 'viewer': auth_headers(viewer), 'content_id': target.id}
+
+
+LIST_ENDPOINTS = [
+    ('favorites', 'viewer', '/api/favorites'),
+    ('watch-history', 'viewer', '/api/watch-history'),
+    ('notifications', 'viewer', '/api/notifications'),
+    ('ratings', 'viewer', '/api/content/{content_id}/ratings'),
+    ('comments', 'viewer', '/api/content/{content_id}/comments'),
+    ('admin-users', 'admin', '/api/admin/users'),
+    ('admin-content', 'admin', '/api/admin/content/all'),
+    ('admin-comments', 'admin', '/api/admin/comments'),
+]
+
+
+@pytest.mark.parametrize('role, path', [(role, path) for _, role, path in LIST_ENDPOINTS],
+                         ids=[name for name, _, _ in LIST_ENDPOINTS])
+@pytest.mark.parametrize('mode', ['page', 'cursor'])
+def test_query_count_independent_of_page_size(app, client, catalog, role, path, mode):
+    url = path.format(content_id=catalog['content_id'])
+    headers = catalog[role]
+    cursor = '&cursor=' if mode == 'cursor' else ''
+
+    counts = []
+    for per_page in (SMALL_PAGE, LARGE_PAGE):
+        db.session.remove()
+        with QueryCounter(db.engine) as counter:
+            response = client.get(f'{url}?per_page={per_page}{cursor}', headers=headers)
+        assert response.status_code == 200, response.get_json()
+        counts.append(counter.count)
+
+    assert counts[0] == counts[1], f'{url}: {counts[0]} queries for {SMALL_PAGE} rows, {counts[1]} for {LARGE_PAGE}'
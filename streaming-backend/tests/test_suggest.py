@@ -0,0 +1,64 @@
+import random
+
+import pytest
+
+from src.models.user import db
+from src.models.content import Content
+from src.services.suggest import SuggestIndex, SHORT_PREFIX_LENGTH
+
+WORDS = ['the', 'dark', 'knight', 'then', 'theory', 'dawn', 'kingdom', 'tide', 'to', 'dust']
+
+
+def random_title(rng):
+    return ' '.join(rng.choice(WORDS) for _ in range(rng.randint(1, 3)))
+
+
+@pytest.fixture
+def catalog(app):
+    rng = random.Random(7)
+    titles = [
+        Content(title=random_title(rng), content_type='movie', director=rng.choice(['Tim Dorn', None]),
+                cast='Theo Kay, Dana Tate', view_count=rng.randint(0, 50))
+        for _ in range(60)
+    ]
+    db.session.add_all(titles)
+    db.session.commit()
+    return rng, titles
+
+
+def lookups(index):
+    prefixes = {''.join(word[:n]) for word in WORDS + ['tim', 'theo', 'dana'] for n in range(1, SHORT_PREFIX_LENGTH + 2)}
+    return {prefix: index.suggest(prefix, limit=20) for prefix in sorted(prefixes)}
+
+
+def test_short_prefixes_are_answered_without_scanning(catalog, monkeypatch):
+    index = SuggestIndex()
+    index.rebuild()
+    monkeypatch.setattr(index, '_scan', lambda prefix: pytest.fail(f'scanned for {prefix!r}'))
+    assert [item['title'] for item in index.suggest('t')]
+    assert index.suggest('th', limit=3) == index.suggest('th', limit=20)[:3]
+
+
+def test_incremental_updates_match_a_full_rebuild(catalog):
+    rng, titles = catalog
+    index = SuggestIndex()
+    index.rebuild()
+
+    for _ in range(40):
+        title = rng.choice(titles)
+        action = rng.choice(['rename', 'views', 'views', 'deactivate', 'reactivate'])
+        if action == 'rename':
+            title.title = random_title(rng)
+        elif action == 'views':
+            title.view_count = rng.randint(0, 50)
+        else:
+            title.is_active = action == 'reactivate'
+        db.session.commit()
+        if action == 'deactivate' and rng.random() < 0.5:
+            index.discard(title.id)
+        else:
+            index.refresh([title.id])
+
+    fresh = SuggestIndex()
+    fresh.rebuild()
+    assert lookups(index) == lookups(fresh)
@@ -0,0 +1,68 @@
+from datetime import datetime, timedelta
+
+from src.models.user import db
+from src.models.content import Content
+from src.models.analytics import ViewEvent, DailyContentViews, RollupCheckpoint
+from src.services.view_rollup import CHECKPOINT, rollup_views, window_counts
+
+
+def add_events(content_id, *ids, occurred_at=None, source='detail'):
+    db.session.add_all([
+        ViewEvent(id=event_id, content_id=content_id, source=source, occurred_at=occurred_at or datetime.utcnow())
+        for event_id in ids
+    ])
+    db.session.commit()
+
+
+def rolled_views():
+    db.session.expire_all()
+    return sum(row.views + row.playbacks for row in DailyContentViews.query)
+
+
+def test_late_committed_lower_ids_are_still_rolled_up(app):
+    content = Content(title='Film', content_type='movie')
+    db.session.add(content)
+    db.session.commit()
+
+    add_events(content.id, 10, 11)
+    assert rollup_views(chunk_size=1) == 2
+
+    # A flush from another worker commits events with lower ids afterwards
+    add_events(content.id, 5, 6, source='playback')
+    today = datetime.utcnow().date()
+    per_content, _ = window_counts(today, today)
+    assert per_content[content.id] == {'views': 2, 'playbacks': 2}
+
+    assert rollup_views() == 2
+    assert rollup_views() == 0
+    assert rolled_views() == 4
+    per_content, _ = window_counts(today, today)
+    assert per_content[content.id] == {'views': 2, 'playbacks': 2}
+
+
+def test_old_events_are_counted_before_they_are_pruned(app):
+    content = Content(title='Film', content_type='movie')
+    db.session.add(content)
+    db.session.commit()
+
+    old = datetime.utcnow() - timedelta(days=40)
+    add_events(content.id, 1, 2, occurred_at=old)
+    rollup_views(retention_days=30)
+    # Committed late, below the ids already pruned
+    add_events(content.id, 3, occurred_at=old)
+    add_events(content.id, 4)
+
+    assert rollup_views(retention_days=30) == 2
+    assert [event.id for event in ViewEvent.query] == [4]
+    assert rolled_views() == 4
+
+
+def test_events_under_a_legacy_checkpoint_are_not_counted_again(app):
+    content = Content(title='Film', content_type='movie')
+    db.session.add(content)
+    db.session.add(RollupCheckpoint(name=CHECKPOINT, last_event_id=2))
+    db.session.commit()
+    add_events(content.id, 1, 2, 3)
+
+    assert rollup_views() == 1
+    assert db.session.get(RollupCheckpoint, CHECKPOINT).last_event_id == 0
@@ -0,0 +1,54 @@
+from conftest import auth_headers
+from src.models.user import db
+from src.models.content import Content
+from src.models.interactions import WatchHistory
+from src.services.watch_progress import watch_progress, MAX_FLUSH_ATTEMPTS
+
+
+def test_bad_row_is_isolated_then_dropped(app, make_user):
+    user = make_user('viewer')
+    titles = [Content(title=f'Title {i}', content_type='movie') for i in range(3)]
+    db.session.add_all(titles)
+    db.session.commit()
+
+    # Inline mode flushes on submit; 2**70 overflows the integer column
+    watch_progress.submit(user.id, [
+        (titles[0].id, None, 60, 600),
+        (titles[1].id, None, 2 ** 70, 600),
+        (titles[2].id, None, 120, 600),
+    ])
+    db.session.expire_all()
+    assert {row.content_id: row.watch_time for row in WatchHistory.query} == {titles[0].id: 60, titles[2].id: 120}
+    assert watch_progress.stats()['pending'] == 1
+
+    for _ in range(MAX_FLUSH_ATTEMPTS - 1):
+        watch_progress.flush()
+    assert watch_progress.stats()['pending'] == 0
+
+    # Later progress still gets through
+    watch_progress.submit(user.id, [(titles[1].id, None, 30, 600)])
+    db.session.expire_all()
+    assert WatchHistory.query.filter_by(content_id=titles[1].id).one().watch_time == 30
+
+
+def test_batch_route_rejects_badly_typed_items(client, make_user):
+    user = make_user('viewer')
+    title = Content(title='Title', content_type='movie')
+    db.session.add(title)
+    db.session.commit()
+
+    response = client.post('/api/watch-history/batch', headers=auth_headers(user), json={'updates': [
+        {'content_id': True, 'watch_time': 1, 'total_time': 10},
+        {'content_id': [title.id], 'watch_time': 1, 'total_time': 10},
+        {'content_id': title.id, 'episode_id': {'id': 1}, 'watch_time': 1, 'total_time': 10},
+        {'content_id': title.id, 'watch_time': 2 ** 40, 'total_time': 10},
+        {'content_id': title.id, 'watch_time': False, 'total_time': 10},
+        {'content_id': title.id, 'watch_time': 12.6, 'total_time': 600},
+    ]})
+    assert response.status_code == 202, response.get_json()
+    body = response.get_json()
+    assert body['accepted'] == 1
+    assert [item['index'] for item in body['rejected']] == [0, 1, 2, 3, 4]
+
+    db.session.expire_all()
+    assert WatchHistory.query.filter_by(content_id=title.id).one().watch_time == 13